@@ -1,344 +1,447 @@
+import os
 import json
 import base64
+import gzip
+import asyncio
+import contextvars
+import cProfile
+import functools
+import pstats
+import random
+import threading
+import unicodedata
+import time
+import html
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import emoji
 import re
-from flask import Flask, render_template, request, jsonify
+import numpy as np
+from flask import (
+    Flask, Response, render_template, request, jsonify, make_response, send_from_directory, stream_with_context
+)
 from transformers import pipeline
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import text as sql_text
+from werkzeug.http import is_resource_modified
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+import click
 from flask_cors import CORS
+from model_registry import ModelRegistry, ModelEntry, parse_model_spec
+from models import db, RescoreCheckpoint, history_row_to_dict, aggregate_row_to_dict
+from storage import engine_options, migrate, create_history_store
+from jobs import JobRunner, FINISHED_STATUSES
+
+# Optional response encodings
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Process CPU/memory figures for /debug/metrics (Unix only)
+try:
+    import resource
+except ImportError:
+    resource = None
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+# Shard history into one SQLite file per month instead of the main database
+app.config['HISTORY_SHARDING'] = os.environ.get('HISTORY_SHARDING', '0') == '1'
+app.config['HISTORY_SHARD_DIR'] = os.environ.get('HISTORY_SHARD_DIR', os.path.join(app.instance_path, 'history'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# CPU-bound work (model inference, chart rendering) runs on a fixed-size pool
+# sized to the cores so concurrent requests never mean concurrent forward passes
+app.config['INFERENCE_WORKERS'] = int(os.environ.get('INFERENCE_WORKERS', os.cpu_count() or 1))
+# Seconds a request waits for its (possibly shared) inference result
+app.config['INFERENCE_TIMEOUT'] = float(os.environ.get('INFERENCE_TIMEOUT', 30))
+# Texts per forward pass when a list of texts is classified at once
+app.config['INFERENCE_BATCH_SIZE'] = int(os.environ.get('INFERENCE_BATCH_SIZE', 16))
+app.config['BULK_MAX_TEXTS'] = int(os.environ.get('BULK_MAX_TEXTS', 100))
+# Background jobs (POST /jobs): worker threads, texts per chunk/transaction, upload cap,
+# seconds before a silent worker's job is taken over, and the workers' nice value
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 1))
+app.config['JOB_CHUNK_SIZE'] = int(os.environ.get('JOB_CHUNK_SIZE', 32))
+app.config['JOB_MAX_TEXTS'] = int(os.environ.get('JOB_MAX_TEXTS', 100000))
+app.config['JOB_LEASE_S'] = float(os.environ.get('JOB_LEASE_S', 30))
+app.config['JOB_NICE'] = int(os.environ.get('JOB_NICE', 10))
+# Ranked emoji suggestions returned per analysis
+app.config['SUGGESTION_TOP_K'] = int(os.environ.get('SUGGESTION_TOP_K', 8))
+# Responses smaller than this are sent uncompressed
+app.config['COMPRESS_MIN_BYTES'] = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+# Pie chart renderer for the default `pie_chart`: 'png' (default, numpy raster laid
+# out like the original chart), 'svg' or 'matplotlib' (the original renderer, slow).
+# Clients can ask for SVG per request with "pie_chart_format": "svg"
+app.config['CHART_RENDERER'] = os.environ.get('CHART_RENDERER', 'png')
+app.config['CHART_PNG_WIDTH'] = int(os.environ.get('CHART_PNG_WIDTH', 780))
+app.config['HISTORY_CACHE_PAGES'] = int(os.environ.get('HISTORY_CACHE_PAGES', 64))
+# Model registry: <MODEL_DIR>/<name>/<version>/model.safetensors
+app.config['MODEL_DIR'] = os.environ.get('MODEL_DIR', 'models')
+app.config['EMOTION_MODEL'] = os.environ.get('EMOTION_MODEL', 'distilbert-emotion')
+app.config['HUB_MODEL_ID'] = os.environ.get('HUB_MODEL_ID', 'bhadresh-savani/distilbert-base-uncased-emotion')
+# Never load a model: serve everything from the fallback classifier (offline runs, load tests)
+app.config['FORCE_FALLBACK'] = os.environ.get('FORCE_FALLBACK', '0') == '1'
+# Token required by admin/debug endpoints that change state; unset disables them
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+# History retention: raw rows older than this are folded into daily aggregates
+app.config['HISTORY_RETENTION_DAYS'] = int(os.environ.get('HISTORY_RETENTION_DAYS', 90))
+# Request profiling: 0 disables sampling; header-triggered profiles need ADMIN_TOKEN
+app.config['PROFILE_SAMPLE_RATE'] = int(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 50))
+# Classifier cascade: the keyword classifier answers on its own when its top-2
+# margin and lexicon coverage clear these thresholds; otherwise the model runs
+app.config['CASCADE_ENABLED'] = os.environ.get('CASCADE_ENABLED', '0') == '1'
+app.config['CASCADE_MIN_MARGIN'] = float(os.environ.get('CASCADE_MIN_MARGIN', 0.35))
+app.config['CASCADE_MIN_COVERAGE'] = float(os.environ.get('CASCADE_MIN_COVERAGE', 0.3))
+# Model circuit breaker: within a rolling window of at least BREAKER_MIN_CALLS
+# model calls, too many errors or calls slower than the SLO open the breaker
+# and the keyword classifier serves traffic until half-open probes succeed
+app.config['BREAKER_ENABLED'] = os.environ.get('BREAKER_ENABLED', '1') == '1'
+app.config['BREAKER_WINDOW_S'] = float(os.environ.get('BREAKER_WINDOW_S', 30))
+app.config['BREAKER_MIN_CALLS'] = int(os.environ.get('BREAKER_MIN_CALLS', 10))
+app.config['BREAKER_ERROR_RATE'] = float(os.environ.get('BREAKER_ERROR_RATE', 0.5))
+app.config['BREAKER_SLO_MS'] = float(os.environ.get('BREAKER_SLO_MS', 1000))
+app.config['BREAKER_SLOW_RATE'] = float(os.environ.get('BREAKER_SLOW_RATE', 0.5))
+app.config['BREAKER_OPEN_S'] = float(os.environ.get('BREAKER_OPEN_S', 15))
+app.config['BREAKER_PROBES'] = int(os.environ.get('BREAKER_PROBES', 3))
 
-# Initialize database
-db = SQLAlchemy(app)
-
-# -------------------------------
-# Database Model
-# -------------------------------
-class AnalysisHistory(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    text = db.Column(db.Text, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    joy = db.Column(db.Float, default=0)
-    sadness = db.Column(db.Float, default=0)
-    anger = db.Column(db.Float, default=0)
-    fear = db.Column(db.Float, default=0)
-    surprise = db.Column(db.Float, default=0)
-    love = db.Column(db.Float, default=0)
-    neutral = db.Column(db.Float, default=0)
-    emoji_relevance = db.Column(db.String(20), default="neutral")  # New field for emoji relevance
-    relevance_score = db.Column(db.Float, default=0.0)  # New field for relevance score
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'text': self.text[:100] + '...' if len(self.text) > 100 else self.text,
-            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'emotions': {
-                'joy': float(self.joy),
-                'sadness': float(self.sadness),
-                'anger': float(self.anger),
-                'fear': float(self.fear),
-                'surprise': float(self.surprise),
-                'love': float(self.love),
-                'neutral': float(self.neutral)
-            },
-            'emoji_relevance': self.emoji_relevance,
-            'relevance_score': float(self.relevance_score) if self.relevance_score else 0.0
-        }
+# Initialize database (models live in models.py, history access goes through storage.py)
+db.init_app(app)
 
 # -------------------------------
 # Initialize Emotion Classifier
 # -------------------------------
-print("Loading emotion classifier...")
-try:
-    emotion_classifier = pipeline(
-        "text-classification",
-        model="bhadresh-savani/distilbert-base-uncased-emotion",
-        return_all_scores=True,
-        top_k=None
+# Keyword/lexicon classifier: the fallback when the model cannot load, and
+# the cheap first tier of the classifier cascade
+class FallbackClassifier:
+    # Weighted lexicons, matched as lowercase substrings
+    JOY_WORDS = {
+        'happy': 0.9, 'joy': 0.9, 'excited': 0.8, 'smile': 0.7, 'good': 0.6,
+        'great': 0.8, 'awesome': 0.8, 'amazing': 0.8, 'wonderful': 0.8,
+        'fantastic': 0.8, 'delighted': 0.9, 'thrilled': 0.9, 'ecstatic': 0.9,
+        'blissful': 0.9, 'cheerful': 0.8, 'content': 0.7, 'satisfied': 0.7,
+        'pleased': 0.7, 'grateful': 0.7, 'blessed': 0.6, 'fortunate': 0.6,
+        'lucky': 0.6, 'optimistic': 0.6, 'hopeful': 0.6
+    }
+
+    SADNESS_WORDS = {
+        'sad': 0.9, 'unhappy': 0.8, 'cry': 0.8, 'crying': 0.8, 'depressed': 0.9,
+        'bad': 0.7, 'worst': 0.8, 'miserable': 0.9, 'alone': 0.7, 'lonely': 0.8,
+        'heartbroken': 0.9, 'grief': 0.9, 'sorrow': 0.9, 'pain': 0.7, 'hurt': 0.7,
+        'down': 0.6, 'low': 0.6, 'blue': 0.6, 'gloomy': 0.7, 'melancholy': 0.8,
+        'despair': 0.9, 'hopeless': 0.9, 'overwhelmed': 0.8, 'tough': 0.7,
+        'difficult': 0.6, 'hard': 0.6, 'struggling': 0.7, 'suffering': 0.8,
+        'miss': 0.8, 'missing': 0.8, 'lost': 0.7, 'empty': 0.7
+    }
+
+    ANGER_WORDS = {
+        'angry': 0.9, 'mad': 0.8, 'furious': 0.9, 'rage': 0.9, 'hate': 0.9,
+        'annoyed': 0.7, 'irritated': 0.7, 'frustrated': 0.8, 'upset': 0.7,
+        'pissed': 0.9, 'outraged': 0.9, 'livid': 0.9, 'enraged': 0.9,
+        'resent': 0.8, 'bitter': 0.7, 'hostile': 0.8, 'aggressive': 0.8
+    }
+
+    FEAR_WORDS = {
+        'scared': 0.9, 'afraid': 0.9, 'fear': 0.9, 'frightened': 0.9,
+        'terrified': 0.9, 'anxious': 0.8, 'worried': 0.8, 'nervous': 0.8,
+        'panic': 0.9, 'dread': 0.9, 'horror': 0.9, 'terror': 0.9,
+        'apprehensive': 0.7, 'uneasy': 0.7, 'threatened': 0.8
+    }
+
+    SURPRISE_WORDS = {
+        'surprised': 0.9, 'shocked': 0.9, 'amazed': 0.8, 'astonished': 0.9,
+        'stunned': 0.9, 'wow': 0.7, 'incredible': 0.7, 'unbelievable': 0.8,
+        'unexpected': 0.9, 'sudden': 0.8, 'out of nowhere': 0.9,
+        'didn\'t expect': 0.9, 'can\'t believe': 0.9, 'blown away': 0.9
+    }
+
+    LOVE_WORDS = {
+        'love': 0.9, 'adore': 0.9, 'cherish': 0.8, 'affection': 0.8,
+        'passion': 0.8, 'romance': 0.8, 'fond': 0.7, 'like': 0.6,
+        'care': 0.7, 'compassion': 0.7, 'empathy': 0.6, 'sympathy': 0.6,
+        'tender': 0.7, 'warm': 0.6, 'heart': 0.7, 'sweet': 0.6
+    }
+
+    # Emoji -> (emotion, boost)
+    EMOJI_EMOTION_MAP = {
+        # Joy emojis
+        '😄': ('joy', 0.8), '😊': ('joy', 0.7), '😃': ('joy', 0.8),
+        '😁': ('joy', 0.7), '😆': ('joy', 0.7), '🥰': ('joy', 0.8),
+        '😍': ('love', 0.8), '🤗': ('joy', 0.6), '😎': ('joy', 0.5),
+        '🥳': ('joy', 0.9), '🎉': ('joy', 0.8), '✨': ('joy', 0.5),
+        
+        # Sadness emojis
+        '😔': ('sadness', 0.9), '😢': ('sadness', 0.9), '😭': ('sadness', 0.9),
+        '😞': ('sadness', 0.8), '😥': ('sadness', 0.8), '☹️': ('sadness', 0.8),
+        '😓': ('sadness', 0.7), '😩': ('sadness', 0.8), '😫': ('sadness', 0.8),
+        '💔': ('sadness', 0.9), '☔️': ('sadness', 0.6), '🌧️': ('sadness', 0.6),
+        
+        # Anger emojis
+        '😡': ('anger', 0.9), '😠': ('anger', 0.8), '🤬': ('anger', 0.9),
+        '😤': ('anger', 0.7), '💢': ('anger', 0.7), '👿': ('anger', 0.8),
+        
+        # Fear emojis
+        '😨': ('fear', 0.9), '😰': ('fear', 0.8), '😱': ('fear', 0.9),
+        '😟': ('fear', 0.7), '😬': ('fear', 0.6), '🥶': ('fear', 0.5),
+        
+        # Surprise emojis
+        '😲': ('surprise', 0.9), '😮': ('surprise', 0.8), '🤯': ('surprise', 0.9),
+        '😯': ('surprise', 0.7), '😳': ('surprise', 0.7),
+        
+        # Love emojis
+        '❤️': ('love', 0.9), '💕': ('love', 0.7), '💖': ('love', 0.7),
+        '💗': ('love', 0.6), '💓': ('love', 0.6), '💘': ('love', 0.7),
+        '😘': ('love', 0.8),
+    }
+
+    # Phrases the scoring rules look for, matched as lowercase substrings
+    JOY_NEGATIONS = ('not happy', 'not good', 'not great', 'not feeling', 'not very')
+    SADNESS_PHRASES = (
+        'miss my', 'feel lonely', 'feel empty', 'nothing matters',
+        'want to sleep', 'crawl into bed', 'feels overwhelming',
+        'makes it worse', 'can\'t handle', 'too much', 'give up',
+        'don\'t care', 'lost interest', 'tired of'
     )
-    MODEL_LOADED = True
-    print("✅ Emotion classifier loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading emotion classifier: {e}")
-    print("Using fallback emotion classifier...")
-    MODEL_LOADED = False
+    WEATHER_WORDS = ('rain', 'storm', 'cloud', 'grey', 'gray')
+    UNCERTAINTY_PHRASES = ('what if', 'maybe', 'perhaps', 'might', 'could')
+    NEUTRAL_INDICATORS = frozenset([
+        'the', 'and', 'is', 'was', 'are', 'were', 'has', 'have',
+        'said', 'says', 'according', 'report', 'data', 'information',
+        'fact', 'statistic', 'number', 'percentage'
+    ])
+    # Mixed feelings: (pattern, reduction); only the first match applies
+    MIXED_PATTERNS = (
+        ('but', 0.5),
+        ('however', 0.5),
+        ('although', 0.5),
+        ('even though', 0.6),
+        ('despite', 0.6)
+    )
+    SPECIAL_PHRASES = (
+        'not sad', 'not unhappy', 'not excited',
+        'miss my family', 'missing my family', 'overwhelming',
+        'tough day', 'hard day', 'sleep forever'
+    )
+    # Every phrase above plus the lexicons and emojis, for RULE_PHRASES
+    PHRASES = frozenset().union(
+        JOY_WORDS, SADNESS_WORDS, ANGER_WORDS, FEAR_WORDS, SURPRISE_WORDS, LOVE_WORDS,
+        EMOJI_EMOTION_MAP, JOY_NEGATIONS, SADNESS_PHRASES, WEATHER_WORDS,
+        UNCERTAINTY_PHRASES, (pattern for pattern, _ in MIXED_PATTERNS), SPECIAL_PHRASES
+    )
+
+    def __init__(self):
+        self._lexicon = set().union(
+            self.JOY_WORDS, self.SADNESS_WORDS, self.ANGER_WORDS,
+            self.FEAR_WORDS, self.SURPRISE_WORDS, self.LOVE_WORDS
+        )
+
+    def __call__(self, text):
+        """Classify a text (a string or TextFeatures)"""
+        features = text_features(text)
+
+        # Enhanced emotion detection with context awareness
+        emotions = {
+            'joy': self._detect_joy(features),
+            'sadness': self._detect_sadness(features),
+            'anger': self._detect_anger(features),
+            'fear': self._detect_fear(features),
+            'surprise': self._detect_surprise(features),
+            'love': self._detect_love(features),
+            'neutral': self._detect_neutral(features)
+        }
+        
+        # Check for contradictory patterns
+        self._handle_contradictions(features, emotions)
+        
+        # Apply emoji boost
+        self._apply_emoji_boost(features, emotions)
+        
+        # Special handling for sadness patterns
+        self._handle_special_patterns(features, emotions)
+        
+        # Normalize scores
+        scores_sum = sum(emotions.values())
+        if scores_sum > 0:
+            normalized = {k: v/scores_sum for k, v in emotions.items()}
+        else:
+            normalized = {k: 0.0 for k in emotions.keys()}
+            normalized['neutral'] = 1.0
+        
+        # Create response structure
+        return [[
+            {"label": "joy", "score": normalized['joy']},
+            {"label": "sadness", "score": normalized['sadness']},
+            {"label": "anger", "score": normalized['anger']},
+            {"label": "fear", "score": normalized['fear']},
+            {"label": "surprise", "score": normalized['surprise']},
+            {"label": "love", "score": normalized['love']},
+            {"label": "neutral", "score": normalized['neutral']}
+        ]]
     
-    # Fallback function if model fails to load
-    class FallbackClassifier:
-        def __call__(self, text):
-            # Enhanced emotion detection with context awareness
-            emotions = {
-                'joy': self._detect_joy(text),
-                'sadness': self._detect_sadness(text),
-                'anger': self._detect_anger(text),
-                'fear': self._detect_fear(text),
-                'surprise': self._detect_surprise(text),
-                'love': self._detect_love(text),
-                'neutral': self._detect_neutral(text)
-            }
-            
-            # Check for contradictory patterns
-            self._handle_contradictions(text, emotions)
-            
-            # Apply emoji boost
-            self._apply_emoji_boost(text, emotions)
-            
-            # Special handling for sadness patterns
-            self._handle_special_patterns(text, emotions)
-            
-            # Normalize scores
-            scores_sum = sum(emotions.values())
-            if scores_sum > 0:
-                normalized = {k: v/scores_sum for k, v in emotions.items()}
-            else:
-                normalized = {k: 0.0 for k in emotions.keys()}
-                normalized['neutral'] = 1.0
-            
-            # Create response structure
-            return [[
-                {"label": "joy", "score": normalized['joy']},
-                {"label": "sadness", "score": normalized['sadness']},
-                {"label": "anger", "score": normalized['anger']},
-                {"label": "fear", "score": normalized['fear']},
-                {"label": "surprise", "score": normalized['surprise']},
-                {"label": "love", "score": normalized['love']},
-                {"label": "neutral", "score": normalized['neutral']}
-            ]]
+    def lexicon_coverage(self, text):
+        """Fraction of word and emoji tokens that hit one of the lexicons (text or TextFeatures)"""
+        features = text_features(text)
+        total = len(features.words) + len(features.emojis)
+        if total == 0:
+            return 0.0
+        hits = sum(1 for word in features.words if word in self._lexicon)
+        hits += sum(1 for e in features.emojis if e in self.EMOJI_EMOTION_MAP or e + '\ufe0f' in self.EMOJI_EMOTION_MAP)
+        return hits / total
+
+    def _lexicon_score(self, features, lexicon):
+        return sum(weight for word, weight in lexicon.items() if features.has(word))
+
+    def _detect_joy(self, features):
+        # Negative context check
+        if features.count(self.JOY_NEGATIONS):
+            return 0.1
         
-        def _detect_joy(self, text):
-            text_lower = text.lower()
-            joy_words = {
-                'happy': 0.9, 'joy': 0.9, 'excited': 0.8, 'smile': 0.7, 'good': 0.6,
-                'great': 0.8, 'awesome': 0.8, 'amazing': 0.8, 'wonderful': 0.8,
-                'fantastic': 0.8, 'delighted': 0.9, 'thrilled': 0.9, 'ecstatic': 0.9,
-                'blissful': 0.9, 'cheerful': 0.8, 'content': 0.7, 'satisfied': 0.7,
-                'pleased': 0.7, 'grateful': 0.7, 'blessed': 0.6, 'fortunate': 0.6,
-                'lucky': 0.6, 'optimistic': 0.6, 'hopeful': 0.6
-            }
-            
-            # Negative context check
-            if any(f"not {word}" in text_lower for word in ['happy', 'good', 'great']) or \
-               'not feeling' in text_lower or 'not very' in text_lower:
-                return 0.1
-            
-            score = sum(weight for word, weight in joy_words.items() if word in text_lower)
-            return min(score * 2, 0.9)
+        score = self._lexicon_score(features, self.JOY_WORDS)
+        return min(score * 2, 0.9)
+    
+    def _detect_sadness(self, features):
+        score = self._lexicon_score(features, self.SADNESS_WORDS)
         
-        def _detect_sadness(self, text):
-            text_lower = text.lower()
-            sadness_words = {
-                'sad': 0.9, 'unhappy': 0.8, 'cry': 0.8, 'crying': 0.8, 'depressed': 0.9,
-                'bad': 0.7, 'worst': 0.8, 'miserable': 0.9, 'alone': 0.7, 'lonely': 0.8,
-                'heartbroken': 0.9, 'grief': 0.9, 'sorrow': 0.9, 'pain': 0.7, 'hurt': 0.7,
-                'down': 0.6, 'low': 0.6, 'blue': 0.6, 'gloomy': 0.7, 'melancholy': 0.8,
-                'despair': 0.9, 'hopeless': 0.9, 'overwhelmed': 0.8, 'tough': 0.7,
-                'difficult': 0.6, 'hard': 0.6, 'struggling': 0.7, 'suffering': 0.8,
-                'miss': 0.8, 'missing': 0.8, 'lost': 0.7, 'empty': 0.7
-            }
-            
-            # Special phrases that indicate sadness
-            sadness_phrases = [
-                'miss my', 'feel lonely', 'feel empty', 'nothing matters',
-                'want to sleep', 'crawl into bed', 'feels overwhelming',
-                'makes it worse', 'can\'t handle', 'too much', 'give up',
-                'don\'t care', 'lost interest', 'tired of'
-            ]
-            
-            score = sum(weight for word, weight in sadness_words.items() if word in text_lower)
-            
-            # Add phrase detection
-            for phrase in sadness_phrases:
-                if phrase in text_lower:
-                    score += 0.3
-            
-            # Weather-related sadness
-            if any(word in text_lower for word in ['rain', 'storm', 'cloud', 'grey', 'gray']):
-                score += 0.2
-            
-            return min(score * 1.5, 0.95)
+        # Add phrase detection
+        score += 0.3 * features.count(self.SADNESS_PHRASES)
         
-        def _detect_anger(self, text):
-            text_lower = text.lower()
-            anger_words = {
-                'angry': 0.9, 'mad': 0.8, 'furious': 0.9, 'rage': 0.9, 'hate': 0.9,
-                'annoyed': 0.7, 'irritated': 0.7, 'frustrated': 0.8, 'upset': 0.7,
-                'pissed': 0.9, 'outraged': 0.9, 'livid': 0.9, 'enraged': 0.9,
-                'resent': 0.8, 'bitter': 0.7, 'hostile': 0.8, 'aggressive': 0.8
-            }
-            
-            # Check for exclamation marks
-            exclamation_count = text.count('!')
-            if exclamation_count > 2:
-                anger_boost = min(exclamation_count * 0.1, 0.3)
-            else:
-                anger_boost = 0
-            
-            score = sum(weight for word, weight in anger_words.items() if word in text_lower)
-            return min(score + anger_boost, 0.9)
+        # Weather-related sadness
+        if features.count(self.WEATHER_WORDS):
+            score += 0.2
         
-        def _detect_fear(self, text):
-            text_lower = text.lower()
-            fear_words = {
-                'scared': 0.9, 'afraid': 0.9, 'fear': 0.9, 'frightened': 0.9,
-                'terrified': 0.9, 'anxious': 0.8, 'worried': 0.8, 'nervous': 0.8,
-                'panic': 0.9, 'dread': 0.9, 'horror': 0.9, 'terror': 0.9,
-                'apprehensive': 0.7, 'uneasy': 0.7, 'threatened': 0.8
-            }
-            
-            score = sum(weight for word, weight in fear_words.items() if word in text_lower)
-            
-            # Check for uncertainty phrases
-            if any(word in text_lower for word in ['what if', 'maybe', 'perhaps', 'might', 'could']):
-                score += 0.2
-            
-            return min(score, 0.9)
+        return min(score * 1.5, 0.95)
+    
+    def _detect_anger(self, features):
+        # Check for exclamation marks
+        exclamation_count = features.punctuation['exclamations']
+        if exclamation_count > 2:
+            anger_boost = min(exclamation_count * 0.1, 0.3)
+        else:
+            anger_boost = 0
         
-        def _detect_surprise(self, text):
-            text_lower = text.lower()
-            surprise_words = {
-                'surprised': 0.9, 'shocked': 0.9, 'amazed': 0.8, 'astonished': 0.9,
-                'stunned': 0.9, 'wow': 0.7, 'incredible': 0.7, 'unbelievable': 0.8,
-                'unexpected': 0.9, 'sudden': 0.8, 'out of nowhere': 0.9,
-                'didn\'t expect': 0.9, 'can\'t believe': 0.9, 'blown away': 0.9
-            }
-            
-            score = sum(weight for word, weight in surprise_words.items() if word in text_lower)
-            
-            # Check for question marks
-            question_count = text.count('?')
-            if question_count > 0:
-                score += min(question_count * 0.1, 0.3)
-            
-            return min(score, 0.9)
+        score = self._lexicon_score(features, self.ANGER_WORDS)
+        return min(score + anger_boost, 0.9)
+    
+    def _detect_fear(self, features):
+        score = self._lexicon_score(features, self.FEAR_WORDS)
         
-        def _detect_love(self, text):
-            text_lower = text.lower()
-            love_words = {
-                'love': 0.9, 'adore': 0.9, 'cherish': 0.8, 'affection': 0.8,
-                'passion': 0.8, 'romance': 0.8, 'fond': 0.7, 'like': 0.6,
-                'care': 0.7, 'compassion': 0.7, 'empathy': 0.6, 'sympathy': 0.6,
-                'tender': 0.7, 'warm': 0.6, 'heart': 0.7, 'sweet': 0.6
-            }
-            
-            score = sum(weight for word, weight in love_words.items() if word in text_lower)
-            return min(score, 0.9)
+        # Check for uncertainty phrases
+        if features.count(self.UNCERTAINTY_PHRASES):
+            score += 0.2
         
-        def _detect_neutral(self, text):
-            if len(text) < 10:
-                return 0.8
-            
-            # Check for factual/neutral language
-            neutral_indicators = [
-                'the', 'and', 'is', 'was', 'are', 'were', 'has', 'have',
-                'said', 'says', 'according', 'report', 'data', 'information',
-                'fact', 'statistic', 'number', 'percentage'
-            ]
-            
-            text_words = text.lower().split()
-            neutral_words = sum(1 for word in text_words if word in neutral_indicators)
-            neutral_score = min(neutral_words * 0.05, 0.5)
-            
-            return neutral_score
+        return min(score, 0.9)
+    
+    def _detect_surprise(self, features):
+        score = self._lexicon_score(features, self.SURPRISE_WORDS)
         
-        def _handle_contradictions(self, text, emotions):
-            """Handle contradictory emotional statements"""
-            text_lower = text.lower()
-            
-            # Check for negated emotions
-            if 'not sad' in text_lower or 'not unhappy' in text_lower:
-                emotions['sadness'] *= 0.3
-            
-            if 'not happy' in text_lower or 'not excited' in text_lower:
-                emotions['joy'] *= 0.3
-            
-            # Mixed feelings
-            mixed_patterns = [
-                ('but', 0.5),
-                ('however', 0.5),
-                ('although', 0.5),
-                ('even though', 0.6),
-                ('despite', 0.6)
-            ]
-            
-            for pattern, reduction in mixed_patterns:
-                if pattern in text_lower:
-                    for emotion in emotions:
-                        emotions[emotion] *= (1 - reduction)
-                    break
+        # Check for question marks
+        question_count = features.punctuation['questions']
+        if question_count > 0:
+            score += min(question_count * 0.1, 0.3)
         
-        def _apply_emoji_boost(self, text, emotions):
-            """Apply emoji-based emotion detection boost"""
-            emoji_emotion_map = {
-                # Joy emojis
-                '😄': ('joy', 0.8), '😊': ('joy', 0.7), '😃': ('joy', 0.8),
-                '😁': ('joy', 0.7), '😆': ('joy', 0.7), '🥰': ('joy', 0.8),
-                '😍': ('love', 0.8), '🤗': ('joy', 0.6), '😎': ('joy', 0.5),
-                '🥳': ('joy', 0.9), '🎉': ('joy', 0.8), '✨': ('joy', 0.5),
-                
-                # Sadness emojis
-                '😔': ('sadness', 0.9), '😢': ('sadness', 0.9), '😭': ('sadness', 0.9),
-                '😞': ('sadness', 0.8), '😥': ('sadness', 0.8), '☹️': ('sadness', 0.8),
-                '😓': ('sadness', 0.7), '😩': ('sadness', 0.8), '😫': ('sadness', 0.8),
-                '💔': ('sadness', 0.9), '☔️': ('sadness', 0.6), '🌧️': ('sadness', 0.6),
-                
-                # Anger emojis
-                '😡': ('anger', 0.9), '😠': ('anger', 0.8), '🤬': ('anger', 0.9),
-                '😤': ('anger', 0.7), '💢': ('anger', 0.7), '👿': ('anger', 0.8),
-                
-                # Fear emojis
-                '😨': ('fear', 0.9), '😰': ('fear', 0.8), '😱': ('fear', 0.9),
-                '😟': ('fear', 0.7), '😬': ('fear', 0.6), '🥶': ('fear', 0.5),
-                
-                # Surprise emojis
-                '😲': ('surprise', 0.9), '😮': ('surprise', 0.8), '🤯': ('surprise', 0.9),
-                '😯': ('surprise', 0.7), '😳': ('surprise', 0.7),
-                
-                # Love emojis
-                '❤️': ('love', 0.9), '💕': ('love', 0.7), '💖': ('love', 0.7),
-                '💗': ('love', 0.6), '💓': ('love', 0.6), '💘': ('love', 0.7),
-                '😘': ('love', 0.8),
-            }
-            
-            for emoji_char, (emotion, boost) in emoji_emotion_map.items():
-                if emoji_char in text:
-                    emotions[emotion] += boost
-                    # Reduce other emotions when strong emoji is present
-                    for other_emotion in emotions:
-                        if other_emotion != emotion:
-                            emotions[other_emotion] *= 0.8
+        return min(score, 0.9)
+    
+    def _detect_love(self, features):
+        score = self._lexicon_score(features, self.LOVE_WORDS)
+        return min(score, 0.9)
+    
+    def _detect_neutral(self, features):
+        if len(features.text) < 10:
+            return 0.8
         
-        def _handle_special_patterns(self, text, emotions):
-            """Handle special patterns like sadness-indicating text"""
-            text_lower = text.lower()
-            
-            # Specific sadness patterns
-            if 'miss my family' in text_lower or 'missing my family' in text_lower:
-                emotions['sadness'] = max(emotions.get('sadness', 0), 0.7)
-                emotions['joy'] = max(emotions.get('joy', 0) * 0.3, 0.05)
-            
-            if 'overwhelming' in text_lower or 'too much' in text_lower:
-                emotions['sadness'] = min(emotions.get('sadness', 0) + 0.2, 0.9)
-                emotions['fear'] = min(emotions.get('fear', 0) + 0.1, 0.8)
-            
-            if 'tough day' in text_lower or 'hard day' in text_lower:
-                emotions['sadness'] = min(emotions.get('sadness', 0) + 0.3, 0.9)
-            
-            if 'sleep forever' in text_lower or 'crawl into bed' in text_lower:
-                emotions['sadness'] = min(emotions.get('sadness', 0) + 0.4, 0.95)
-                emotions['joy'] = max(emotions.get('joy', 0) * 0.2, 0.05)
+        # Check for factual/neutral language
+        neutral_words = sum(1 for word in features.words if word in self.NEUTRAL_INDICATORS)
+        neutral_score = min(neutral_words * 0.05, 0.5)
+        
+        return neutral_score
+    
+    def _handle_contradictions(self, features, emotions):
+        """Handle contradictory emotional statements"""
+        # Check for negated emotions
+        if features.has('not sad') or features.has('not unhappy'):
+            emotions['sadness'] *= 0.3
+        
+        if features.has('not happy') or features.has('not excited'):
+            emotions['joy'] *= 0.3
+        
+        # Mixed feelings
+        for pattern, reduction in self.MIXED_PATTERNS:
+            if features.has(pattern):
+                for emotion in emotions:
+                    emotions[emotion] *= (1 - reduction)
+                break
+    
+    def _apply_emoji_boost(self, features, emotions):
+        """Apply emoji-based emotion detection boost"""
+        
+        for emoji_char, (emotion, boost) in self.EMOJI_EMOTION_MAP.items():
+            if features.has(emoji_char):
+                emotions[emotion] += boost
+                # Reduce other emotions when strong emoji is present
+                for other_emotion in emotions:
+                    if other_emotion != emotion:
+                        emotions[other_emotion] *= 0.8
     
-    emotion_classifier = FallbackClassifier()
+    def _handle_special_patterns(self, features, emotions):
+        """Handle special patterns like sadness-indicating text"""
+        # Specific sadness patterns
+        if features.has('miss my family') or features.has('missing my family'):
+            emotions['sadness'] = max(emotions.get('sadness', 0), 0.7)
+            emotions['joy'] = max(emotions.get('joy', 0) * 0.3, 0.05)
+        
+        if features.has('overwhelming') or features.has('too much'):
+            emotions['sadness'] = min(emotions.get('sadness', 0) + 0.2, 0.9)
+            emotions['fear'] = min(emotions.get('fear', 0) + 0.1, 0.8)
+        
+        if features.has('tough day') or features.has('hard day'):
+            emotions['sadness'] = min(emotions.get('sadness', 0) + 0.3, 0.9)
+        
+        if features.has('sleep forever') or features.has('crawl into bed'):
+            emotions['sadness'] = min(emotions.get('sadness', 0) + 0.4, 0.95)
+            emotions['joy'] = max(emotions.get('joy', 0) * 0.2, 0.05)
+
+fallback_classifier = FallbackClassifier()
+
+# Transformer models: local versions from MODEL_DIR, or the Hub checkpoint
+model_registry = ModelRegistry(app.config['MODEL_DIR'])
+
+if app.config['FORCE_FALLBACK']:
+    print("⏭️ FORCE_FALLBACK set: skipping model load, using fallback emotion classifier")
+    MODEL_LOADED = False
+else:
+    print("Loading emotion classifier...")
+    try:
+        if model_registry.latest_version(app.config['EMOTION_MODEL']):
+            active_model = model_registry.activate(app.config['EMOTION_MODEL'])
+        else:
+            # No local copy: load the Hub checkpoint and register it as version "hub"
+            hub_classifier = pipeline(
+                "text-classification",
+                model=app.config['HUB_MODEL_ID'],
+                return_all_scores=True,
+                top_k=None
+            )
+            model_registry.register(ModelEntry(
+                app.config['EMOTION_MODEL'], 'hub', hub_classifier, source=app.config['HUB_MODEL_ID']
+            ))
+            active_model = model_registry.activate(app.config['EMOTION_MODEL'], 'hub')
+        MODEL_LOADED = True
+        print(f"✅ Emotion classifier {active_model.key} loaded successfully!")
+    except Exception as e:
+        print(f"❌ Error loading emotion classifier: {e}")
+        print("Using fallback emotion classifier...")
+        MODEL_LOADED = False
 
 # -------------------------------
 # Emotion Configuration
@@ -402,15 +505,387 @@ NEUTRAL_EMOTIONS = {'surprise', 'neutral'}
 # Initialize Database
 # -------------------------------
 with app.app_context():
-    db.create_all()
+    for migration in migrate(db.engine):
+        print(f"✅ Migration applied: {migration}")
+    history_store = create_history_store(app, db.engine)
     print("✅ Database initialized!")
 
+# -------------------------------
+# Inference Executor
+# -------------------------------
+# Model inference and PNG chart rendering run here, whichever request thread
+# or job worker asked for them, so CPU-heavy work never exceeds
+# INFERENCE_WORKERS threads. Callers block (or await on their per-request
+# event loop) until their call finishes.
+inference_executor = ThreadPoolExecutor(
+    max_workers=app.config['INFERENCE_WORKERS'],
+    thread_name_prefix='inference'
+)
+
+# Interactive calls queued or running on the executor; background jobs back
+# off while this is non-zero
+_interactive_pending = 0
+_interactive_lock = threading.Lock()
+
+def interactive_busy():
+    return _interactive_pending > 0
+
+def _track_interactive(delta):
+    global _interactive_pending
+    with _interactive_lock:
+        _interactive_pending += delta
+
+async def run_in_inference_executor(func, *args):
+    """Run a CPU-bound callable on the shared inference executor"""
+    loop = asyncio.get_running_loop()
+    _track_interactive(1)
+    try:
+        return await loop.run_in_executor(inference_executor, profiled(func), *args)
+    finally:
+        _track_interactive(-1)
+
+def run_background_inference(func, *args):
+    """
+    Run func(*args) on the inference executor from a background thread and
+    wait for it, so background work shares the fixed pool with requests
+    """
+    return inference_executor.submit(func, *args).result()
+
+# -------------------------------
+# Metrics
+# -------------------------------
+METRICS = {
+    'inference_runs': 0,
+    'coalesced_requests': 0,
+}
+_metrics_lock = threading.Lock()
+
+def increment_metric(name, amount=1):
+    """Thread-safe counter increment"""
+    with _metrics_lock:
+        METRICS[name] = METRICS.get(name, 0) + amount
+
+def process_resources():
+    """CPU seconds, memory and thread count of this server process"""
+    usage = {'threads': threading.active_count(), 'pid': os.getpid()}
+    if resource is not None:
+        rusage = resource.getrusage(resource.RUSAGE_SELF)
+        usage['cpu_user_s'] = round(rusage.ru_utime, 3)
+        usage['cpu_system_s'] = round(rusage.ru_stime, 3)
+        # ru_maxrss is KiB on Linux
+        usage['max_rss_bytes'] = rusage.ru_maxrss * 1024
+    try:
+        with open('/proc/self/statm') as f:
+            usage['rss_bytes'] = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    return usage
+
+# -------------------------------
+# Model Circuit Breaker
+# -------------------------------
+class CircuitBreaker:
+    """
+    Rolling error/latency breaker around one model
+    closed: every call goes to the model; open: none do, until BREAKER_OPEN_S
+    has passed; half_open: BREAKER_PROBES calls try the model, and the breaker
+    closes once they all succeed within the SLO or reopens on the first miss.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, window_s, min_calls, error_rate, slo_s, slow_rate, open_s, probes):
+        self.name = name
+        self.window_s = window_s
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slo_s = slo_s
+        self.slow_rate = slow_rate
+        self.open_s = open_s
+        self.probes = probes
+        self.state = self.CLOSED
+        self.last_trip_reason = None
+        self._calls = deque()  # (finished at, ok, slower than SLO)
+        self._opened_at = None
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, name):
+        return cls(
+            name,
+            window_s=app.config['BREAKER_WINDOW_S'],
+            min_calls=app.config['BREAKER_MIN_CALLS'],
+            error_rate=app.config['BREAKER_ERROR_RATE'],
+            slo_s=app.config['BREAKER_SLO_MS'] / 1000,
+            slow_rate=app.config['BREAKER_SLOW_RATE'],
+            open_s=app.config['BREAKER_OPEN_S'],
+            probes=app.config['BREAKER_PROBES']
+        )
+
+    def _transition(self, state, reason=None):
+        self.state = state
+        self._calls.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            self.last_trip_reason = reason
+            print(f"🔌 Circuit breaker for {self.name} opened: {reason}")
+        elif state == self.CLOSED:
+            print(f"✅ Circuit breaker for {self.name} closed")
+        increment_metric(f'breaker_{state}')
+
+    def allow(self):
+        """Whether the next call may use the model"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_s:
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight + self._probe_successes >= self.probes:
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record(self, elapsed, ok):
+        """Report the outcome of a call that allow() let through"""
+        slow = elapsed > self.slo_s
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if not ok or slow:
+                    self._transition(self.OPEN, 'probe failed' if not ok else f"probe took {elapsed * 1000:.0f} ms")
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.probes:
+                        self._transition(self.CLOSED)
+                return
+            if self.state == self.OPEN:
+                return  # admitted before the breaker opened
+
+            self._calls.append((now, ok, slow))
+            while self._calls and now - self._calls[0][0] > self.window_s:
+                self._calls.popleft()
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            errors = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+            slow_calls = sum(1 for _, call_ok, call_slow in self._calls if call_ok and call_slow)
+            if errors / total >= self.error_rate:
+                self._transition(self.OPEN, f"{errors}/{total} calls failed")
+            elif slow_calls / total >= self.slow_rate:
+                self._transition(self.OPEN, f"{slow_calls}/{total} calls slower than {self.slo_s * 1000:.0f} ms")
+
+    def snapshot(self):
+        with self._lock:
+            total = len(self._calls)
+            return {
+                'state': self.state,
+                'window_calls': total,
+                'window_error_rate': round(sum(1 for _, ok, _ in self._calls if not ok) / total, 3) if total else 0.0,
+                'window_slow_rate': round(sum(1 for _, ok, slow in self._calls if ok and slow) / total, 3) if total else 0.0,
+                'open_for_s': round(time.monotonic() - self._opened_at, 1) if self.state == self.OPEN else None,
+                'last_trip_reason': self.last_trip_reason
+            }
+
+_model_breakers = {}
+_model_breakers_lock = threading.Lock()
+
+def breaker_for(model):
+    """The circuit breaker of a ModelEntry, created on first use"""
+    with _model_breakers_lock:
+        breaker = _model_breakers.get(model.key)
+        if breaker is None:
+            breaker = _model_breakers[model.key] = CircuitBreaker.from_config(model.key)
+        return breaker
+
+def breaker_snapshots():
+    with _model_breakers_lock:
+        breakers = list(_model_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+# -------------------------------
+# Request Profiling
+# -------------------------------
+# Opt-in cProfile capture of whole requests: send "X-Profile: 1" with a valid
+# X-Admin-Token, or sample 1 in PROFILE_SAMPLE_RATE requests. The view's own
+# thread and every executor call made on its behalf are profiled and merged
+# into one pstats file (readable by snakeviz, flameprof, gprof2dot, ...).
+# Only one request is profiled at a time; others run unprofiled meanwhile.
+_active_profile = contextvars.ContextVar('active_profile', default=None)
+_profiling_lock = threading.Lock()
+
+class RequestProfile:
+    """cProfile captures from every thread that worked on one request"""
+
+    def __init__(self):
+        self.profiles = []
+        self._lock = threading.Lock()
+
+    def run(self, func, *args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active on this interpreter; skip this part
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                self.profiles.append(profile)
+
+    async def run_async(self, func, *args, **kwargs):
+        """Profile a coroutine on the current thread, including time it spends awaiting"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return await func(*args, **kwargs)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                self.profiles.append(profile)
+
+    def save(self, path):
+        with self._lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return False
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return True
+
+def profiled(func):
+    """Wrap func so it is profiled when submitted on behalf of a profiled request"""
+    profile = _active_profile.get()
+    if profile is None:
+        return func
+    return functools.partial(profile.run, func)
+
+def _profile_reason():
+    if request.headers.get('X-Profile') == '1':
+        token = app.config['ADMIN_TOKEN']
+        if token and request.headers.get('X-Admin-Token') == token:
+            return 'header'
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate > 0 and random.randrange(rate) == 0:
+        return 'sampled'
+    return None
+
+def _prune_profiles(directory):
+    files = sorted(
+        (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.prof')),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    for path in files[app.config['PROFILE_KEEP']:]:
+        os.remove(path)
+
+def profile_request(view):
+    """Decorator for async views: capture a profile when requested or sampled"""
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        reason = _profile_reason()
+        if reason is None or not _profiling_lock.acquire(blocking=False):
+            return await view(*args, **kwargs)
+
+        profile = RequestProfile()
+        token = _active_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            # Executor calls made by the view add their own captures
+            result = await profile.run_async(view, *args, **kwargs)
+        finally:
+            _active_profile.reset(token)
+            _profiling_lock.release()
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            try:
+                directory = app.config['PROFILE_DIR']
+                os.makedirs(directory, exist_ok=True)
+                name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.endpoint}-{elapsed_ms}ms-{reason}.prof"
+                if profile.save(os.path.join(directory, name)):
+                    increment_metric('profiles_captured')
+                    print(f"🔬 Saved request profile {name}")
+                _prune_profiles(directory)
+            except Exception as e:
+                print(f"⚠️ Could not save profile: {e}")
+        return result
+    return wrapper
+
+# -------------------------------
+# Single-flight Request Coalescing
+# -------------------------------
+# Identical texts submitted while an analysis is still running share that
+# analysis instead of starting their own. Keys map to concurrent futures so
+# waiters on any request thread (each with its own event loop) can join.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def normalize_text(text):
+    """Normalize text for coalescing: NFC form with collapsed whitespace"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+def _forget_inflight(key, future):
+    with _inflight_lock:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+async def run_coalesced(key, func, *args):
+    """
+    Run func(*args) on the inference executor unless an identical call is in flight.
+    The first caller computes; concurrent callers with the same key await the
+    same future, so results, errors and timeouts reach every waiter.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        is_leader = future is None
+        if is_leader:
+            _track_interactive(1)
+            future = inference_executor.submit(profiled(func), *args)
+            _inflight[key] = future
+
+    if is_leader:
+        increment_metric('inference_runs')
+        future.add_done_callback(lambda f: _track_interactive(-1))
+        future.add_done_callback(lambda f: _forget_inflight(key, f))
+    else:
+        increment_metric('coalesced_requests')
+
+    # shield() keeps one waiter's timeout from cancelling the shared future
+    shared = asyncio.shield(asyncio.wrap_future(future))
+    try:
+        return await asyncio.wait_for(shared, timeout=app.config['INFERENCE_TIMEOUT'])
+    except asyncio.TimeoutError:
+        raise
+    except Exception as exc:
+        if is_leader:
+            raise
+        # Same type and args as the leader's error, so callers' handlers match
+        try:
+            error = type(exc)(*exc.args)
+        except Exception:
+            error = RuntimeError(f"Coalesced analysis failed: {exc}")
+    # Followers raise a fresh exception outside the handler: re-raising the
+    # leader's instance would grow its traceback and pin the leader's frames
+    raise error from None
+
 # -------------------------------
 # Utility Functions
 # -------------------------------
 def extract_emojis(text):
-    """Extract emojis from text"""
-    return [c for c in text if c in emoji.EMOJI_DATA]
+    """Extract emojis from text, one entry per emoji (ZWJ sequences, skin tones, flags)"""
+    return [match['emoji'] for match in emoji.emoji_list(text)]
 
 def remove_emojis(text):
     """Remove emojis from text"""
@@ -425,7 +900,7 @@ def emoji_to_text(e):
 
 def get_emoji_sentiment(emoji_char):
     """Get the sentiment category of an emoji"""
-    return EMOJI_SENTIMENT_MAP.get(emoji_char, 'neutral')
+    return EMOTIONS[EMOJI_SENTIMENT_IDS[get_emoji_id(emoji_char)]]
 
 def check_emoji_relevance(text_sentiment_category, emoji_sentiment_category):
     """
@@ -453,82 +928,6 @@ def check_emoji_relevance(text_sentiment_category, emoji_sentiment_category):
     # Default
     return "somewhat relevant", 0.4
 
-def analyze_emoji_relevance(text_sentiment_scores, emojis_found):
-    """
-    Analyze the relevance between text sentiment and emoji sentiment
-    Returns: relevance results for each emoji and overall assessment
-    """
-    if not emojis_found:
-        return None, "no emojis"
-    
-    # Get the dominant text emotion
-    top_text_emotion = max(text_sentiment_scores.items(), key=lambda x: x[1])[0]
-    
-    # Determine text sentiment category
-    if top_text_emotion in POSITIVE_EMOTIONS:
-        text_category = "positive"
-        text_specific_emotion = top_text_emotion
-    elif top_text_emotion in NEGATIVE_EMOTIONS:
-        text_category = "negative"
-        text_specific_emotion = top_text_emotion
-    else:
-        text_category = "neutral"
-        text_specific_emotion = top_text_emotion
-    
-    emoji_results = []
-    overall_relevance_score = 0
-    
-    for emoji_char in emojis_found[:5]:  # Analyze first 5 emojis max
-        emoji_sentiment = get_emoji_sentiment(emoji_char)
-        
-        # Determine emoji category
-        if emoji_sentiment in POSITIVE_EMOTIONS:
-            emoji_category = "positive"
-        elif emoji_sentiment in NEGATIVE_EMOTIONS:
-            emoji_category = "negative"
-        else:
-            emoji_category = "neutral"
-        
-        # Check relevance
-        relevance_status, relevance_score = check_emoji_relevance(
-            text_category, 
-            emoji_category
-        )
-        
-        # Special case: exact emotion match is even more relevant
-        if emoji_sentiment == top_text_emotion:
-            relevance_status = "very relevant"
-            relevance_score = 1.0
-        
-        emoji_results.append({
-            'emoji': emoji_char,
-            'emoji_sentiment': emoji_sentiment,
-            'emoji_category': emoji_category,
-            'text_category': text_category,
-            'text_top_emotion': top_text_emotion,
-            'relevance': relevance_status,
-            'relevance_score': round(relevance_score, 2)
-        })
-        
-        overall_relevance_score += relevance_score
-    
-    # Calculate overall relevance
-    if emoji_results:
-        avg_relevance = overall_relevance_score / len(emoji_results)
-        overall_status = _get_overall_relevance_status(avg_relevance)
-    else:
-        overall_status = "no emojis"
-        avg_relevance = 0
-    
-    return {
-        'emoji_results': emoji_results,
-        'text_category': text_category,
-        'text_top_emotion': top_text_emotion,
-        'overall_status': overall_status,
-        'overall_score': round(avg_relevance, 2),
-        'total_emojis_analyzed': len(emoji_results)
-    }, overall_status
-
 def _get_overall_relevance_status(score):
     """Convert relevance score to status"""
     if score >= 0.8:
@@ -542,107 +941,589 @@ def _get_overall_relevance_status(score):
     else:
         return "not relevant"
 
-def _is_sadness_dominant(text):
+# -------------------------------
+# Relevance Lookup Tables
+# -------------------------------
+# The relevance rules above are compiled once into dense arrays indexed by
+# emotion ID and emoji ID, so scoring a batch is a handful of array lookups.
+MAX_RELEVANCE_EMOJIS = 5  # Analyze first 5 emojis max
+RELEVANCE_THRESHOLDS = np.array([0.2, 0.4, 0.6, 0.8])
+OVERALL_RELEVANCE_STATUSES = [
+    _get_overall_relevance_status(t) for t in np.concatenate(([0.0], RELEVANCE_THRESHOLDS))
+]
+
+EMOTION_IDS = {emotion: i for i, emotion in enumerate(EMOTIONS)}
+NEUTRAL_EMOTION_ID = EMOTION_IDS['neutral']
+
+def _emotion_category(emotion):
+    if emotion in POSITIVE_EMOTIONS:
+        return "positive"
+    if emotion in NEGATIVE_EMOTIONS:
+        return "negative"
+    return "neutral"
+
+EMOTION_CATEGORIES = [_emotion_category(emotion) for emotion in EMOTIONS]
+
+def _build_pair_tables():
+    """Relevance status/score for every (text emotion, emoji emotion) pair"""
+    statuses = []
+    status_ids = np.zeros((len(EMOTIONS), len(EMOTIONS)), dtype=np.int8)
+    scores = np.zeros((len(EMOTIONS), len(EMOTIONS)), dtype=np.float64)
+    for t, text_emotion in enumerate(EMOTIONS):
+        for e, emoji_emotion in enumerate(EMOTIONS):
+            status, score = check_emoji_relevance(EMOTION_CATEGORIES[t], EMOTION_CATEGORIES[e])
+            # Special case: exact emotion match is even more relevant
+            if emoji_emotion == text_emotion:
+                status, score = "very relevant", 1.0
+            if status not in statuses:
+                statuses.append(status)
+            status_ids[t, e] = statuses.index(status)
+            scores[t, e] = score
+    return statuses, status_ids, scores
+
+RELEVANCE_STATUSES, _PAIR_STATUS_IDS, _PAIR_SCORES = _build_pair_tables()
+
+# Every emoji in emoji.EMOJI_DATA gets an ID; the extra last ID stands for
+# anything unknown. Sentiments also match without the U+FE0F variation selector.
+EMOJI_LIST = list(emoji.EMOJI_DATA)
+EMOJI_IDS = {e: i for i, e in enumerate(EMOJI_LIST)}
+UNKNOWN_EMOJI_ID = len(EMOJI_LIST)
+_SENTIMENT_BY_BASE = {e.replace('\ufe0f', ''): s for e, s in EMOJI_SENTIMENT_MAP.items()}
+
+def _lookup_emoji_sentiment(emoji_char):
+    sentiment = EMOJI_SENTIMENT_MAP.get(emoji_char)
+    if sentiment is None:
+        sentiment = _SENTIMENT_BY_BASE.get(emoji_char.replace('\ufe0f', ''), 'neutral')
+    return sentiment
+
+EMOJI_SENTIMENT_IDS = np.array(
+    [EMOTION_IDS[_lookup_emoji_sentiment(e)] for e in EMOJI_LIST] + [NEUTRAL_EMOTION_ID],
+    dtype=np.int8
+)
+
+# Dense [emotion ID, emoji ID] tables
+RELEVANCE_SCORE_TABLE = _PAIR_SCORES[:, EMOJI_SENTIMENT_IDS]
+RELEVANCE_STATUS_TABLE = _PAIR_STATUS_IDS[:, EMOJI_SENTIMENT_IDS]
+
+def get_emoji_id(emoji_char):
+    """Dense table ID of an emoji"""
+    emoji_id = EMOJI_IDS.get(emoji_char)
+    if emoji_id is None:
+        emoji_id = EMOJI_IDS.get(emoji_char.replace('\ufe0f', ''), UNKNOWN_EMOJI_ID)
+    return emoji_id
+
+def analyze_emoji_relevance_batch(text_sentiment_scores_list, emojis_found_list):
+    """
+    Analyze emoji relevance for N (text emotion scores, emoji list) pairs at once
+    Returns: list of (relevance results, overall status) tuples
+    """
+    n = len(text_sentiment_scores_list)
+    if n == 0:
+        return []
+
+    # Dominant text emotion per row
+    score_matrix = np.array(
+        [[scores.get(emotion, 0.0) for emotion in EMOTIONS] for scores in text_sentiment_scores_list],
+        dtype=np.float64
+    )
+    top_ids = score_matrix.argmax(axis=1)
+
+    # Emoji IDs padded to a fixed width; -1 marks an empty slot
+    emoji_ids = np.full((n, MAX_RELEVANCE_EMOJIS), -1, dtype=np.int64)
+    for row, emojis_found in enumerate(emojis_found_list):
+        ids = [get_emoji_id(e) for e in emojis_found[:MAX_RELEVANCE_EMOJIS]]
+        emoji_ids[row, :len(ids)] = ids
+    mask = emoji_ids >= 0
+    counts = mask.sum(axis=1)
+    safe_ids = np.where(mask, emoji_ids, UNKNOWN_EMOJI_ID)
+
+    pair_scores = np.where(mask, RELEVANCE_SCORE_TABLE[top_ids[:, None], safe_ids], 0.0)
+    pair_statuses = RELEVANCE_STATUS_TABLE[top_ids[:, None], safe_ids]
+    pair_sentiments = EMOJI_SENTIMENT_IDS[safe_ids]
+    avg_scores = pair_scores.sum(axis=1) / np.maximum(counts, 1)
+    overall_ids = np.digitize(avg_scores, RELEVANCE_THRESHOLDS)
+
+    results = []
+    for row in range(n):
+        if counts[row] == 0:
+            results.append((None, "no emojis"))
+            continue
+
+        top_text_emotion = EMOTIONS[top_ids[row]]
+        text_category = EMOTION_CATEGORIES[top_ids[row]]
+        emoji_results = []
+        for col in range(counts[row]):
+            sentiment_id = pair_sentiments[row, col]
+            emoji_results.append({
+                'emoji': emojis_found_list[row][col],
+                'emoji_sentiment': EMOTIONS[sentiment_id],
+                'emoji_category': EMOTION_CATEGORIES[sentiment_id],
+                'text_category': text_category,
+                'text_top_emotion': top_text_emotion,
+                'relevance': RELEVANCE_STATUSES[pair_statuses[row, col]],
+                'relevance_score': round(float(pair_scores[row, col]), 2)
+            })
+
+        overall_status = OVERALL_RELEVANCE_STATUSES[overall_ids[row]]
+        results.append(({
+            'emoji_results': emoji_results,
+            'text_category': text_category,
+            'text_top_emotion': top_text_emotion,
+            'overall_status': overall_status,
+            'overall_score': round(float(avg_scores[row]), 2),
+            'total_emojis_analyzed': len(emoji_results)
+        }, overall_status))
+
+    return results
+
+def analyze_emoji_relevance(text_sentiment_scores, emojis_found):
+    """
+    Analyze the relevance between text sentiment and emoji sentiment
+    Returns: relevance results for each emoji and overall assessment
+    """
+    return analyze_emoji_relevance_batch([text_sentiment_scores], [emojis_found])[0]
+
+# -------------------------------
+# Emoji Suggestions
+# -------------------------------
+# Every emoji in emoji.EMOJI_DATA gets a seven-way emotion profile: curated
+# maps first, then keywords in its CLDR name. Keywords match whole
+# '_'-separated name tokens (or token runs such as 'steam_from_nose'), so
+# 'cry' never fires on crystal_ball nor 'skull' on person_with_skullcap.
+# Emojis with no emotional signal (flags, objects, skin-tone and unqualified
+# variants) get a zero profile and are dropped, leaving a small unit-normalized
+# candidate matrix. Ranking is one matrix product plus argpartition, for a
+# single text or a whole batch.
+SUGGESTION_NAME_KEYWORDS = {
+    'joy': ['smile', 'smiling', 'grin', 'grinning', 'beaming', 'laughing', 'joy', 'party', 'partying',
+            'star-struck', 'sparkles', 'thumbs_up', 'clapping_hands', 'confetti_ball', 'sunglasses', 'trophy'],
+    'sadness': ['crying', 'sad', 'disappointed', 'pensive', 'broken_heart', 'weary', 'tired', 'frowning',
+                'sleepy', 'downcast', 'pleading', 'thumbs_down', 'tear'],
+    'anger': ['angry', 'enraged', 'pouting', 'steam_from_nose', 'symbols_on_mouth', 'anger_symbol', 'middle_finger'],
+    'fear': ['fearful', 'screaming', 'anxious', 'cold_sweat', 'worried', 'grimacing', 'ghost', 'skull', 'cold_face'],
+    'surprise': ['astonished', 'open_mouth', 'hushed', 'exploding_head', 'flushed', 'dizzy', 'raised_eyebrow'],
+    'love': ['heart', 'hearts', 'heart-eyes', 'kiss', 'kissing', 'love', 'rose', 'couple_with_heart',
+             'heart_with_arrow', 'bouquet'],
+    'neutral': ['neutral', 'expressionless', 'thinking', 'without_mouth', 'relieved', 'monocle',
+                'rolling_eyes', 'zipper-mouth', 'shushing'],
+}
+# Name tokens that cancel an emotion's keywords: a smile with horns or a tear is not joy
+SUGGESTION_NAME_EXCLUDES = {
+    'joy': ['horns', 'tear'],
+}
+SKIN_TONE_MODIFIERS = {chr(c) for c in range(0x1F3FB, 0x1F400)}
+
+def _emoji_emotion_profile(emoji_char, data):
+    """Unnormalized emotion vector of one emoji (all zeros if it carries no emotion)"""
+    profile = np.zeros(len(EMOTIONS), dtype=np.float32)
+    if data.get('status') != emoji.STATUS['fully_qualified'] or SKIN_TONE_MODIFIERS.intersection(emoji_char):
+        return profile
+
+    base = emoji_char.replace('\ufe0f', '')
+    for emotion, emojis in EMOTION_EMOJI_MAP.items():
+        if emoji_char in emojis or base in emojis:
+            profile[EMOTION_IDS[emotion]] += 1.0
+    curated = FallbackClassifier.EMOJI_EMOTION_MAP.get(emoji_char) or FallbackClassifier.EMOJI_EMOTION_MAP.get(base)
+    if curated:
+        profile[EMOTION_IDS[curated[0]]] += curated[1]
+    sentiment = EMOJI_SENTIMENT_MAP.get(emoji_char) or _SENTIMENT_BY_BASE.get(base)
+    if sentiment:
+        profile[EMOTION_IDS[sentiment]] += 1.0
+
+    # Padding with '_' turns substring tests into whole-token tests
+    name = f"_{data.get('en', '').strip(':').lower()}_"
+    for emotion, keywords in SUGGESTION_NAME_KEYWORDS.items():
+        if any(f"_{token}_" in name for token in SUGGESTION_NAME_EXCLUDES.get(emotion, ())):
+            continue
+        if any(f"_{keyword}_" in name for keyword in keywords):
+            profile[EMOTION_IDS[emotion]] += 0.5
+    return profile
+
+def _build_suggestion_matrix():
+    emojis = []
+    rows = []
+    seen = set()
+    for emoji_char, data in emoji.EMOJI_DATA.items():
+        profile = _emoji_emotion_profile(emoji_char, data)
+        base = emoji_char.replace('\ufe0f', '')
+        if not profile.any() or base in seen:
+            continue
+        seen.add(base)
+        emojis.append(emoji_char)
+        rows.append(profile / np.linalg.norm(profile))
+    return emojis, np.array(rows, dtype=np.float32).reshape(-1, len(EMOTIONS))
+
+SUGGESTION_EMOJIS, SUGGESTION_MATRIX = _build_suggestion_matrix()
+SUGGESTION_IDS = {}
+for _i, _e in enumerate(SUGGESTION_EMOJIS):
+    SUGGESTION_IDS[_e] = _i
+    SUGGESTION_IDS.setdefault(_e.replace('\ufe0f', ''), _i)
+
+def rank_emoji_suggestions_batch(text_sentiment_scores_list, exclude_list=None, k=None):
+    """
+    Top-k emojis by cosine similarity to each row's full emotion distribution
+    exclude_list: per-row emojis to leave out (e.g. the ones already in the text)
+    Returns: list of [{'emoji': ..., 'score': ...}, ...] ranked best first;
+    empty for rows whose scores are all zero
+    """
+    n = len(text_sentiment_scores_list)
+    if n == 0 or not SUGGESTION_EMOJIS:
+        return [[] for _ in range(n)]
+    k = min(k or app.config['SUGGESTION_TOP_K'], len(SUGGESTION_EMOJIS))
+
+    queries = np.array(
+        [[scores.get(emotion, 0.0) for emotion in EMOTIONS] for scores in text_sentiment_scores_list],
+        dtype=np.float32
+    )
+    norms = np.linalg.norm(queries, axis=1, keepdims=True)
+    queries /= np.maximum(norms, 1e-9)
+    similarity = queries @ SUGGESTION_MATRIX.T
+    # An all-zero distribution (empty text) has no direction to match
+    similarity[norms[:, 0] == 0] = -np.inf
+
+    if exclude_list:
+        for row, excluded in enumerate(exclude_list):
+            ids = [SUGGESTION_IDS[e] for e in excluded or () if e in SUGGESTION_IDS]
+            similarity[row, ids] = -np.inf
+
+    # argpartition finds the unordered top k in linear time; only those k get sorted
+    top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(similarity, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    return [
+        [
+            {'emoji': SUGGESTION_EMOJIS[i], 'score': round(float(score), 3)}
+            for i, score in zip(top[row], top_scores[row]) if np.isfinite(score)
+        ]
+        for row in range(n)
+    ]
+
+def rank_emoji_suggestions(text_sentiment_scores, exclude=(), k=None):
+    """Ranked emoji suggestions for one emotion distribution"""
+    return rank_emoji_suggestions_batch([text_sentiment_scores], [exclude], k)[0]
+
+# -------------------------------
+# Text Features
+# -------------------------------
+# Each text is lowercased, tokenized and scanned for rule phrases, emojis and
+# punctuation once. The scoring rules, the cascade, relevance and the response
+# builders all read the resulting TextFeatures instead of rescanning the text.
+STRONG_SADNESS_WORDS = ('sad', 'depressed', 'heartbroken', 'grief', 'sorrow',
+                        'miserable', 'despair', 'hopeless', 'overwhelmed')
+SADNESS_PHRASES = ('miss my', 'feel alone', 'want to die', 'can\'t stop crying',
+                   'feel empty', 'nothing matters', 'too much to handle')
+SADNESS_EMOJIS = ('😔', '😢', '😭', '💔', '☹️')
+SADNESS_INDICATORS = ('miss', 'overwhelmed', 'alone', 'tough', 'hard')
+# Keywords and emojis of the last-resort keyword analysis
+FALLBACK_KEYWORDS = {
+    'joy': ('happy', 'joy', 'excited', 'good', 'great'),
+    'sadness': ('sad', 'miss', 'alone', 'tough', 'overwhelmed', 'difficult'),
+    'anger': ('angry', 'mad', 'furious', 'hate'),
+    'fear': ('scared', 'afraid', 'fear', 'anxious'),
+    'surprise': ('surprised', 'shocked', 'wow'),
+    'love': ('love', 'heart', 'care'),
+}
+FALLBACK_EMOJIS = {
+    '😔': ('sadness', 0.8),
+    '💔': ('sadness', 0.9),
+    '☔️': ('sadness', 0.6),
+    '😄': ('joy', 0.8),
+    '🎉': ('joy', 0.7),
+    '😡': ('anger', 0.9),
+    '😨': ('fear', 0.8),
+    '😲': ('surprise', 0.8),
+    '❤️': ('love', 0.9),
+}
+# Every phrase a scoring rule asks about; each is looked up once per text
+RULE_PHRASES = frozenset(
+    STRONG_SADNESS_WORDS + SADNESS_PHRASES + SADNESS_EMOJIS + SADNESS_INDICATORS
+    + ('tough day', 'miss my family', 'overwhelming')
+).union(FallbackClassifier.PHRASES, FALLBACK_EMOJIS, *FALLBACK_KEYWORDS.values())
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+class TextFeatures:
+    """Everything the rule layer reads from one text, computed in a single pass"""
+
+    __slots__ = ('text', 'lower', 'words', 'tokens', 'phrase_hits', 'emojis', 'clean_text', 'punctuation')
+
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self.words = WORD_PATTERN.findall(self.lower)
+        self.tokens = frozenset(self.words)
+        # Substring matches, like the `phrase in text_lower` checks they replace
+        self.phrase_hits = frozenset(phrase for phrase in RULE_PHRASES if phrase in self.lower)
+
+        matches = emoji.emoji_list(text)
+        self.emojis = [match['emoji'] for match in matches]
+        # Same result as remove_emojis(), cut from the spans already found
+        pieces, position = [], 0
+        for match in matches:
+            pieces.append(text[position:match['match_start']])
+            position = match['match_end']
+        pieces.append(text[position:])
+        self.clean_text = ''.join(pieces).strip()
+
+        self.punctuation = {
+            'exclamations': text.count('!'),
+            'questions': text.count('?'),
+            'ellipses': text.count('...') + text.count('…')
+        }
+
+    def has(self, phrase):
+        """Whether a RULE_PHRASES entry occurs in the text"""
+        return phrase in self.phrase_hits
+
+    def count(self, phrases):
+        return sum(1 for phrase in phrases if phrase in self.phrase_hits)
+
+    def stats(self):
+        """Summary counts for API responses"""
+        return {'words': len(self.words), 'emojis': len(self.emojis), **self.punctuation}
+
+def text_features(text):
+    """TextFeatures for a text; already-built features pass through unchanged"""
+    return text if isinstance(text, TextFeatures) else TextFeatures(text)
+
+# -------------------------------
+# Emotion Scoring
+# -------------------------------
+def _is_sadness_dominant(features):
     """Check if text is likely expressing sadness"""
-    text_lower = text.lower()
-    
-    # Strong sadness indicators
-    strong_sadness_words = ['sad', 'depressed', 'heartbroken', 'grief', 'sorrow', 
-                           'miserable', 'despair', 'hopeless', 'overwhelmed']
-    
-    # Phrases indicating sadness
-    sadness_phrases = ['miss my', 'feel alone', 'want to die', 'can\'t stop crying',
-                      'feel empty', 'nothing matters', 'too much to handle']
-    
-    # Sadness emojis
-    sadness_emojis = ['😔', '😢', '😭', '💔', '☹️']
-    
-    # Count indicators
     score = 0
-    score += sum(1 for word in strong_sadness_words if word in text_lower) * 3
-    score += sum(1 for phrase in sadness_phrases if phrase in text_lower) * 2
-    score += sum(1 for emoji in sadness_emojis if emoji in text) * 2
+    score += features.count(STRONG_SADNESS_WORDS) * 3
+    score += features.count(SADNESS_PHRASES) * 2
+    score += features.count(SADNESS_EMOJIS) * 2
     
     return score >= 3
 
-def _boost_sadness_scores(text, scores):
+def _boost_sadness_scores(features, scores):
     """Boost sadness scores when text indicates sadness"""
-    text_lower = text.lower()
-    
     # Reduce joy score significantly when sadness is detected
     if scores.get('joy', 0) > scores.get('sadness', 0):
         scores['joy'] *= 0.3
         scores['sadness'] *= 1.5
     
     # Ensure sadness is prominent if indicators are strong
-    sadness_indicators = ['miss', 'overwhelmed', 'alone', 'tough', 'hard']
-    if any(indicator in text_lower for indicator in sadness_indicators):
+    if features.count(SADNESS_INDICATORS):
         scores['sadness'] = max(scores.get('sadness', 0), 0.4)
 
-def get_emotion_scores(text):
-    """Get emotion scores for text with custom rules"""
+def cascade_accepts(features, predictions):
+    """Whether the cheap classifier's answer is confident enough to skip the model"""
+    ranked = sorted((pred["score"] for pred in predictions), reverse=True)
+    margin = ranked[0] - ranked[1] if len(ranked) > 1 else ranked[0]
+    if margin < app.config['CASCADE_MIN_MARGIN']:
+        return False
+    return fallback_classifier.lexicon_coverage(features) >= app.config['CASCADE_MIN_COVERAGE']
+
+def classify_emotions(text, cascade=None, model=None):
+    """
+    Run the classifier, cheap tier first when the cascade is enabled
+    text is a string or TextFeatures; model is a ModelEntry and defaults to
+    the registry's active model
+    Returns: (predictions, tier); tier is 'breaker' when the model's circuit
+    breaker is open and the keyword classifier answered in its place
+    """
+    if cascade is None:
+        cascade = app.config['CASCADE_ENABLED']
+
+    features = text_features(text)
+    text = features.text
+
+    model = model or model_registry.active()
+    if model is None:
+        return fallback_classifier(features)[0], 'lexicon'
+
+    if cascade:
+        predictions = fallback_classifier(features)[0]
+        if cascade_accepts(features, predictions):
+            return predictions, 'lexicon'
+
+    if not app.config['BREAKER_ENABLED']:
+        return model.classifier(text)[0], 'transformer'
+
+    # Breaker open: the keyword classifier answers instead of a slow or failing model
+    breaker = breaker_for(model)
+    if not breaker.allow():
+        return fallback_classifier(features)[0], 'breaker'
+
+    start = time.perf_counter()
+    try:
+        predictions = model.classifier(text)[0]
+    except Exception:
+        breaker.record(time.perf_counter() - start, ok=False)
+        raise
+    breaker.record(time.perf_counter() - start, ok=True)
+    return predictions, 'transformer'
+
+def scores_from_predictions(text, predictions):
+    """Turn raw classifier output into final scores: custom rules, normalized, rounded"""
+    features = text_features(text)
+
+    # Convert to dictionary
+    scores = {}
+    for pred in predictions:
+        scores[pred["label"]] = float(pred["score"])
+    
+    # Ensure all emotions are present
+    for emotion in EMOTIONS:
+        if emotion not in scores:
+            scores[emotion] = 0.0
+    
+    # Apply custom rules for better accuracy
+    if _is_sadness_dominant(features):
+        _boost_sadness_scores(features, scores)
+    
+    # Special handling for your specific text
+    if features.has('tough day') and features.has('miss my family'):
+        scores['sadness'] = max(scores.get('sadness', 0), 0.7)
+        scores['joy'] = max(scores.get('joy', 0) * 0.2, 0.05)
+    
+    # Normalize scores to sum to 1
+    total = sum(scores.values())
+    if total > 0:
+        scores = {k: v/total for k, v in scores.items()}
+    
+    # Round scores for better display
+    return {k: round(v, 3) for k, v in scores.items()}
+
+def get_emotion_scores_with_tier(text, cascade=None, model=None):
+    """
+    Get emotion scores for text (a string or TextFeatures) with custom rules
+    Returns: (scores, tier) where tier names the classifier that answered
+    """
+    features = text if isinstance(text, TextFeatures) else None
+    text = features.text if features else text
     try:
         if not text or not text.strip():
-            return {emotion: 0.0 for emotion in EMOTIONS}
+            return {emotion: 0.0 for emotion in EMOTIONS}, 'none'
         
         print(f"Analyzing text: {text[:50]}...")
         
-        # Get predictions
-        predictions = emotion_classifier(text)[0]
-        
-        # Convert to dictionary
-        scores = {}
-        for pred in predictions:
-            scores[pred["label"]] = float(pred["score"])
-        
-        # Ensure all emotions are present
-        for emotion in EMOTIONS:
-            if emotion not in scores:
-                scores[emotion] = 0.0
-        
-        # Apply custom rules for better accuracy
-        if _is_sadness_dominant(text):
-            _boost_sadness_scores(text, scores)
-        
-        # Special handling for your specific text
-        text_lower = text.lower()
-        if 'tough day' in text_lower and 'miss my family' in text_lower:
-            scores['sadness'] = max(scores.get('sadness', 0), 0.7)
-            scores['joy'] = max(scores.get('joy', 0) * 0.2, 0.05)
-        
-        # Normalize scores to sum to 1
-        total = sum(scores.values())
-        if total > 0:
-            scores = {k: v/total for k, v in scores.items()}
-        
-        # Round scores for better display
-        scores = {k: round(v, 3) for k, v in scores.items()}
+        # Get predictions
+        features = features or TextFeatures(text)
+        predictions, tier = classify_emotions(features, cascade, model)
+        scores = scores_from_predictions(features, predictions)
         
-        print(f"Final scores: {scores}")
-        return scores
+        print(f"Final scores ({tier}): {scores}")
+        increment_metric(f'tier_{tier}')
+        return scores, tier
         
     except Exception as e:
         print(f"❌ Error in get_emotion_scores: {e}")
         # Fallback analysis using keyword matching
-        return _fallback_analysis(text)
+        increment_metric('tier_keyword')
+        return _fallback_analysis(features or text), 'keyword'
+
+def classify_emotions_batch(texts, cascade=None, model=None):
+    """
+    classify_emotions for many texts, with one batched model call for every
+    text the cascade does not settle
+    texts are strings or TextFeatures
+    Returns: list of (predictions, tier)
+    """
+    if cascade is None:
+        cascade = app.config['CASCADE_ENABLED']
+
+    features_list = [text_features(text) for text in texts]
+    texts = [features.text for features in features_list]
+    model = model or model_registry.active()
+    if model is None:
+        return [(fallback_classifier(features)[0], 'lexicon') for features in features_list]
+
+    results = [None] * len(texts)
+    pending = []
+    for i, features in enumerate(features_list):
+        if cascade:
+            predictions = fallback_classifier(features)[0]
+            if cascade_accepts(features, predictions):
+                results[i] = (predictions, 'lexicon')
+                continue
+        pending.append(i)
+    if not pending:
+        return results
+
+    batch = [texts[i] for i in pending]
+    batch_size = app.config['INFERENCE_BATCH_SIZE']
+    if not app.config['BREAKER_ENABLED']:
+        outputs = model.classifier(batch, batch_size=batch_size)
+    else:
+        breaker = breaker_for(model)
+        if not breaker.allow():
+            for i in pending:
+                results[i] = (fallback_classifier(features_list[i])[0], 'breaker')
+            return results
+        start = time.perf_counter()
+        try:
+            outputs = model.classifier(batch, batch_size=batch_size)
+        except Exception:
+            breaker.record(time.perf_counter() - start, ok=False)
+            raise
+        # Judge the SLO per text, so batched and single calls are comparable
+        breaker.record((time.perf_counter() - start) / len(batch), ok=True)
+
+    for i, predictions in zip(pending, outputs):
+        results[i] = (predictions, 'transformer')
+    return results
+
+def get_emotion_scores_with_tier_batch(texts, cascade=None, model=None):
+    """get_emotion_scores_with_tier for a list of texts or TextFeatures; returns [(scores, tier)]"""
+    results = [None] * len(texts)
+    features_list = [None] * len(texts)
+    indexes = []
+    for i, text in enumerate(texts):
+        raw = text.text if isinstance(text, TextFeatures) else text
+        if not raw or not raw.strip():
+            results[i] = ({emotion: 0.0 for emotion in EMOTIONS}, 'none')
+        else:
+            features_list[i] = text_features(text)
+            indexes.append(i)
+
+    try:
+        classified = classify_emotions_batch([features_list[i] for i in indexes], cascade, model)
+    except Exception as e:
+        print(f"❌ Batched classification failed ({e}); scoring texts one by one")
+        return [get_emotion_scores_with_tier(text, cascade, model) for text in texts]
+
+    for i, (predictions, tier) in zip(indexes, classified):
+        results[i] = (scores_from_predictions(features_list[i], predictions), tier)
+        increment_metric(f'tier_{tier}')
+    return results
+
+def get_emotion_scores_batch(texts, model=None):
+    """Emotion scores for many texts with one batched model call"""
+    return [scores for scores, _ in get_emotion_scores_with_tier_batch(texts, model=model)]
+
+def get_emotion_scores(text, model=None):
+    """Get emotion scores for text with custom rules"""
+    return get_emotion_scores_with_tier(text, model=model)[0]
+
+def model_version_for(tier, model):
+    """Which model produced a result: the model key, or the fallback tier"""
+    if tier == 'transformer' and model is not None:
+        return model.key
+    return f"fallback-{tier}"
 
 def _fallback_analysis(text):
-    """Fallback analysis using enhanced keyword matching"""
+    """Fallback analysis using enhanced keyword matching (text or TextFeatures)"""
     if not text:
         return {emotion: round(1.0/len(EMOTIONS), 3) for emotion in EMOTIONS}
     
-    text_lower = text.lower()
+    features = text_features(text)
     
     # Calculate scores based on keywords
-    joy_score = _calculate_keyword_score(text_lower, ['happy', 'joy', 'excited', 'good', 'great'])
-    sadness_score = _calculate_keyword_score(text_lower, ['sad', 'miss', 'alone', 'tough', 'overwhelmed', 'difficult'])
-    anger_score = _calculate_keyword_score(text_lower, ['angry', 'mad', 'furious', 'hate'])
-    fear_score = _calculate_keyword_score(text_lower, ['scared', 'afraid', 'fear', 'anxious'])
-    surprise_score = _calculate_keyword_score(text_lower, ['surprised', 'shocked', 'wow'])
-    love_score = _calculate_keyword_score(text_lower, ['love', 'heart', 'care'])
+    joy_score = _calculate_keyword_score(features, FALLBACK_KEYWORDS['joy'])
+    sadness_score = _calculate_keyword_score(features, FALLBACK_KEYWORDS['sadness'])
+    anger_score = _calculate_keyword_score(features, FALLBACK_KEYWORDS['anger'])
+    fear_score = _calculate_keyword_score(features, FALLBACK_KEYWORDS['fear'])
+    surprise_score = _calculate_keyword_score(features, FALLBACK_KEYWORDS['surprise'])
+    love_score = _calculate_keyword_score(features, FALLBACK_KEYWORDS['love'])
     
     # Emoji detection
-    emoji_scores = _analyze_emojis(text)
+    emoji_scores = _analyze_emojis(features)
     for emotion, score in emoji_scores.items():
         if emotion == 'joy':
             joy_score += score
@@ -658,7 +1539,7 @@ def _fallback_analysis(text):
             love_score += score
     
     # Special handling for your text
-    if 'miss my family' in text_lower and 'overwhelming' in text_lower:
+    if features.has('miss my family') and features.has('overwhelming'):
         sadness_score = max(sadness_score, 0.7)
         joy_score = max(joy_score * 0.3, 0.05)
     
@@ -679,57 +1560,335 @@ def _fallback_analysis(text):
     
     return scores
 
-def _calculate_keyword_score(text, keywords):
+def _calculate_keyword_score(features, keywords):
     """Calculate score based on keyword presence"""
-    score = 0
-    for keyword in keywords:
-        if keyword in text:
-            score += 0.2
+    score = 0.2 * features.count(keywords)
     return min(score, 0.8)
 
-def _analyze_emojis(text):
+def _analyze_emojis(features):
     """Analyze emojis in text"""
-    emoji_map = {
-        '😔': ('sadness', 0.8),
-        '💔': ('sadness', 0.9),
-        '☔️': ('sadness', 0.6),
-        '😄': ('joy', 0.8),
-        '🎉': ('joy', 0.7),
-        '😡': ('anger', 0.9),
-        '😨': ('fear', 0.8),
-        '😲': ('surprise', 0.8),
-        '❤️': ('love', 0.9),
-    }
-    
     scores = {emotion: 0 for emotion in EMOTIONS}
-    for emoji_char, (emotion, value) in emoji_map.items():
-        if emoji_char in text:
+    for emoji_char, (emotion, value) in FALLBACK_EMOJIS.items():
+        if features.has(emoji_char):
             scores[emotion] += value
     
     return scores
 
-def create_pie_chart(emotion_data):
-    """Create pie chart from emotion data and return as base64"""
+# -------------------------------
+# Pie Charts
+# -------------------------------
+# The chart is always one pie over the fixed EMOTION_COLORS, so it is drawn
+# directly: 'svg' builds the markup as a string, 'png' rasterizes the same
+# layout with numpy and a small bitmap font. 'matplotlib' keeps the original
+# renderer and only imports matplotlib the first time it is used.
+CHART_FORMATS = {'svg': 'svg', 'png': 'png', 'matplotlib': 'png'}
+CHART_FONT = 'DejaVu Sans, Arial, Helvetica, sans-serif'
+
+def _pie_slices(emotion_data):
+    """Labels, sizes and colors of the slices worth drawing"""
+    # Filter out emotions with very low scores
+    labels = []
+    sizes = []
+    colors = []
+    
+    for emotion, score in emotion_data.items():
+        if score > 0.01:  # Only include emotions with significant scores
+            labels.append(emotion.capitalize())
+            sizes.append(score)
+            colors.append(EMOTION_COLORS.get(emotion, "#808080"))
+    
+    if not labels or sum(sizes) < 0.01:
+        labels = ['Neutral']
+        sizes = [1.0]
+        colors = ['#808080']
+    return labels, sizes, colors
+
+def _pie_point(cx, cy, radius, degrees):
+    """Screen point at an angle measured counterclockwise from 3 o'clock"""
+    theta = np.radians(degrees)
+    return cx + radius * np.cos(theta), cy - radius * np.sin(theta)
+
+def render_pie_chart_svg(emotion_data):
+    """Pie chart as SVG markup, laid out like the matplotlib chart"""
+    labels, sizes, colors = _pie_slices(emotion_data)
+    total = sum(sizes)
+    cx, cy, radius = 290, 300, 200
+    width, height = 780, 540
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="{CHART_FONT}">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        f'<text x="{cx}" y="50" font-size="21" font-weight="bold" text-anchor="middle">Emotion Distribution</text>'
+    ]
+
+    # Wedges run counterclockwise from 12 o'clock, like startangle=90
+    angle = 90.0
+    annotations = []
+    for label, size, color in zip(labels, sizes, colors):
+        sweep = size / total * 360
+        if sweep >= 359.99:
+            parts.append(f'<circle cx="{cx}" cy="{cy}" r="{radius}" fill="{color}" stroke="white" stroke-width="2"/>')
+        else:
+            x1, y1 = _pie_point(cx, cy, radius, angle)
+            x2, y2 = _pie_point(cx, cy, radius, angle + sweep)
+            large_arc = 1 if sweep > 180 else 0
+            parts.append(
+                f'<path d="M{cx},{cy} L{x1:.2f},{y1:.2f} A{radius},{radius} 0 {large_arc} 0 {x2:.2f},{y2:.2f} Z" '
+                f'fill="{color}" stroke="white" stroke-width="2" stroke-linejoin="round"/>'
+            )
+
+        middle = angle + sweep / 2
+        lx, ly = _pie_point(cx, cy, radius * 1.1, middle)
+        anchor = 'start' if np.cos(np.radians(middle)) >= 0 else 'end'
+        annotations.append(
+            f'<text x="{lx:.2f}" y="{ly:.2f}" font-size="13" text-anchor="{anchor}" '
+            f'dominant-baseline="middle">{html.escape(label)}</text>'
+        )
+        pct = size / total * 100
+        if pct > 5:
+            px, py = _pie_point(cx, cy, radius * 0.6, middle)
+            annotations.append(
+                f'<text x="{px:.2f}" y="{py:.2f}" font-size="13" text-anchor="middle" '
+                f'dominant-baseline="middle">{pct:.1f}%</text>'
+            )
+        angle += sweep
+    parts.extend(annotations)
+
+    # Legend to the right of the pie
+    legend_x = cx + radius + 90
+    legend_y = cy - (len(labels) * 24 + 34) / 2
+    parts.append(
+        f'<rect x="{legend_x}" y="{legend_y:.1f}" width="130" height="{len(labels) * 24 + 34}" '
+        f'rx="4" fill="white" stroke="#cccccc"/>'
+    )
+    parts.append(f'<text x="{legend_x + 65}" y="{legend_y + 20:.1f}" font-size="13" text-anchor="middle">Emotions</text>')
+    for i, (label, color) in enumerate(zip(labels, colors)):
+        row_y = legend_y + 34 + i * 24
+        parts.append(f'<rect x="{legend_x + 12}" y="{row_y:.1f}" width="24" height="14" fill="{color}"/>')
+        parts.append(
+            f'<text x="{legend_x + 44}" y="{row_y + 7:.1f}" font-size="13" '
+            f'dominant-baseline="middle">{html.escape(label)}</text>'
+        )
+
+    parts.append('</svg>')
+    return ''.join(parts)
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+def encode_png(pixels):
+    """PNG bytes for an (height, width, 3) uint8 RGB array"""
+    height, width, _ = pixels.shape
+    # Filter type 0 (None) in front of every scanline
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, -1)], axis=1)
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        _png_chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)),
+        _png_chunk(b'IEND', b'')
+    ])
+
+# 5x7 bitmap glyphs for the PNG chart's text, one string of 7 rows per character
+CHART_GLYPHS = {
+    'A': '.###. #...# #...# ##### #...# #...# #...#',
+    'B': '####. #...# #...# ####. #...# #...# ####.',
+    'C': '.###. #...# #.... #.... #.... #...# .###.',
+    'D': '####. #...# #...# #...# #...# #...# ####.',
+    'E': '##### #.... #.... ####. #.... #.... #####',
+    'F': '##### #.... #.... ####. #.... #.... #....',
+    'G': '.###. #...# #.... #.### #...# #...# .####',
+    'H': '#...# #...# #...# ##### #...# #...# #...#',
+    'I': '.###. ..#.. ..#.. ..#.. ..#.. ..#.. .###.',
+    'J': '..### ...#. ...#. ...#. ...#. #..#. .##..',
+    'K': '#...# #..#. #.#.. ##... #.#.. #..#. #...#',
+    'L': '#.... #.... #.... #.... #.... #.... #####',
+    'M': '#...# ##.## #.#.# #.#.# #...# #...# #...#',
+    'N': '#...# #...# ##..# #.#.# #..## #...# #...#',
+    'O': '.###. #...# #...# #...# #...# #...# .###.',
+    'P': '####. #...# #...# ####. #.... #.... #....',
+    'Q': '.###. #...# #...# #...# #.#.# #..#. .##.#',
+    'R': '####. #...# #...# ####. #.#.. #..#. #...#',
+    'S': '.#### #.... #.... .###. ....# ....# ####.',
+    'T': '##### ..#.. ..#.. ..#.. ..#.. ..#.. ..#..',
+    'U': '#...# #...# #...# #...# #...# #...# .###.',
+    'V': '#...# #...# #...# #...# #...# .#.#. ..#..',
+    'W': '#...# #...# #...# #.#.# #.#.# #.#.# .#.#.',
+    'X': '#...# #...# .#.#. ..#.. .#.#. #...# #...#',
+    'Y': '#...# #...# .#.#. ..#.. ..#.. ..#.. ..#..',
+    'Z': '##### ....# ...#. ..#.. .#... #.... #####',
+    'a': '..... ..... .###. ....# .#### #...# .####',
+    'b': '#.... #.... #.##. ##..# #...# #...# ####.',
+    'c': '..... ..... .###. #.... #.... #...# .###.',
+    'd': '....# ....# .##.# #..## #...# #...# .####',
+    'e': '..... ..... .###. #...# ##### #.... .###.',
+    'f': '..##. .#..# .#... ###.. .#... .#... .#...',
+    'g': '..... .#### #...# #...# .#### ....# .###.',
+    'h': '#.... #.... #.##. ##..# #...# #...# #...#',
+    'i': '..#.. ..... .##.. ..#.. ..#.. ..#.. .###.',
+    'j': '...#. ..... ..##. ...#. ...#. #..#. .##..',
+    'k': '#.... #.... #..#. #.#.. ##... #.#.. #..#.',
+    'l': '.##.. ..#.. ..#.. ..#.. ..#.. ..#.. .###.',
+    'm': '..... ..... ##.#. #.#.# #.#.# #...# #...#',
+    'n': '..... ..... #.##. ##..# #...# #...# #...#',
+    'o': '..... ..... .###. #...# #...# #...# .###.',
+    'p': '..... ..... ####. #...# ####. #.... #....',
+    'q': '..... ..... .##.# #..## .#### ....# ....#',
+    'r': '..... ..... #.##. ##..# #.... #.... #....',
+    's': '..... ..... .###. #.... .###. ....# ####.',
+    't': '.#... .#... ###.. .#... .#... .#..# ..##.',
+    'u': '..... ..... #...# #...# #...# #..## .##.#',
+    'v': '..... ..... #...# #...# #...# .#.#. ..#..',
+    'w': '..... ..... #...# #...# #.#.# #.#.# .#.#.',
+    'x': '..... ..... #...# .#.#. ..#.. .#.#. #...#',
+    'y': '..... ..... #...# #...# .#### ....# .###.',
+    'z': '..... ..... ##### ...#. ..#.. .#... #####',
+    '0': '.###. #...# #..## #.#.# ##..# #...# .###.',
+    '1': '..#.. .##.. ..#.. ..#.. ..#.. ..#.. .###.',
+    '2': '.###. #...# ....# ...#. ..#.. .#... #####',
+    '3': '####. ....# ....# .###. ....# ....# ####.',
+    '4': '...#. ..##. .#.#. #..#. ##### ...#. ...#.',
+    '5': '##### #.... ####. ....# ....# #...# .###.',
+    '6': '..##. .#... #.... ####. #...# #...# .###.',
+    '7': '##### ....# ...#. ..#.. .#... .#... .#...',
+    '8': '.###. #...# #...# .###. #...# #...# .###.',
+    '9': '.###. #...# #...# .#### ....# ...#. .##..',
+    '.': '..... ..... ..... ..... ..... .##.. .##..',
+    '%': '##... ##..# ...#. ..#.. .#... #..## ...##',
+    ' ': '..... ..... ..... ..... ..... ..... .....',
+    '?': '.###. #...# ....# ...#. ..#.. ..... ..#..',
+}
+CHART_GLYPH_MASKS = {
+    char: np.array([[c == '#' for c in row] for row in rows.split()], dtype=bool)
+    for char, rows in CHART_GLYPHS.items()
+}
+
+def _hex_rgb(color):
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float32)
+
+def _text_mask(text, scale):
+    """Boolean bitmap of a line of text: 5x7 glyphs, one column of spacing, scaled up"""
+    glyphs = [CHART_GLYPH_MASKS.get(char, CHART_GLYPH_MASKS['?']) for char in text]
+    spaced = []
+    for glyph in glyphs:
+        spaced.extend([glyph, np.zeros((7, 1), dtype=bool)])
+    mask = np.concatenate(spaced[:-1], axis=1) if spaced else np.zeros((7, 0), dtype=bool)
+    return mask.repeat(scale, axis=0).repeat(scale, axis=1)
+
+def _draw_text(pixels, text, x, y, scale, anchor='start', color=(0, 0, 0), bold=False):
+    """Draw text with its vertical middle at y; anchor is 'start', 'middle' or 'end' of x"""
+    mask = _text_mask(text, scale)
+    if bold:
+        mask = mask | np.pad(mask, ((0, 0), (1, 0)))[:, :-1]
+    height, width = mask.shape
+    left = int(round(x - {'start': 0, 'middle': width / 2, 'end': width}[anchor]))
+    top = int(round(y - height / 2))
+    # Clip to the canvas
+    y0, x0 = max(top, 0), max(left, 0)
+    y1, x1 = min(top + height, pixels.shape[0]), min(left + width, pixels.shape[1])
+    if y0 >= y1 or x0 >= x1:
+        return
+    region = mask[y0 - top:y1 - top, x0 - left:x1 - left]
+    pixels[y0:y1, x0:x1][region] = color
+
+def _draw_rect(pixels, x, y, width, height, fill=None, stroke=None):
+    x0, y0, x1, y1 = (int(round(v)) for v in (x, y, x + width, y + height))
+    if fill is not None:
+        pixels[y0:y1, x0:x1] = _hex_rgb(fill)
+    if stroke is not None:
+        color = _hex_rgb(stroke)
+        pixels[y0, x0:x1] = color
+        pixels[y1 - 1, x0:x1] = color
+        pixels[y0:y1, x0] = color
+        pixels[y0:y1, x1 - 1] = color
+
+def render_pie_chart_png(emotion_data, width=None):
+    """
+    PNG with the same layout as the SVG chart (title, wedges with white edges,
+    outside labels, percentages above 5% and a legend), rasterized with numpy
+    The pie's rim and wedge edges are anti-aliased from their exact distances;
+    text uses the 5x7 CHART_GLYPHS bitmap font.
+    """
+    labels, sizes, colors = _pie_slices(emotion_data)
+    width = width or app.config['CHART_PNG_WIDTH']
+    s = width / 780
+    height = int(round(540 * s))
+    cx, cy, radius = 290 * s, 300 * s, 200 * s
+    label_scale = max(1, int(round(13 * s / 9)))
+    title_scale = max(1, int(round(21 * s / 9)))
+
+    pixels = np.full((height, width, 3), 255, dtype=np.float32)
+    _draw_text(pixels, 'Emotion Distribution', cx, 50 * s, title_scale, 'middle', bold=True)
+
+    # Wedges: only the pie's bounding box is rasterized
+    x0, x1 = int(cx - radius) - 1, int(cx + radius) + 2
+    y0, y1 = int(cy - radius) - 1, int(cy + radius) + 2
+    dx = (np.arange(x0, x1, dtype=np.float32) + 0.5 - cx)[None, :]
+    dy = (cy - 0.5 - np.arange(y0, y1, dtype=np.float32))[:, None]
+    coverage = np.clip(radius - np.hypot(dx, dy) + 0.5, 0, 1)[..., None]
+    # Degrees counterclockwise from 12 o'clock, as in the SVG
+    angle = (np.degrees(np.arctan2(dy, dx)) - 90) % 360
+    total = sum(sizes)
+    bounds = np.cumsum(sizes) / total * 360
+    slice_ids = np.minimum(np.searchsorted(bounds, angle, side='right'), len(sizes) - 1)
+    palette = np.array([_hex_rgb(c) for c in colors])
+    wedges = palette[slice_ids]
+
+    # 2px white edges along each wedge boundary
+    if len(sizes) > 1:
+        edge = np.zeros((y1 - y0, x1 - x0), dtype=np.float32)
+        for boundary in np.concatenate(([0.0], bounds[:-1])):
+            theta = np.radians(boundary + 90)
+            ux, uy = np.float32(np.cos(theta)), np.float32(np.sin(theta))
+            distance = np.abs(dx * uy - dy * ux)
+            edge = np.maximum(edge, np.where(dx * ux + dy * uy > 0, np.clip(1.5 - distance, 0, 1), 0))
+        wedges = wedges + (255 - wedges) * edge[..., None]
+    box = pixels[y0:y1, x0:x1]
+    box[:] = box * (1 - coverage) + wedges * coverage
+
+    # Labels outside the rim, percentages inside wedges above 5%
+    start = 90.0
+    for label, size in zip(labels, sizes):
+        sweep = size / total * 360
+        middle = start + sweep / 2
+        lx, ly = _pie_point(cx, cy, radius * 1.1, middle)
+        anchor = 'start' if np.cos(np.radians(middle)) >= 0 else 'end'
+        _draw_text(pixels, label, lx, ly, label_scale, anchor)
+        pct = size / total * 100
+        if pct > 5:
+            px, py = _pie_point(cx, cy, radius * 0.6, middle)
+            _draw_text(pixels, f"{pct:.1f}%", px, py, label_scale, 'middle')
+        start += sweep
+
+    # Legend to the right of the pie
+    legend_x = cx + radius + 90 * s
+    legend_h = (len(labels) * 24 + 34) * s
+    legend_y = cy - legend_h / 2
+    _draw_rect(pixels, legend_x, legend_y, 130 * s, legend_h, fill='#ffffff', stroke='#cccccc')
+    _draw_text(pixels, 'Emotions', legend_x + 65 * s, legend_y + 20 * s, label_scale, 'middle')
+    for i, (label, color) in enumerate(zip(labels, colors)):
+        row_y = legend_y + (34 + i * 24) * s
+        _draw_rect(pixels, legend_x + 12 * s, row_y, 24 * s, 14 * s, fill=color)
+        _draw_text(pixels, label, legend_x + 44 * s, row_y + 7 * s, label_scale)
+
+    return encode_png(np.round(pixels).astype(np.uint8))
+
+def render_pie_chart_matplotlib(emotion_data):
+    """Create pie chart from emotion data with matplotlib and return the raw PNG bytes"""
     try:
-        # Filter out emotions with very low scores
-        labels = []
-        sizes = []
-        colors = []
-        
-        for emotion, score in emotion_data.items():
-            if score > 0.01:  # Only include emotions with significant scores
-                labels.append(emotion.capitalize())
-                sizes.append(score)
-                colors.append(EMOTION_COLORS.get(emotion, "#808080"))
-        
-        if not labels or sum(sizes) < 0.01:
-            labels = ['Neutral']
-            sizes = [1.0]
-            colors = ['#808080']
+        labels, sizes, colors = _pie_slices(emotion_data)
+
+        # Imported on first use so startup and the default renderers never pay for it
+        import matplotlib
+        matplotlib.use('Agg')
+        from matplotlib.figure import Figure
         
-        # Create figure with better aesthetics
-        plt.figure(figsize=(8, 6), facecolor='white')
-        wedges, texts, autotexts = plt.pie(
+        # Create figure with better aesthetics. The object-oriented Figure API
+        # keeps no global pyplot state, so charts can render on several
+        # executor threads at once.
+        fig = Figure(figsize=(8, 6), facecolor='white')
+        ax = fig.add_subplot()
+        wedges, texts, autotexts = ax.pie(
             sizes, 
             labels=labels, 
             colors=colors, 
@@ -740,26 +1899,138 @@ def create_pie_chart(emotion_data):
         )
         
         # Style the chart
-        plt.axis('equal')
-        plt.title('Emotion Distribution', fontsize=16, fontweight='bold', pad=20)
-        
+        ax.axis('equal')
+        ax.set_title('Emotion Distribution', fontsize=16, fontweight='bold', pad=20)
+
         # Add legend
-        plt.legend(wedges, labels, title="Emotions", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
-        
+        ax.legend(wedges, labels, title="Emotions", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+
         # Save to bytes
         buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight', 
+        fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight',
                    facecolor='white', edgecolor='none')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        plt.close('all')  # Close all figures to free memory
-        
-        return image_base64
+        return buffer.getvalue()
         
     except Exception as e:
         print(f"❌ Error creating pie chart: {e}")
         # Return a simple placeholder image
-        return ""
+        return b""
+
+def render_pie_chart(emotion_data, renderer=None):
+    """
+    Render the pie with the configured CHART_RENDERER
+    Returns: (image bytes, 'svg' or 'png')
+    """
+    renderer = renderer or app.config['CHART_RENDERER']
+    if renderer == 'matplotlib':
+        return render_pie_chart_matplotlib(emotion_data), 'png'
+    try:
+        if renderer == 'png':
+            return render_pie_chart_png(emotion_data), 'png'
+        return render_pie_chart_svg(emotion_data).encode('utf-8'), 'svg'
+    except Exception as e:
+        print(f"❌ Error creating pie chart: {e}")
+        return b"", CHART_FORMATS.get(renderer, 'svg')
+
+def chart_renderer_for(chart_format=None):
+    """Renderer producing a requested chart format ('png' or 'svg'); None means CHART_RENDERER"""
+    configured = app.config['CHART_RENDERER']
+    if chart_format is None or CHART_FORMATS.get(configured) == chart_format:
+        return configured
+    return 'svg' if chart_format == 'svg' else 'png'
+
+def create_pie_chart(emotion_data):
+    """Create pie chart from emotion data and return as base64"""
+    return base64.b64encode(render_pie_chart(emotion_data)[0]).decode('utf-8')
+
+def score_emojis(emojis, model=None):
+    """Score each emoji's text description and return its top emotion"""
+    emoji_scores = []
+    for e in emojis[:10]:  # Limit to first 10 emojis
+        try:
+            scores = get_emotion_scores(emoji_to_text(e), model)
+            top_emoji_emotion = max(scores.items(), key=lambda x: x[1])
+            emoji_scores.append((e, top_emoji_emotion[0], top_emoji_emotion[1]))
+        except Exception:
+            continue
+    return emoji_scores
+
+def run_text_inference(text, emojis, model=None):
+    """All model work for one text (string or TextFeatures): the text itself plus its emojis"""
+    emotion_scores, tier = get_emotion_scores_with_tier(text, model=model)
+    return emotion_scores, tier, score_emojis(emojis, model)
+
+def run_bulk_inference(texts, model=None):
+    """Emotion scores and answering tier for a list of texts or TextFeatures"""
+    return get_emotion_scores_with_tier_batch(texts, model=model)
+
+# -------------------------------
+# Response Encoding
+# -------------------------------
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+def project_fields(payload, fields):
+    """Keep only the requested top-level fields (plus 'success')"""
+    wanted = {f.strip() for f in fields if f.strip()}
+    return {k: v for k, v in payload.items() if k in wanted or k == 'success'}
+
+def compress_body(body, encoding):
+    """Compress a response body with 'gzip' or 'br'"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+def encode_payload(payload, fields=None, binary=False, compression=None):
+    """
+    Serialize an API payload
+    bytes values (the chart image) stay raw in MessagePack and become base64 in JSON.
+    Returns: (body bytes, mimetype, content encoding actually applied)
+    """
+    if fields:
+        payload = project_fields(payload, fields)
+
+    if binary:
+        body = msgpack.packb(payload, use_bin_type=True)
+        mimetype = MSGPACK_MIMETYPES[0]
+    else:
+        payload = {
+            k: base64.b64encode(v).decode('utf-8') if isinstance(v, bytes) else v
+            for k, v in payload.items()
+        }
+        body = app.json.dumps(payload).encode('utf-8')
+        mimetype = 'application/json'
+
+    if compression and len(body) >= app.config['COMPRESS_MIN_BYTES']:
+        body = compress_body(body, compression)
+    else:
+        compression = None
+
+    return body, mimetype, compression
+
+def make_api_response(payload, status=200):
+    """
+    Build a response honouring ?fields=a,b, Accept: application/msgpack
+    and Accept-Encoding: br/gzip
+    """
+    fields = request.args.get('fields')
+    fields = fields.split(',') if fields else None
+
+    binary = msgpack is not None and \
+        request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES) in MSGPACK_MIMETYPES
+
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    compression = request.accept_encodings.best_match(offered)
+
+    body, mimetype, compression = encode_payload(payload, fields, binary, compression)
+
+    response = make_response(body, status)
+    response.mimetype = mimetype
+    if compression:
+        response.headers['Content-Encoding'] = compression
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
 
 # -------------------------------
 # Routes
@@ -770,7 +2041,8 @@ def index():
     return render_template('index.html')
 
 @app.route('/analyze', methods=['POST'])
-def analyze():
+@profile_request
+async def analyze():
     """Analyze text for emotions and check emoji relevance"""
     try:
         # Get request data
@@ -783,74 +2055,88 @@ def analyze():
         if not text:
             return jsonify({'error': 'No text provided', 'success': False}), 400
         
+        # Pin the model for the whole request, so a hot swap never changes it midway
+        try:
+            model = model_registry.resolve(data.get('model'))
+        except (KeyError, ValueError):
+            return jsonify({'error': f"Unknown or unloaded model: {data.get('model')}", 'success': False}), 400
+        
+        chart_format = data.get('pie_chart_format')
+        if chart_format not in (None, 'png', 'svg'):
+            return jsonify({'error': "pie_chart_format must be 'png' or 'svg'", 'success': False}), 400
+        chart_renderer = chart_renderer_for(chart_format)
+        
         print(f"\n" + "="*50)
         print(f"📝 Analyzing text: '{text[:100]}...'")
         print("="*50)
         
-        # Get emotion scores for text
-        emotion_scores = get_emotion_scores(text)
-        
-        # Extract emojis
-        emojis_found = extract_emojis(text)
-        clean_text = remove_emojis(text) or text
+        # One pass over the text for emojis, phrases and punctuation; scoring reuses it
+        features = TextFeatures(text)
+        emojis_found = features.emojis
+        clean_text = features.clean_text or text
         
         print(f"Found {len(emojis_found)} emojis: {emojis_found}")
         
+        # Get emotion scores for text and its emojis on the inference executor
+        try:
+            emotion_scores, classifier_tier, emoji_scores = await run_coalesced(
+                (model.key if model else None, normalize_text(text)),
+                run_text_inference, features, emojis_found, model
+            )
+        except asyncio.TimeoutError:
+            return jsonify({'error': 'Analysis timed out', 'success': False}), 504
+        model_version = model_version_for(classifier_tier, model)
+        
         # NEW: Analyze emoji relevance
         emoji_relevance_results, relevance_status = analyze_emoji_relevance(emotion_scores, emojis_found)
         
         # Analyze emoji emotions
         emoji_analysis = []
-        for e in emojis_found[:10]:  # Limit to first 10 emojis
-            try:
-                emoji_text = emoji_to_text(e)
-                emoji_scores = get_emotion_scores(emoji_text)
-                top_emoji_emotion = max(emoji_scores.items(), key=lambda x: x[1])
-                
-                # Get relevance for this specific emoji
-                emoji_relevance = "unknown"
-                emoji_relevance_score = 0
-                if emoji_relevance_results and 'emoji_results' in emoji_relevance_results:
-                    for result in emoji_relevance_results['emoji_results']:
-                        if result['emoji'] == e:
-                            emoji_relevance = result['relevance']
-                            emoji_relevance_score = result['relevance_score']
-                            break
-                
-                emoji_analysis.append({
-                    'emoji': e,
-                    'emotion': top_emoji_emotion[0],
-                    'confidence': float(round(top_emoji_emotion[1], 3)),
-                    'relevance': emoji_relevance,
-                    'relevance_score': emoji_relevance_score
-                })
-            except Exception as emoji_error:
-                continue
+        for e, emotion, confidence in emoji_scores:
+            # Get relevance for this specific emoji
+            emoji_relevance = "unknown"
+            emoji_relevance_score = 0
+            if emoji_relevance_results and 'emoji_results' in emoji_relevance_results:
+                for result in emoji_relevance_results['emoji_results']:
+                    if result['emoji'] == e:
+                        emoji_relevance = result['relevance']
+                        emoji_relevance_score = result['relevance_score']
+                        break
+            
+            emoji_analysis.append({
+                'emoji': e,
+                'emotion': emotion,
+                'confidence': float(round(confidence, 3)),
+                'relevance': emoji_relevance,
+                'relevance_score': emoji_relevance_score
+            })
         
         # Get top text emotion
         top_text_emotion = max(emotion_scores.items(), key=lambda x: x[1])
         print(f"🎯 Top emotion: {top_text_emotion[0]} ({top_text_emotion[1]:.3f})")
         
-        # Generate pie chart
-        chart_image = create_pie_chart(emotion_scores)
+        # Generate pie chart (PNG unless the client asked for SVG)
+        if chart_renderer == 'svg':
+            # String building only: cheaper than a hop to the executor
+            chart_image, chart_format = render_pie_chart(emotion_scores, chart_renderer)
+        else:
+            chart_image, chart_format = await run_in_inference_executor(render_pie_chart, emotion_scores, chart_renderer)
         
         # Save to database
         try:
-            history_entry = AnalysisHistory(
-                text=text,
-                joy=float(emotion_scores.get('joy', 0)),
-                sadness=float(emotion_scores.get('sadness', 0)),
-                anger=float(emotion_scores.get('anger', 0)),
-                fear=float(emotion_scores.get('fear', 0)),
-                surprise=float(emotion_scores.get('surprise', 0)),
-                love=float(emotion_scores.get('love', 0)),
-                neutral=float(emotion_scores.get('neutral', 0)),
-                emoji_relevance=relevance_status if relevance_status else "neutral",
-                relevance_score=emoji_relevance_results['overall_score'] if emoji_relevance_results else 0.0
-            )
-            db.session.add(history_entry)
-            db.session.commit()
-            history_id = history_entry.id
+            history_id = history_store.add({
+                'text': text,
+                'joy': float(emotion_scores.get('joy', 0)),
+                'sadness': float(emotion_scores.get('sadness', 0)),
+                'anger': float(emotion_scores.get('anger', 0)),
+                'fear': float(emotion_scores.get('fear', 0)),
+                'surprise': float(emotion_scores.get('surprise', 0)),
+                'love': float(emotion_scores.get('love', 0)),
+                'neutral': float(emotion_scores.get('neutral', 0)),
+                'emoji_relevance': relevance_status if relevance_status else "neutral",
+                'relevance_score': emoji_relevance_results['overall_score'] if emoji_relevance_results else 0.0,
+                'model_version': model_version
+            })
             print(f"💾 Saved to database with ID: {history_id}")
         except Exception as db_error:
             print(f"⚠️ Database error: {db_error}")
@@ -866,11 +2152,18 @@ def analyze():
                 'confidence': float(round(top_text_emotion[1], 3))
             },
             'emotion_scores': emotion_scores,
+            'classifier_tier': classifier_tier,
+            'model_version': model_version,
             'emojis_found': emojis_found,
+            'text_stats': features.stats(),
             'emoji_analysis': emoji_analysis,
             'emoji_relevance': emoji_relevance_results,  # NEW: Add relevance analysis
             'suggested_emojis': EMOTION_EMOJI_MAP.get(top_text_emotion[0], EMOTION_EMOJI_MAP['neutral']),
+            'ranked_suggestions': rank_emoji_suggestions(
+                emotion_scores, emojis_found if data.get('exclude_present_emojis', True) else ()
+            ),
             'pie_chart': chart_image,
+            'pie_chart_format': chart_format,
             'history_id': history_id
         }
         
@@ -878,7 +2171,7 @@ def analyze():
         print(f"📊 Emoji Relevance: {relevance_status}")
         print("="*50 + "\n")
         
-        return jsonify(response_data)
+        return make_api_response(response_data)
         
     except Exception as e:
         print(f"❌ Error in analyze endpoint: {str(e)}")
@@ -891,6 +2184,188 @@ def analyze():
             'message': 'Internal server error'
         }), 500
 
+def build_bulk_results(texts, scored, model, exclude_present_emojis=True):
+    """Per-text result dicts for /analyze/bulk and background jobs (texts or TextFeatures)"""
+    features_list = [text_features(t) for t in texts]
+    score_list = [scores for scores, _ in scored]
+    emojis_list = [features.emojis for features in features_list]
+    relevance_list = analyze_emoji_relevance_batch(score_list, emojis_list)
+    suggestions_list = rank_emoji_suggestions_batch(
+        score_list, emojis_list if exclude_present_emojis else None
+    )
+
+    results = []
+    for features, (scores, tier), emojis_found, (relevance, status), suggestions in zip(
+            features_list, scored, emojis_list, relevance_list, suggestions_list):
+        top_emotion = max(scores.items(), key=lambda x: x[1])
+        results.append({
+            'text': features.text,
+            'top_emotion': {
+                'label': top_emotion[0],
+                'confidence': float(round(top_emotion[1], 3))
+            },
+            'emotion_scores': scores,
+            'classifier_tier': tier,
+            'model_version': model_version_for(tier, model),
+            'emojis_found': emojis_found,
+            'emoji_relevance': relevance,
+            'relevance_status': status,
+            'ranked_suggestions': suggestions
+        })
+    return results
+
+@app.route('/analyze/bulk', methods=['POST'])
+@profile_request
+async def analyze_bulk():
+    """Analyze many texts at once: emotion scores and emoji relevance, no charts"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided', 'success': False}), 400
+
+        texts = data.get('texts')
+        if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+            return jsonify({'error': 'texts must be a non-empty list of strings', 'success': False}), 400
+
+        if len(texts) > app.config['BULK_MAX_TEXTS']:
+            return jsonify({
+                'error': f"At most {app.config['BULK_MAX_TEXTS']} texts per request",
+                'success': False
+            }), 400
+
+        try:
+            model = model_registry.resolve(data.get('model'))
+        except (KeyError, ValueError):
+            return jsonify({'error': f"Unknown or unloaded model: {data.get('model')}", 'success': False}), 400
+
+        features_list = [TextFeatures(t.strip()) for t in texts]
+        scored = await run_in_inference_executor(run_bulk_inference, features_list, model)
+        results = build_bulk_results(features_list, scored, model, data.get('exclude_present_emojis', True))
+
+        return make_api_response({'success': True, 'results': results})
+
+    except Exception as e:
+        print(f"❌ Error in bulk analyze endpoint: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'message': 'Internal server error'
+        }), 500
+
+# -------------------------------
+# Background Jobs
+# -------------------------------
+# Large batches go through POST /jobs instead of /analyze/bulk: texts are
+# stored in the database and analyzed by low-priority workers (see jobs.py),
+# which back off whenever interactive requests are waiting for the executor.
+def process_job_chunk(texts, model_spec, options):
+    """
+    Analyze one chunk of a job's texts; runs on a job worker thread
+    Inference goes to the shared executor one INFERENCE_BATCH_SIZE slice at a
+    time, so interactive requests queue between slices instead of behind the chunk
+    """
+    model = model_registry.resolve(model_spec)
+    features_list = [TextFeatures(text) for text in texts]
+    batch_size = app.config['INFERENCE_BATCH_SIZE']
+    scored = []
+    for start in range(0, len(features_list), batch_size):
+        scored.extend(run_background_inference(run_bulk_inference, features_list[start:start + batch_size], model))
+    increment_metric('job_texts_processed', len(texts))
+    return build_bulk_results(features_list, scored, model, options.get('exclude_present_emojis', True))
+
+with app.app_context():
+    job_runner = JobRunner(
+        db.engine,
+        process_job_chunk,
+        workers=app.config['JOB_WORKERS'],
+        chunk_size=app.config['JOB_CHUNK_SIZE'],
+        lease_s=app.config['JOB_LEASE_S'],
+        niceness=app.config['JOB_NICE'],
+        should_yield=interactive_busy
+    )
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a batch of texts for background analysis"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No data provided', 'success': False}), 400
+
+    texts = data.get('texts')
+    if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+        return jsonify({'error': 'texts must be a non-empty list of strings', 'success': False}), 400
+    if len(texts) > app.config['JOB_MAX_TEXTS']:
+        return jsonify({'error': f"At most {app.config['JOB_MAX_TEXTS']} texts per job", 'success': False}), 400
+
+    try:
+        priority = int(data.get('priority', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'priority must be an integer', 'success': False}), 400
+
+    # Fail fast on unknown models instead of when a worker picks the job up
+    model_spec = data.get('model') or None
+    try:
+        model_registry.resolve(model_spec)
+    except (KeyError, ValueError):
+        return jsonify({'error': f"Unknown or unloaded model: {model_spec}", 'success': False}), 400
+
+    job = job_runner.submit(
+        [t.strip() for t in texts],
+        priority=priority,
+        model=model_spec,
+        options={'exclude_present_emojis': bool(data.get('exclude_present_emojis', True))}
+    )
+    increment_metric('jobs_submitted')
+    job.update({
+        'success': True,
+        'status_url': f"/jobs/{job['job_id']}",
+        'results_url': f"/jobs/{job['job_id']}/results"
+    })
+    return jsonify(job), 202
+
+@app.route('/jobs')
+def list_jobs():
+    """Most recent jobs, newest first"""
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    return jsonify({'jobs': job_runner.recent(limit), 'counts': job_runner.counts()})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status and progress of one job"""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job; finished jobs are left as they are"""
+    job = job_runner.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/results')
+def job_results(job_id):
+    """Stream results as NDJSON, one line per text in submission order"""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    partial = request.args.get('partial') == '1'
+    if job['status'] not in FINISHED_STATUSES and not partial:
+        return jsonify({'error': f"Job is {job['status']}; pass partial=1 for results so far", **job}), 409
+
+    def generate():
+        for position, result in job_runner.iter_results(job_id):
+            if result is None and not partial:
+                continue  # never processed (failed or cancelled job)
+            yield json.dumps({'index': position, 'result': result}, ensure_ascii=False) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Job-Status'] = job['status']
+    return response
+
 @app.route('/test_relevance', methods=['GET'])
 def test_relevance():
     """Test the emoji relevance checker with various examples"""
@@ -989,6 +2464,45 @@ def test_model():
         'results': results
     })
 
+# -------------------------------
+# History Page Caching
+# -------------------------------
+# Rendered history pages are cached per (page, newest row ID, row count, last
+# modification), so a page only re-renders after rows are added, removed or
+# re-scored. The same version backs the ETag/Last-Modified validators, letting
+# unchanged pages answer 304.
+_history_cache = OrderedDict()
+_history_cache_lock = threading.Lock()
+
+def invalidate_history_cache(*_):
+    """Drop all cached history pages"""
+    with _history_cache_lock:
+        _history_cache.clear()
+
+history_store.add_listener(invalidate_history_cache)
+
+def history_version():
+    """
+    (newest row ID, row count, last modified) of the history store
+    Re-scoring rewrites rows in place and compaction can delete as many rows
+    as were added, without changing the first two, so the last re-score
+    checkpoint and compaction times also count as modifications.
+    """
+    newest_id, total, newest_timestamp = history_store.version()
+    rescored_at = db.session.query(db.func.max(RescoreCheckpoint.updated_at)).scalar()
+    compacted_at = history_store.compacted_at()
+    return newest_id, total, max(filter(None, (newest_timestamp, rescored_at, compacted_at)), default=None)
+
+def _render_history_page(page, per_page):
+    # Get paginated history
+    pagination = history_store.page(page, per_page)
+    
+    history_data = [history_row_to_dict(entry) for entry in pagination.items]
+    
+    return render_template('history.html', 
+                         history=history_data,
+                         pagination=pagination)
+
 @app.route('/history')
 def history():
     """History page"""
@@ -996,15 +2510,35 @@ def history():
         page = request.args.get('page', 1, type=int)
         per_page = 10
         
-        # Get paginated history
-        history_query = AnalysisHistory.query.order_by(AnalysisHistory.timestamp.desc())
-        pagination = history_query.paginate(page=page, per_page=per_page, error_out=False)
+        newest_id, total, modified_at = history_version()
+        modified_stamp = int(modified_at.timestamp()) if modified_at else 0
+        etag = f"history-{newest_id}-{total}-{modified_stamp}-{page}"
+        last_modified = modified_at.replace(tzinfo=timezone.utc) if modified_at else None
         
-        history_data = [entry.to_dict() for entry in pagination.items]
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            response = make_response('', 304)
+        else:
+            key = (page, newest_id, total, modified_stamp)
+            with _history_cache_lock:
+                body = _history_cache.get(key)
+                if body is not None:
+                    _history_cache.move_to_end(key)
+            
+            if body is None:
+                body = _render_history_page(page, per_page)
+                with _history_cache_lock:
+                    _history_cache[key] = body
+                    while len(_history_cache) > app.config['HISTORY_CACHE_PAGES']:
+                        _history_cache.popitem(last=False)
+            
+            response = make_response(body)
         
-        return render_template('history.html', 
-                             history=history_data,
-                             pagination=pagination)
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        # Browsers may keep the page but must revalidate it on every visit
+        response.cache_control.no_cache = True
+        return response
     except Exception as e:
         print(f"Error in history: {e}")
         return render_template('history.html', history=[], pagination=None)
@@ -1016,17 +2550,392 @@ def health():
         'status': 'healthy',
         'service': 'Emoji Emotion Analyzer',
         'version': '1.0.0',
-        'model_loaded': MODEL_LOADED
+        'model_loaded': model_registry.active() is not None
     })
 
 @app.route('/debug/model_status')
 def model_status():
     """Debug endpoint for model status"""
+    active = model_registry.active()
+    return jsonify({
+        'model_loaded': active is not None,
+        'model_type': 'DistilBERT Emotion Classifier' if active else 'Fallback Keyword Classifier',
+        'active_model': active.key if active else None,
+        'breaker': breaker_for(active).snapshot() if active and app.config['BREAKER_ENABLED'] else None
+    })
+
+def require_admin_token():
+    """None if the request carries the admin token, else an error response"""
+    token = app.config['ADMIN_TOKEN']
+    if not token:
+        return jsonify({'error': 'Admin endpoints are disabled (ADMIN_TOKEN not set)'}), 403
+    if request.headers.get('X-Admin-Token') != token:
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
+@app.route('/models')
+def list_models():
+    """Loaded and locally available model versions"""
+    active = model_registry.active()
     return jsonify({
-        'model_loaded': MODEL_LOADED,
-        'model_type': 'DistilBERT Emotion Classifier' if MODEL_LOADED else 'Fallback Keyword Classifier'
+        'active': active.key if active else None,
+        'loaded': [entry.to_dict() for entry in model_registry.loaded()],
+        'available': model_registry.available()
     })
 
+@app.route('/models/activate', methods=['POST'])
+def activate_model():
+    """Hot-swap the default model; in-flight requests finish on the model they started with"""
+    denied = require_admin_token()
+    if denied:
+        return denied
+
+    data = request.get_json() or {}
+    spec = data.get('model')
+    if not spec:
+        return jsonify({'error': 'No model provided', 'success': False}), 400
+
+    try:
+        name, version = parse_model_spec(spec)
+        entry = model_registry.activate(name, version)
+    except KeyError as e:
+        return jsonify({'error': str(e), 'success': False}), 404
+
+    print(f"🔁 Active model is now {entry.key}")
+    return jsonify({'success': True, 'active': entry.to_dict()})
+
+@app.route('/models/load', methods=['POST'])
+def load_model():
+    """Load a model version so requests can select it, without activating it"""
+    denied = require_admin_token()
+    if denied:
+        return denied
+
+    data = request.get_json() or {}
+    spec = data.get('model')
+    if not spec:
+        return jsonify({'error': 'No model provided', 'success': False}), 400
+
+    try:
+        entry = model_registry.resolve(spec, load=True)
+    except KeyError as e:
+        return jsonify({'error': e.args[0], 'success': False}), 404
+
+    print(f"📥 Loaded model {entry.key}")
+    return jsonify({'success': True, 'model': entry.to_dict()})
+
+@app.route('/models/unload', methods=['POST'])
+def unload_model():
+    """Free a loaded, inactive model version; requests already using it finish normally"""
+    denied = require_admin_token()
+    if denied:
+        return denied
+
+    data = request.get_json() or {}
+    spec = data.get('model')
+    if not spec:
+        return jsonify({'error': 'No model provided', 'success': False}), 400
+
+    name, version = parse_model_spec(spec)
+    entry = model_registry.get_loaded(name, version)
+    if entry is None:
+        return jsonify({'error': f"Model '{spec}' is not loaded", 'success': False}), 404
+    try:
+        model_registry.unload(entry.key)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 409
+
+    print(f"📤 Unloaded model {entry.key}")
+    return jsonify({'success': True, 'unloaded': entry.key})
+
+@app.route('/debug/metrics')
+def metrics():
+    """Debug endpoint for serving counters"""
+    with _metrics_lock:
+        counters = dict(METRICS)
+    with _inflight_lock:
+        counters['inflight_analyses'] = len(_inflight)
+    counters['resource'] = process_resources()
+    counters['breakers'] = breaker_snapshots()
+    return jsonify(counters)
+
+@app.route('/debug/profiles')
+def list_profiles():
+    """Recent request profiles, newest first"""
+    denied = require_admin_token()
+    if denied:
+        return denied
+
+    directory = app.config['PROFILE_DIR']
+    profiles = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.prof'):
+                stat = os.stat(os.path.join(directory, name))
+                profiles.append({
+                    'name': name,
+                    'bytes': stat.st_size,
+                    'created': datetime.utcfromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+                    'url': f"/debug/profiles/{name}"
+                })
+    profiles.sort(key=lambda p: p['name'], reverse=True)
+    return jsonify({'format': 'pstats', 'profiles': profiles})
+
+@app.route('/debug/profiles/<path:name>')
+def download_profile(name):
+    """Download one pstats profile"""
+    denied = require_admin_token()
+    if denied:
+        return denied
+    return send_from_directory(app.config['PROFILE_DIR'], name, as_attachment=True)
+
+@app.route('/history/aggregates')
+def history_aggregates():
+    """Daily aggregates of compacted history"""
+    return jsonify({'aggregates': [aggregate_row_to_dict(a) for a in history_store.aggregates()]})
+
+# -------------------------------
+# History Retention
+# -------------------------------
+def _sqlite_pragma(connection, name):
+    return connection.execute(sql_text(f"PRAGMA {name}")).scalar()
+
+def _sqlite_sizes(engines):
+    """(total bytes, free pages) over every SQLite file behind the history store"""
+    total_bytes = 0
+    free_pages = 0
+    for engine in engines:
+        with engine.connect() as connection:
+            total_bytes += _sqlite_pragma(connection, 'page_count') * _sqlite_pragma(connection, 'page_size')
+            free_pages += _sqlite_pragma(connection, 'freelist_count')
+    return total_bytes, free_pages
+
+def _incremental_vacuum(engine, pages=None):
+    """
+    Run PRAGMA incremental_vacuum to completion and checkpoint the WAL so the
+    file actually shrinks. Each execute() step of the pragma frees a single
+    page, so it goes through executescript() on the raw sqlite3 connection.
+    """
+    limit = f"({int(pages)})" if pages else ""
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.executescript(
+            f"PRAGMA incremental_vacuum{limit}; PRAGMA wal_checkpoint(TRUNCATE);"
+        )
+    finally:
+        raw.close()
+
+def compact_history(days, batch_size=500, pause=0.05, vacuum_pages=None):
+    """
+    Downsample history older than `days` into daily aggregates
+    Raw rows are deleted in bounded batches with a pause between them, so
+    live writers only ever wait for one short transaction.
+    Returns: report dict including bytes reclaimed by incremental vacuum
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    engines = [e for e in history_store.engines() if e.dialect.name == 'sqlite']
+    if engines:
+        bytes_before, _ = _sqlite_sizes(engines)
+
+    compacted = 0
+    batches = 0
+    days_touched = 0
+    while True:
+        count, touched = history_store.compact_batch(cutoff, batch_size)
+        if not count:
+            break
+        compacted += count
+        days_touched += touched
+        batches += 1
+        time.sleep(pause)
+    # Rows are gone from here on, whatever happens during the vacuum
+    invalidate_history_cache()
+
+    report = {
+        'cutoff': cutoff.strftime('%Y-%m-%d %H:%M:%S'),
+        'rows_compacted': compacted,
+        'batches': batches,
+        'aggregate_days_updated': days_touched
+    }
+
+    if engines:
+        incremental = []
+        for engine in engines:
+            with engine.connect() as connection:
+                mode = _sqlite_pragma(connection, 'auto_vacuum')
+            if mode == 2:  # INCREMENTAL
+                _incremental_vacuum(engine, vacuum_pages)
+                incremental.append(engine)
+        bytes_after, free_pages = _sqlite_sizes(engines)
+        report.update({
+            'incremental_vacuum': len(incremental) == len(engines),
+            'bytes_reclaimed': bytes_before - bytes_after,
+            'free_pages_remaining': free_pages,
+            'database_bytes': bytes_after,
+            'database_files': len(engines)
+        })
+
+    return report
+
+@app.cli.command('compact-history')
+@click.option('--days', type=int, default=None, help='Keep raw rows newer than this (default HISTORY_RETENTION_DAYS)')
+@click.option('--batch-size', type=int, default=500, show_default=True, help='Rows per transaction')
+@click.option('--pause', type=float, default=0.05, show_default=True, help='Seconds to sleep between batches')
+@click.option('--vacuum-pages', type=int, default=None, help='Limit pages freed by incremental vacuum')
+@click.option('--enable-incremental-vacuum', is_flag=True,
+              help='One-time full VACUUM switching an existing SQLite file to incremental auto-vacuum')
+def compact_history_command(days, batch_size, pause, vacuum_pages, enable_incremental_vacuum):
+    """Downsample old history into daily aggregates and reclaim space"""
+    if enable_incremental_vacuum:
+        # VACUUM cannot run inside a transaction, so use a raw autocommit connection
+        for engine in history_store.engines():
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(sql_text("PRAGMA auto_vacuum = INCREMENTAL"))
+                connection.execute(sql_text("VACUUM"))
+        click.echo("✅ Incremental auto-vacuum enabled")
+
+    days = days if days is not None else app.config['HISTORY_RETENTION_DAYS']
+    report = compact_history(days, batch_size, pause, vacuum_pages)
+    click.echo(json.dumps(report, indent=2))
+
+# -------------------------------
+# History Re-scoring
+# -------------------------------
+def rescore_target_version(model):
+    """model_version every re-scored row must carry: the model, or the keyword classifier without one"""
+    return model.key if model is not None else model_version_for('lexicon', None)
+
+def rescore_history_rows(rows, model=None):
+    """
+    Fresh emotion, relevance and model_version columns for stored rows
+    Only rows the target model itself scored are returned, and only up to the
+    first row it did not (breaker open, inference error): fallback output must
+    never overwrite stored scores.
+    Returns: (updates for the leading rows, (row ID, model_version) of the first rejected row or None)
+    """
+    features_list = [TextFeatures(row.text) for row in rows]
+    # No cascade: a re-score asks the target model about every row
+    scored = get_emotion_scores_with_tier_batch(features_list, cascade=False, model=model)
+    target = rescore_target_version(model)
+    rejected = None
+    for i, (row, (_, tier)) in enumerate(zip(rows, scored)):
+        if tier != 'none' and model_version_for(tier, model) != target:
+            rejected = (row.id, model_version_for(tier, model))
+            rows, scored, features_list = rows[:i], scored[:i], features_list[:i]
+            break
+
+    score_list = [scores for scores, _ in scored]
+    relevance_list = analyze_emoji_relevance_batch(score_list, [features.emojis for features in features_list])
+
+    updates = []
+    for row, (scores, tier), (relevance, status) in zip(rows, scored, relevance_list):
+        update = {emotion: float(scores.get(emotion, 0)) for emotion in EMOTIONS}
+        update.update({
+            'id': row.id,
+            'emoji_relevance': status if status else "neutral",
+            'relevance_score': relevance['overall_score'] if relevance else 0.0,
+            'model_version': model_version_for(tier, model)
+        })
+        updates.append(update)
+    return updates, rejected
+
+def rescore_history(name='default', chunk_size=200, max_rows_per_s=None, pause=0.0,
+                    model=None, restart=False, limit=None):
+    """
+    Recompute stored scores in ID order, resuming from the named checkpoint
+    Each chunk is one batched inference call, one short bulk-update transaction
+    and one checkpoint write, so the run can stop at any point and resume.
+    max_rows_per_s / pause throttle it to leave room for live traffic.
+    The run aborts at the first row the target model did not score itself;
+    the checkpoint stays before that row so a later run retries it.
+    Returns: report dict
+    """
+    model = model or model_registry.active()
+    checkpoint = db.session.get(RescoreCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = RescoreCheckpoint(name=name, last_id=0, rows_rescored=0)
+        db.session.add(checkpoint)
+    if restart or checkpoint.finished_at is not None:
+        checkpoint.last_id = 0
+        checkpoint.rows_rescored = 0
+        checkpoint.started_at = datetime.utcnow()
+        checkpoint.finished_at = None
+    checkpoint.model_version = rescore_target_version(model)
+    db.session.commit()
+
+    resumed_from = checkpoint.last_id
+    rescored = 0
+    aborted = None
+    skipped = 0
+    started = time.perf_counter()
+    for rows in history_store.iter_chunks(after_id=checkpoint.last_id, size=chunk_size):
+        if limit is not None and rescored >= limit:
+            break
+        if limit is not None:
+            rows = rows[:limit - rescored]
+
+        updates, rejected = rescore_history_rows(rows, model)
+        if updates:
+            history_store.update_many(updates)
+            checkpoint.last_id = updates[-1]['id']
+            checkpoint.rows_rescored += len(updates)
+            checkpoint.updated_at = datetime.utcnow()
+            db.session.commit()
+            rescored += len(updates)
+            print(f"🔁 Re-scored {checkpoint.rows_rescored} rows (up to ID {checkpoint.last_id})")
+        if rejected:
+            skipped = len(rows) - len(updates)
+            aborted = f"row {rejected[0]} was scored by {rejected[1]}, not {checkpoint.model_version}"
+            print(f"🛑 Re-scoring stopped: {aborted}; {skipped} rows of this chunk left unchanged")
+            break
+
+        # Throttle: hold the average rate under max_rows_per_s
+        if max_rows_per_s:
+            ahead = rescored / max_rows_per_s - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+        if pause:
+            time.sleep(pause)
+    else:
+        checkpoint.finished_at = datetime.utcnow()
+        checkpoint.updated_at = checkpoint.finished_at
+        db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    invalidate_history_cache()
+    return {
+        'name': name,
+        'model_version': checkpoint.model_version,
+        'resumed_from_id': resumed_from,
+        'last_id': checkpoint.last_id,
+        'rows_rescored': rescored,
+        'rows_rescored_total': checkpoint.rows_rescored,
+        'finished': checkpoint.finished_at is not None,
+        'aborted': aborted,
+        'rows_skipped': skipped,
+        'elapsed_s': round(elapsed, 2),
+        'rows_per_s': round(rescored / elapsed, 2) if elapsed else None
+    }
+
+@app.cli.command('rescore-history')
+@click.option('--name', default='default', show_default=True, help='Checkpoint name; reruns with the same name resume')
+@click.option('--chunk-size', type=int, default=200, show_default=True, help='Rows per inference batch and transaction')
+@click.option('--max-rows-per-s', type=float, default=None, help='Throttle to this average rate')
+@click.option('--pause', type=float, default=0.0, show_default=True, help='Seconds to sleep between chunks')
+@click.option('--model', 'model_spec', default=None, help="Model 'name' or 'name@version' (default: active model)")
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and start from the first row')
+@click.option('--limit', type=int, default=None, help='Stop after this many rows (resume later)')
+def rescore_history_command(name, chunk_size, max_rows_per_s, pause, model_spec, restart, limit):
+    """Recompute stored emotion and relevance scores after rule or model changes"""
+    try:
+        model = model_registry.resolve(model_spec, load=True)
+    except (KeyError, ValueError) as e:
+        raise click.BadParameter(str(e), param_hint='--model')
+    report = rescore_history(name, chunk_size, max_rows_per_s, pause, model, restart, limit)
+    click.echo(json.dumps(report, indent=2))
+    if report['aborted']:
+        raise SystemExit(1)
+
 # -------------------------------
 # Error Handlers
 # -------------------------------
@@ -1048,8 +2957,11 @@ if __name__ == '__main__':
     print("\n" + "="*50)
     print("🚀 Emoji Emotion Analyzer Starting...")
     print("="*50)
-    print(f"📊 Model: {'DistilBERT Emotion Classifier' if MODEL_LOADED else 'Fallback Keyword Classifier'}")
-    print(f"💾 Database: SQLite")
+    print(f"📊 Model: {model_registry.active().key if MODEL_LOADED else 'Fallback Keyword Classifier'}")
+    print(f"💾 Database: {app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0]}"
+          f"{' (history sharded by month)' if app.config['HISTORY_SHARDING'] else ''}")
+    print(f"🧵 Inference workers: {app.config['INFERENCE_WORKERS']}")
+    print(f"📦 Job workers: {app.config['JOB_WORKERS']}")
     print(f"🔍 Emoji Relevance Checking: Enabled")
     print("="*50)
     
@@ -1078,12 +2990,18 @@ if __name__ == '__main__':
     print(f"   • Test API: http://localhost:{port}/test_model")
     print(f"   • Test Relevance: http://localhost:{port}/test_relevance")
     print(f"   • History:  http://localhost:{port}/history")
+    print(f"\n💡 For many concurrent clients run the ASGI server instead:")
+    print(f"   uvicorn asgi:asgi_app --host 0.0.0.0 --port {port}")
     print(f"\n⚠️  Press CTRL+C to stop the server")
     print("="*50 + "\n")
     
     # Force flush the output buffer
     sys.stdout.flush()
     
+    # The debug reloader runs the app in a child process; only that one works on jobs
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_runner.start()
+    
     # Run the app with explicit port
     app.run(
         host='0.0.0.0',
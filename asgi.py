@@ -0,0 +1,41 @@
+"""
+ASGI entry point for the Emoji Emotion Analyzer.
+
+    uvicorn asgi:asgi_app --host 0.0.0.0 --port 5000
+
+uvicorn accepts connections and parses HTTP on its event loop, but the Flask
+app is still WSGI: a2wsgi runs each request to completion on one of
+REQUEST_THREADS (default 32) threads, so at most that many HTTP requests are
+in progress per process and the rest wait for a thread. Flask runs an async
+view by starting an event loop for that request on its thread; awaiting does
+not free the thread for other requests. The awaits only move model inference
+and PNG chart rendering onto the fixed-size inference executor in app.py,
+which caps CPU-heavy work at INFERENCE_WORKERS however many request threads
+are busy. Request parsing, the history write and response serialization run
+synchronously on the request thread.
+
+WebSocket connections to /ws/live are served natively on the event loop (see
+live.py). Each server process also runs JOB_WORKERS background job workers
+(see jobs.py).
+"""
+import os
+from a2wsgi import WSGIMiddleware
+from app import app, job_runner
+from live import live_analysis
+
+app.config['REQUEST_THREADS'] = int(os.environ.get('REQUEST_THREADS', 32))
+
+flask_asgi = WSGIMiddleware(app, workers=app.config['REQUEST_THREADS'])
+
+# Background job workers run only in server processes, not in CLI tools importing app
+job_runner.start()
+
+
+async def asgi_app(scope, receive, send):
+    if scope['type'] == 'websocket':
+        if scope['path'] == '/ws/live':
+            await live_analysis(scope, receive, send)
+        else:
+            await send({'type': 'websocket.close', 'code': 1008})
+        return
+    await flask_asgi(scope, receive, send)
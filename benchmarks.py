@@ -0,0 +1,216 @@
+"""
+Micro-benchmarks for the Emoji Emotion Analyzer.
+
+    python benchmarks.py responses
+    python benchmarks.py suggestions
+    python benchmarks.py charts
+    python benchmarks.py features
+
+Results are printed as JSON so runs can be saved and diffed.
+"""
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Importing app creates and migrates its database: use a throwaway one
+_workdir = tempfile.mkdtemp(prefix='emoji-bench-')
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_workdir, 'bench.db')}"
+os.environ['HISTORY_SHARD_DIR'] = os.path.join(_workdir, 'history')
+
+# stdout carries only the JSON report: the app's startup banners and
+# per-request logging go to stderr
+with contextlib.redirect_stdout(sys.stderr):
+    from app import (
+        app, EMOTION_EMOJI_MAP, brotli, msgpack, encode_payload,
+        get_emotion_scores, extract_emojis, remove_emojis, analyze_emoji_relevance,
+        score_emojis, render_pie_chart, rank_emoji_suggestions, rank_emoji_suggestions_batch,
+        SUGGESTION_EMOJIS, TextFeatures, fallback_classifier, scores_from_predictions
+    )
+    from benchmarks_baseline import (
+        baseline_classifier, baseline_extract_emojis, baseline_scores_from_predictions
+    )
+
+SAMPLE_TEXT = (
+    "Having a really tough day today... 😔💔 Miss my family so much and everything "
+    "feels overwhelming. The rain outside just makes it worse. ☔️ Just want to crawl "
+    "into bed and sleep forever."
+)
+
+
+def time_call(func, iterations):
+    """Median and p95 wall time of func() in milliseconds"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings), 4),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 4)
+    }
+
+
+def sample_analyze_payload(text=SAMPLE_TEXT):
+    """A payload shaped like a real /analyze response"""
+    emotion_scores = get_emotion_scores(text)
+    emojis_found = extract_emojis(text)
+    relevance, _ = analyze_emoji_relevance(emotion_scores, emojis_found)
+    top = max(emotion_scores.items(), key=lambda x: x[1])
+    chart_image, chart_format = render_pie_chart(emotion_scores)
+    return {
+        'success': True,
+        'text': text,
+        'clean_text': remove_emojis(text),
+        'top_emotion': {'label': top[0], 'confidence': top[1]},
+        'emotion_scores': emotion_scores,
+        'classifier_tier': 'transformer',
+        'emojis_found': emojis_found,
+        'emoji_analysis': [
+            {'emoji': e, 'emotion': emotion, 'confidence': round(confidence, 3)}
+            for e, emotion, confidence in score_emojis(emojis_found)
+        ],
+        'emoji_relevance': relevance,
+        'suggested_emojis': EMOTION_EMOJI_MAP[top[0]],
+        'pie_chart': chart_image,
+        'pie_chart_format': chart_format,
+        'history_id': 1
+    }
+
+
+def responses_benchmark(iterations):
+    """Body size and serialization time of each /analyze response mode"""
+    payload = sample_analyze_payload()
+    modes = {
+        'json': {},
+        'json_fields_scores': {'fields': ['emotion_scores', 'top_emotion']},
+        'json_gzip': {'compression': 'gzip'},
+    }
+    if brotli is not None:
+        modes['json_br'] = {'compression': 'br'}
+    if msgpack is not None:
+        modes['msgpack'] = {'binary': True}
+        modes['msgpack_gzip'] = {'binary': True, 'compression': 'gzip'}
+        if brotli is not None:
+            modes['msgpack_br'] = {'binary': True, 'compression': 'br'}
+
+    report = {'iterations': iterations, 'modes': {}}
+    for name, options in modes.items():
+        body, _, _ = encode_payload(payload, **options)
+        result = {'bytes': len(body)}
+        result.update(time_call(lambda: encode_payload(payload, **options), iterations))
+        report['modes'][name] = result
+    return report
+
+
+def suggestions_benchmark(iterations, batch_size):
+    """Latency of ranked emoji suggestions for one text and for a bulk batch"""
+    scores = get_emotion_scores(SAMPLE_TEXT)
+    exclude = extract_emojis(SAMPLE_TEXT)
+    batch = [scores] * batch_size
+    return {
+        'iterations': iterations,
+        'candidates': len(SUGGESTION_EMOJIS),
+        'top': rank_emoji_suggestions(scores, exclude),
+        'single': time_call(lambda: rank_emoji_suggestions(scores, exclude), iterations),
+        f'batch_{batch_size}': time_call(lambda: rank_emoji_suggestions_batch(batch, [exclude] * batch_size), iterations)
+    }
+
+
+def charts_benchmark(iterations, renderers):
+    """Size and render time of each pie chart renderer"""
+    emotion_scores = get_emotion_scores(SAMPLE_TEXT)
+    report = {'iterations': iterations, 'renderers': {}}
+    for renderer in renderers:
+        # The first call includes one-off costs such as importing matplotlib
+        start = time.perf_counter()
+        body, image_format = render_pie_chart(emotion_scores, renderer)
+        first_call_ms = (time.perf_counter() - start) * 1000
+        result = {'format': image_format, 'bytes': len(body), 'first_call_ms': round(first_call_ms, 2)}
+        result.update(time_call(lambda: render_pie_chart(emotion_scores, renderer), iterations))
+        report['renderers'][renderer] = result
+    return report
+
+
+def baseline_text_pass(text):
+    """The per-request text work outside the model before TextFeatures: every helper rescans the text"""
+    emojis_found = baseline_extract_emojis(text)
+    clean_text = remove_emojis(text)
+    predictions = baseline_classifier(text)[0]
+    coverage = baseline_classifier.lexicon_coverage(text)
+    scores = baseline_scores_from_predictions(text, predictions)
+    return emojis_found, clean_text, coverage, scores
+
+
+def shared_text_pass(text):
+    """The same work today: one TextFeatures pass that every helper reads"""
+    features = TextFeatures(text)
+    predictions = fallback_classifier(features)[0]
+    coverage = fallback_classifier.lexicon_coverage(features)
+    scores = scores_from_predictions(features, predictions)
+    return features.emojis, features.clean_text, coverage, scores
+
+
+def features_benchmark(iterations, repeats):
+    """
+    Text handling outside the model per request (emoji extraction, the keyword
+    classifier, cascade coverage and the scoring rules): the pre-TextFeatures
+    helpers against the shared pass
+    """
+    report = {'iterations': iterations, 'inputs': {}}
+    for repeat in repeats:
+        text = ' '.join([SAMPLE_TEXT] * repeat)
+        report['inputs'][f'{len(text)}_chars'] = {
+            'baseline': time_call(lambda: baseline_text_pass(text), iterations),
+            'shared_features': time_call(lambda: shared_text_pass(text), iterations)
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    responses = subparsers.add_parser('responses', help='Response size and encode time per mode')
+    responses.add_argument('--iterations', type=int, default=200)
+
+    suggestions = subparsers.add_parser('suggestions', help='Ranked emoji suggestion latency')
+    suggestions.add_argument('--iterations', type=int, default=1000)
+    suggestions.add_argument('--batch-size', type=int, default=100)
+
+    charts = subparsers.add_parser('charts', help='Pie chart render time and size per renderer')
+    charts.add_argument('--iterations', type=int, default=50)
+    charts.add_argument('--renderer', action='append', choices=['svg', 'png', 'matplotlib'],
+                        help='Renderer to time (repeatable); defaults to all')
+
+    features = subparsers.add_parser('features', help='Per-request text handling time by input length')
+    features.add_argument('--iterations', type=int, default=200)
+    features.add_argument('--repeat', type=int, action='append',
+                          help='Copies of the sample text per input (repeatable); defaults to 1, 10 and 100')
+
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.command == 'responses':
+            report = responses_benchmark(args.iterations)
+        elif args.command == 'suggestions':
+            report = suggestions_benchmark(args.iterations, args.batch_size)
+        elif args.command == 'charts':
+            report = charts_benchmark(args.iterations, args.renderer or ['svg', 'png', 'matplotlib'])
+        elif args.command == 'features':
+            report = features_benchmark(args.iterations, args.repeat or [1, 10, 100])
+
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+The per-text helpers as they were before TextFeatures, for `benchmarks.py features`.
+
+Copied verbatim from app.py at the commit before the shared feature pass, with
+only the names changed; nothing in the app imports this module.
+"""
+import re
+
+import emoji
+
+from app import EMOTIONS, FallbackClassifier, remove_emojis
+
+
+class BaselineFallbackClassifier(FallbackClassifier):
+    """FallbackClassifier with every method that now reads TextFeatures restored"""
+
+    def __call__(self, text):
+        # Enhanced emotion detection with context awareness
+        emotions = {
+            'joy': self._detect_joy(text),
+            'sadness': self._detect_sadness(text),
+            'anger': self._detect_anger(text),
+            'fear': self._detect_fear(text),
+            'surprise': self._detect_surprise(text),
+            'love': self._detect_love(text),
+            'neutral': self._detect_neutral(text)
+        }
+        
+        # Check for contradictory patterns
+        self._handle_contradictions(text, emotions)
+        
+        # Apply emoji boost
+        self._apply_emoji_boost(text, emotions)
+        
+        # Special handling for sadness patterns
+        self._handle_special_patterns(text, emotions)
+        
+        # Normalize scores
+        scores_sum = sum(emotions.values())
+        if scores_sum > 0:
+            normalized = {k: v/scores_sum for k, v in emotions.items()}
+        else:
+            normalized = {k: 0.0 for k in emotions.keys()}
+            normalized['neutral'] = 1.0
+        
+        # Create response structure
+        return [[
+            {"label": "joy", "score": normalized['joy']},
+            {"label": "sadness", "score": normalized['sadness']},
+            {"label": "anger", "score": normalized['anger']},
+            {"label": "fear", "score": normalized['fear']},
+            {"label": "surprise", "score": normalized['surprise']},
+            {"label": "love", "score": normalized['love']},
+            {"label": "neutral", "score": normalized['neutral']}
+        ]]
+    
+    def lexicon_coverage(self, text):
+        """Fraction of word and emoji tokens that hit one of the lexicons"""
+        words = re.findall(r"[a-z']+", text.lower())
+        emojis = [c for c in text if c in emoji.EMOJI_DATA]
+        total = len(words) + len(emojis)
+        if total == 0:
+            return 0.0
+        hits = sum(1 for word in words if word in self._lexicon)
+        hits += sum(1 for e in emojis if e in self.EMOJI_EMOTION_MAP or e + '\ufe0f' in self.EMOJI_EMOTION_MAP)
+        return hits / total
+
+    def _detect_joy(self, text):
+        text_lower = text.lower()
+        
+        # Negative context check
+        if any(f"not {word}" in text_lower for word in ['happy', 'good', 'great']) or \
+           'not feeling' in text_lower or 'not very' in text_lower:
+            return 0.1
+        
+        score = sum(weight for word, weight in self.JOY_WORDS.items() if word in text_lower)
+        return min(score * 2, 0.9)
+    
+    def _detect_sadness(self, text):
+        text_lower = text.lower()
+        
+        # Special phrases that indicate sadness
+        sadness_phrases = [
+            'miss my', 'feel lonely', 'feel empty', 'nothing matters',
+            'want to sleep', 'crawl into bed', 'feels overwhelming',
+            'makes it worse', 'can\'t handle', 'too much', 'give up',
+            'don\'t care', 'lost interest', 'tired of'
+        ]
+        
+        score = sum(weight for word, weight in self.SADNESS_WORDS.items() if word in text_lower)
+        
+        # Add phrase detection
+        for phrase in sadness_phrases:
+            if phrase in text_lower:
+                score += 0.3
+        
+        # Weather-related sadness
+        if any(word in text_lower for word in ['rain', 'storm', 'cloud', 'grey', 'gray']):
+            score += 0.2
+        
+        return min(score * 1.5, 0.95)
+    
+    def _detect_anger(self, text):
+        text_lower = text.lower()
+        
+        # Check for exclamation marks
+        exclamation_count = text.count('!')
+        if exclamation_count > 2:
+            anger_boost = min(exclamation_count * 0.1, 0.3)
+        else:
+            anger_boost = 0
+        
+        score = sum(weight for word, weight in self.ANGER_WORDS.items() if word in text_lower)
+        return min(score + anger_boost, 0.9)
+    
+    def _detect_fear(self, text):
+        text_lower = text.lower()
+        
+        score = sum(weight for word, weight in self.FEAR_WORDS.items() if word in text_lower)
+        
+        # Check for uncertainty phrases
+        if any(word in text_lower for word in ['what if', 'maybe', 'perhaps', 'might', 'could']):
+            score += 0.2
+        
+        return min(score, 0.9)
+    
+    def _detect_surprise(self, text):
+        text_lower = text.lower()
+        
+        score = sum(weight for word, weight in self.SURPRISE_WORDS.items() if word in text_lower)
+        
+        # Check for question marks
+        question_count = text.count('?')
+        if question_count > 0:
+            score += min(question_count * 0.1, 0.3)
+        
+        return min(score, 0.9)
+    
+    def _detect_love(self, text):
+        text_lower = text.lower()
+        
+        score = sum(weight for word, weight in self.LOVE_WORDS.items() if word in text_lower)
+        return min(score, 0.9)
+    
+    def _detect_neutral(self, text):
+        if len(text) < 10:
+            return 0.8
+        
+        # Check for factual/neutral language
+        neutral_indicators = [
+            'the', 'and', 'is', 'was', 'are', 'were', 'has', 'have',
+            'said', 'says', 'according', 'report', 'data', 'information',
+            'fact', 'statistic', 'number', 'percentage'
+        ]
+        
+        text_words = text.lower().split()
+        neutral_words = sum(1 for word in text_words if word in neutral_indicators)
+        neutral_score = min(neutral_words * 0.05, 0.5)
+        
+        return neutral_score
+    
+    def _handle_contradictions(self, text, emotions):
+        """Handle contradictory emotional statements"""
+        text_lower = text.lower()
+        
+        # Check for negated emotions
+        if 'not sad' in text_lower or 'not unhappy' in text_lower:
+            emotions['sadness'] *= 0.3
+        
+        if 'not happy' in text_lower or 'not excited' in text_lower:
+            emotions['joy'] *= 0.3
+        
+        # Mixed feelings
+        mixed_patterns = [
+            ('but', 0.5),
+            ('however', 0.5),
+            ('although', 0.5),
+            ('even though', 0.6),
+            ('despite', 0.6)
+        ]
+        
+        for pattern, reduction in mixed_patterns:
+            if pattern in text_lower:
+                for emotion in emotions:
+                    emotions[emotion] *= (1 - reduction)
+                break
+    
+    def _apply_emoji_boost(self, text, emotions):
+        """Apply emoji-based emotion detection boost"""
+        
+        for emoji_char, (emotion, boost) in self.EMOJI_EMOTION_MAP.items():
+            if emoji_char in text:
+                emotions[emotion] += boost
+                # Reduce other emotions when strong emoji is present
+                for other_emotion in emotions:
+                    if other_emotion != emotion:
+                        emotions[other_emotion] *= 0.8
+    
+    def _handle_special_patterns(self, text, emotions):
+        """Handle special patterns like sadness-indicating text"""
+        text_lower = text.lower()
+        
+        # Specific sadness patterns
+        if 'miss my family' in text_lower or 'missing my family' in text_lower:
+            emotions['sadness'] = max(emotions.get('sadness', 0), 0.7)
+            emotions['joy'] = max(emotions.get('joy', 0) * 0.3, 0.05)
+        
+        if 'overwhelming' in text_lower or 'too much' in text_lower:
+            emotions['sadness'] = min(emotions.get('sadness', 0) + 0.2, 0.9)
+            emotions['fear'] = min(emotions.get('fear', 0) + 0.1, 0.8)
+        
+        if 'tough day' in text_lower or 'hard day' in text_lower:
+            emotions['sadness'] = min(emotions.get('sadness', 0) + 0.3, 0.9)
+        
+        if 'sleep forever' in text_lower or 'crawl into bed' in text_lower:
+            emotions['sadness'] = min(emotions.get('sadness', 0) + 0.4, 0.95)
+            emotions['joy'] = max(emotions.get('joy', 0) * 0.2, 0.05)
+
+
+baseline_classifier = BaselineFallbackClassifier()
+
+
+def baseline_extract_emojis(text):
+    """Extract emojis from text"""
+    return [c for c in text if c in emoji.EMOJI_DATA]
+
+
+def baseline_is_sadness_dominant(text):
+    """Check if text is likely expressing sadness"""
+    text_lower = text.lower()
+    
+    # Strong sadness indicators
+    strong_sadness_words = ['sad', 'depressed', 'heartbroken', 'grief', 'sorrow', 
+                           'miserable', 'despair', 'hopeless', 'overwhelmed']
+    
+    # Phrases indicating sadness
+    sadness_phrases = ['miss my', 'feel alone', 'want to die', 'can\'t stop crying',
+                      'feel empty', 'nothing matters', 'too much to handle']
+    
+    # Sadness emojis
+    sadness_emojis = ['😔', '😢', '😭', '💔', '☹️']
+    
+    # Count indicators
+    score = 0
+    score += sum(1 for word in strong_sadness_words if word in text_lower) * 3
+    score += sum(1 for phrase in sadness_phrases if phrase in text_lower) * 2
+    score += sum(1 for emoji in sadness_emojis if emoji in text) * 2
+    
+    return score >= 3
+
+def baseline_boost_sadness_scores(text, scores):
+    """Boost sadness scores when text indicates sadness"""
+    text_lower = text.lower()
+    
+    # Reduce joy score significantly when sadness is detected
+    if scores.get('joy', 0) > scores.get('sadness', 0):
+        scores['joy'] *= 0.3
+        scores['sadness'] *= 1.5
+    
+    # Ensure sadness is prominent if indicators are strong
+    sadness_indicators = ['miss', 'overwhelmed', 'alone', 'tough', 'hard']
+    if any(indicator in text_lower for indicator in sadness_indicators):
+        scores['sadness'] = max(scores.get('sadness', 0), 0.4)
+
+
+def baseline_scores_from_predictions(text, predictions):
+    """Turn raw classifier output into final scores: custom rules, normalized, rounded"""
+    # Convert to dictionary
+    scores = {}
+    for pred in predictions:
+        scores[pred["label"]] = float(pred["score"])
+    
+    # Ensure all emotions are present
+    for emotion in EMOTIONS:
+        if emotion not in scores:
+            scores[emotion] = 0.0
+    
+    # Apply custom rules for better accuracy
+    if baseline_is_sadness_dominant(text):
+        baseline_boost_sadness_scores(text, scores)
+    
+    # Special handling for your specific text
+    text_lower = text.lower()
+    if 'tough day' in text_lower and 'miss my family' in text_lower:
+        scores['sadness'] = max(scores.get('sadness', 0), 0.7)
+        scores['joy'] = max(scores.get('joy', 0) * 0.2, 0.05)
+    
+    # Normalize scores to sum to 1
+    total = sum(scores.values())
+    if total > 0:
+        scores = {k: v/total for k, v in scores.items()}
+    
+    # Round scores for better display
+    return {k: round(v, 3) for k, v in scores.items()}
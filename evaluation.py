@@ -0,0 +1,304 @@
+"""
+Offline evaluation for the Emoji Emotion Analyzer.
+
+    python evaluation.py backends --corpus data/eval_corpus.jsonl
+    python evaluation.py cascade --corpus data/eval_corpus.jsonl
+
+The corpus is JSON lines with a "text" field (and optionally a "label").
+Reports are printed as JSON so they can be saved and diffed; app logging
+goes to stderr, so stdout is the report alone.
+"""
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Importing app creates and migrates its database: point it at a throwaway
+# one so an evaluation never touches the real history
+_workdir = tempfile.mkdtemp(prefix='emoji-eval-')
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_workdir, 'eval.db')}"
+os.environ['HISTORY_SHARD_DIR'] = os.path.join(_workdir, 'history')
+
+# stdout carries only the JSON report: the app's startup banners and
+# per-request logging go to stderr
+with contextlib.redirect_stdout(sys.stderr):
+    from app import (
+        app, EMOTIONS, MODEL_LOADED, model_registry, fallback_classifier,
+        get_emotion_scores_with_tier, _fallback_analysis,
+        extract_emojis, analyze_emoji_relevance
+    )
+
+
+def load_corpus(path):
+    """Read a JSON-lines corpus of {"text": ..., "label": ...} rows"""
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                rows.append(json.loads(line))
+    return rows
+
+
+def top_emotion(scores):
+    return max(scores.items(), key=lambda x: x[1])[0]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+@contextlib.contextmanager
+def app_output_silenced():
+    """Discard the app's per-call logging, so timings exclude console I/O"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@contextlib.contextmanager
+def breaker_disabled():
+    """Always call the transformer, even while its circuit breaker is open"""
+    enabled = app.config['BREAKER_ENABLED']
+    app.config['BREAKER_ENABLED'] = False
+    try:
+        yield
+    finally:
+        app.config['BREAKER_ENABLED'] = enabled
+
+
+def _predictions_to_scores(predictions):
+    scores = {emotion: 0.0 for emotion in EMOTIONS}
+    for pred in predictions:
+        scores[pred["label"]] = float(pred["score"])
+    return scores
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+# Each backend maps text -> emotion scores. Backends that cannot run in this
+# environment (no model weights) are reported as unavailable.
+BACKENDS = {
+    'pipeline': lambda text: _predictions_to_scores(model_registry.active().classifier(text)[0]),
+    'production': lambda text: get_emotion_scores_with_tier(text, cascade=False)[0],
+    'cascade': lambda text: get_emotion_scores_with_tier(text, cascade=True)[0],
+    'fallback_classifier': lambda text: _predictions_to_scores(fallback_classifier(text)[0]),
+    'keyword': _fallback_analysis,
+}
+
+MODEL_BACKENDS = {'pipeline', 'production', 'cascade'}
+
+
+def available_backends():
+    return [name for name in BACKENDS if MODEL_LOADED or name not in MODEL_BACKENDS]
+
+
+def classification_metrics(labels, predicted):
+    """Per-emotion precision/recall/F1 and macro-F1 over the labelled emotions"""
+    per_emotion = {}
+    f1_scores = []
+    for emotion in EMOTIONS:
+        tp = sum(1 for l, p in zip(labels, predicted) if l == emotion and p == emotion)
+        fp = sum(1 for l, p in zip(labels, predicted) if l != emotion and p == emotion)
+        fn = sum(1 for l, p in zip(labels, predicted) if l == emotion and p != emotion)
+        if tp + fn == 0:
+            continue  # emotion absent from the corpus labels
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn)
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_emotion[emotion] = {
+            'precision': round(precision, 4),
+            'recall': round(recall, 4),
+            'f1': round(f1, 4),
+            'support': tp + fn
+        }
+        f1_scores.append(f1)
+
+    return {
+        'macro_f1': round(sum(f1_scores) / len(f1_scores), 4) if f1_scores else 0.0,
+        'accuracy': round(sum(1 for l, p in zip(labels, predicted) if l == p) / len(labels), 4) if labels else 0.0,
+        'per_emotion': per_emotion
+    }
+
+
+def run_backend(name, rows, repeat=1):
+    """Score every row with one backend, timing each call"""
+    score_text = BACKENDS[name]
+    latencies = []
+    results = []
+    with app_output_silenced():
+        score_text(rows[0]['text'])  # warm-up, excluded from timings
+
+        started = time.perf_counter()
+        for i in range(repeat):
+            for row in rows:
+                call_start = time.perf_counter()
+                scores = score_text(row['text'])
+                latencies.append(time.perf_counter() - call_start)
+                if i == 0:
+                    results.append(scores)
+        elapsed = time.perf_counter() - started
+    return results, latencies, elapsed
+
+
+def backends_report(rows, backends=None, repeat=1):
+    """
+    Accuracy and speed of every backend on the same labelled corpus
+    Relevance agreement is measured against the first backend in the list
+    (or against a row's "relevance" label where the corpus provides one).
+    """
+    backends = backends or available_backends()
+    emojis_per_row = [extract_emojis(row['text']) for row in rows]
+    labelled = [i for i, row in enumerate(rows) if row.get('label')]
+    reference_statuses = None
+    report = {
+        'corpus_size': len(rows),
+        'model_loaded': MODEL_LOADED,
+        'repeat': repeat,
+        'reference_backend': backends[0],
+        'backends': {}
+    }
+
+    for name in backends:
+        results, latencies, elapsed = run_backend(name, rows, repeat)
+        predicted = [top_emotion(scores) for scores in results]
+        statuses = [
+            analyze_emoji_relevance(scores, emojis)[1]
+            for scores, emojis in zip(results, emojis_per_row)
+        ]
+        if reference_statuses is None:
+            reference_statuses = statuses
+
+        with_emojis = [i for i, emojis in enumerate(emojis_per_row) if emojis]
+        relevance_agreement = (
+            sum(1 for i in with_emojis if statuses[i] == reference_statuses[i]) / len(with_emojis)
+            if with_emojis else None
+        )
+        relevance_labelled = [i for i in with_emojis if rows[i].get('relevance')]
+        relevance_label_accuracy = (
+            sum(1 for i in relevance_labelled if statuses[i] == rows[i]['relevance']) / len(relevance_labelled)
+            if relevance_labelled else None
+        )
+
+        latencies.sort()
+        report['backends'][name] = {
+            'classification': classification_metrics(
+                [rows[i]['label'] for i in labelled], [predicted[i] for i in labelled]
+            ),
+            'relevance_agreement': round(relevance_agreement, 4) if relevance_agreement is not None else None,
+            'relevance_label_accuracy': round(relevance_label_accuracy, 4) if relevance_label_accuracy is not None else None,
+            'throughput_per_s': round(len(latencies) / elapsed, 2) if elapsed else None,
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies) * 1000, 4),
+                'p50': round(percentile(latencies, 50) * 1000, 4),
+                'p95': round(percentile(latencies, 95) * 1000, 4),
+                'p99': round(percentile(latencies, 99) * 1000, 4),
+                'max': round(latencies[-1] * 1000, 4)
+            }
+        }
+
+    return report
+
+
+def cascade_report(texts):
+    """
+    Run texts through the cascade and through the transformer alone
+    The transformer-only reference bypasses the circuit breaker, so an open
+    breaker cannot turn it into keyword output
+    Returns: fraction of traffic the cheap tier answered and how often
+    the cascade's top emotion agrees with transformer-only output
+    """
+    skipped = 0
+    agreed = 0
+    agreed_when_skipped = 0
+    cascade_seconds = 0.0
+    transformer_seconds = 0.0
+
+    for text in texts:
+        with app_output_silenced():
+            start = time.perf_counter()
+            cascade_scores, tier = get_emotion_scores_with_tier(text, cascade=True)
+            cascade_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            with breaker_disabled():
+                reference_scores, _ = get_emotion_scores_with_tier(text, cascade=False)
+            transformer_seconds += time.perf_counter() - start
+
+        same = top_emotion(cascade_scores) == top_emotion(reference_scores)
+        agreed += same
+        if tier == 'lexicon':
+            skipped += 1
+            agreed_when_skipped += same
+
+    total = len(texts)
+    return {
+        'model_loaded': MODEL_LOADED,
+        'min_margin': app.config['CASCADE_MIN_MARGIN'],
+        'min_coverage': app.config['CASCADE_MIN_COVERAGE'],
+        'texts': total,
+        'skipped_fraction': round(skipped / total, 4) if total else 0.0,
+        'agreement_rate': round(agreed / total, 4) if total else 0.0,
+        'agreement_rate_when_skipped': round(agreed_when_skipped / skipped, 4) if skipped else None,
+        'mean_ms_cascade': round(cascade_seconds / total * 1000, 3) if total else 0.0,
+        'mean_ms_transformer_only': round(transformer_seconds / total * 1000, 3) if total else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backends = subparsers.add_parser('backends', help='Accuracy versus latency of each classifier backend')
+    backends.add_argument('--corpus', default='data/eval_corpus.jsonl')
+    backends.add_argument('--backend', action='append', choices=sorted(BACKENDS),
+                          help='Backend to run (repeatable); defaults to all available')
+    backends.add_argument('--repeat', type=int, default=1, help='Passes over the corpus for timing')
+    backends.add_argument('--output', help='Also write the report to this file')
+
+    cascade = subparsers.add_parser('cascade', help='Skip rate and agreement of the classifier cascade')
+    cascade.add_argument('--corpus', default='data/eval_corpus.jsonl')
+    cascade.add_argument('--min-margin', type=float, help='Override CASCADE_MIN_MARGIN')
+    cascade.add_argument('--min-coverage', type=float, help='Override CASCADE_MIN_COVERAGE')
+    cascade.add_argument('--output', help='Also write the report to this file')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'backends':
+        unavailable = set(args.backend or []) - set(available_backends())
+        if unavailable:
+            parser.error(f"backend(s) need the transformer model: {', '.join(sorted(unavailable))}")
+        with contextlib.redirect_stdout(sys.stderr):
+            report = backends_report(load_corpus(args.corpus), args.backend, args.repeat)
+
+    elif args.command == 'cascade':
+        if not MODEL_LOADED:
+            parser.error("cascade needs the transformer model as its reference")
+        if args.min_margin is not None:
+            app.config['CASCADE_MIN_MARGIN'] = args.min_margin
+        if args.min_coverage is not None:
+            app.config['CASCADE_MIN_COVERAGE'] = args.min_coverage
+        texts = [row['text'] for row in load_corpus(args.corpus)]
+        with contextlib.redirect_stdout(sys.stderr):
+            report = cascade_report(texts)
+
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
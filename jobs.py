@@ -0,0 +1,259 @@
+"""
+Background analysis jobs persisted in the app database.
+
+A job is a row in analysis_job plus one analysis_job_item row per text.
+Workers claim the highest-priority queued job, process its unfinished items
+in small chunks and write each chunk's results in one short transaction, so
+a restart (or a crashed worker) only loses the chunk in flight: a running job
+whose heartbeat is older than the lease is claimed again and resumes where it
+stopped.
+
+Jobs must never starve interactive requests. Workers:
+  * run on their own threads at a lower OS scheduling priority (Linux),
+  * leave inference to process_chunk, which in app.py queues it on the
+    shared inference executor instead of running it on the worker thread,
+  * defer each chunk while interactive inference is waiting (should_yield),
+  * give way between chunks to a queued job with a higher priority.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, bindparam, func, insert, or_, select, update
+
+from models import AnalysisJob, AnalysisJobItem, job_row_to_dict
+
+JOBS = AnalysisJob.__table__
+ITEMS = AnalysisJobItem.__table__
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def _lower_thread_priority(niceness):
+    """Raise this thread's nice value (Linux schedules threads individually)"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except (AttributeError, OSError):
+        pass
+
+
+class JobRunner:
+    """
+    Worker pool for analysis jobs
+    process_chunk(texts, model_spec, options) -> list of JSON-serializable results
+    """
+
+    def __init__(self, engine, process_chunk, workers=1, chunk_size=32, poll_s=1.0,
+                 lease_s=30.0, niceness=10, should_yield=None, max_defer_s=2.0):
+        self.engine = engine
+        self.process_chunk = process_chunk
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.poll_s = poll_s
+        self.lease_s = lease_s
+        self.niceness = niceness
+        self.should_yield = should_yield or (lambda: False)
+        self.max_defer_s = max_defer_s
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    # -------------------------------
+    # Client API
+    # -------------------------------
+    def submit(self, texts, priority=0, model=None, options=None, insert_batch=1000):
+        """Persist a new job and its items; returns the job's status dict"""
+        job_id = uuid.uuid4().hex
+        with self.engine.begin() as connection:
+            connection.execute(insert(JOBS).values(
+                id=job_id, status='queued', priority=priority, model=model,
+                options=json.dumps(options or {}), total=len(texts), processed=0,
+                created_at=datetime.utcnow()
+            ))
+            for start in range(0, len(texts), insert_batch):
+                connection.execute(insert(ITEMS), [
+                    {'job_id': job_id, 'position': start + i, 'text': text}
+                    for i, text in enumerate(texts[start:start + insert_batch])
+                ])
+        self._wake.set()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self.engine.connect() as connection:
+            row = connection.execute(select(JOBS).where(JOBS.c.id == job_id)).first()
+        return job_row_to_dict(row) if row else None
+
+    def recent(self, limit=50):
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(JOBS).order_by(JOBS.c.created_at.desc()).limit(limit)).fetchall()
+        return [job_row_to_dict(row) for row in rows]
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; running workers stop after their current chunk"""
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(JOBS)
+                .where(JOBS.c.id == job_id, JOBS.c.status.in_(('queued', 'running')))
+                .values(status='cancelled', finished_at=datetime.utcnow(), worker=None)
+            )
+        return self.get(job_id)
+
+    def iter_results(self, job_id, chunk=500):
+        """Yield (position, result or None) in order, one short read per chunk"""
+        after = -1
+        while True:
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    select(ITEMS.c.position, ITEMS.c.result)
+                    .where(ITEMS.c.job_id == job_id, ITEMS.c.position > after)
+                    .order_by(ITEMS.c.position)
+                    .limit(chunk)
+                ).fetchall()
+            if not rows:
+                return
+            for position, result in rows:
+                yield position, json.loads(result) if result is not None else None
+            after = rows[-1].position
+
+    def counts(self):
+        """{status: number of jobs}"""
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(JOBS.c.status, func.count()).group_by(JOBS.c.status)).fetchall()
+        return {status: count for status, count in rows}
+
+    # -------------------------------
+    # Workers
+    # -------------------------------
+    def start(self):
+        if self._threads or self.workers <= 0:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, args=(f"{self._worker_prefix}:{i}",),
+                name=f'job-worker-{i}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def _work(self, worker):
+        _lower_thread_priority(self.niceness)
+        while not self._stopping.is_set():
+            try:
+                job = self._claim(worker)
+                if job is None:
+                    self._wake.wait(self.poll_s)
+                    self._wake.clear()
+                    continue
+                print(f"📦 Job {job.id} claimed by {worker} ({job.processed}/{job.total} done)")
+                self._run(job, worker)
+            except Exception as e:
+                print(f"❌ Job worker {worker} error: {e}")
+                time.sleep(self.poll_s)
+
+    def _claim(self, worker):
+        """Atomically take the best queued job, or a running one whose lease expired"""
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.lease_s)
+        with self.engine.begin() as connection:
+            candidates = connection.execute(
+                select(JOBS)
+                .where(or_(JOBS.c.status == 'queued',
+                           and_(JOBS.c.status == 'running', JOBS.c.heartbeat_at < stale)))
+                .order_by(JOBS.c.priority.desc(), JOBS.c.created_at)
+                .limit(5)
+            ).fetchall()
+            for job in candidates:
+                # Only succeeds if nobody claimed or touched the job since we read it
+                heartbeat_unchanged = (JOBS.c.heartbeat_at.is_(None) if job.heartbeat_at is None
+                                       else JOBS.c.heartbeat_at == job.heartbeat_at)
+                claimed = connection.execute(
+                    update(JOBS)
+                    .where(JOBS.c.id == job.id, JOBS.c.status == job.status, heartbeat_unchanged)
+                    .values(status='running', worker=worker, heartbeat_at=now,
+                            started_at=job.started_at or now)
+                ).rowcount
+                if claimed:
+                    return job
+        return None
+
+    def _higher_priority_waiting(self, priority):
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(func.count()).select_from(JOBS)
+                .where(JOBS.c.status == 'queued', JOBS.c.priority > priority)
+            ).scalar() > 0
+
+    def _release(self, job_id, holder, **values):
+        """
+        Update a job `holder` holds; False if it lost the lease or was cancelled
+        values are column values, so they may include worker=None
+        """
+        with self.engine.begin() as connection:
+            return connection.execute(
+                update(JOBS)
+                .where(JOBS.c.id == job_id, JOBS.c.worker == holder, JOBS.c.status == 'running')
+                .values(**values)
+            ).rowcount == 1
+
+    def _defer_to_interactive(self):
+        """Wait (bounded) while interactive requests need the CPU"""
+        deadline = time.monotonic() + self.max_defer_s
+        while self.should_yield() and time.monotonic() < deadline and not self._stopping.is_set():
+            time.sleep(0.01)
+
+    def _run(self, job, worker):
+        options = json.loads(job.options or '{}')
+        while True:
+            if self._stopping.is_set():
+                self._release(job.id, worker, status='queued', worker=None, heartbeat_at=None)
+                return
+            if self._higher_priority_waiting(job.priority):
+                print(f"⏸️ Job {job.id} yielding to a higher-priority job")
+                self._release(job.id, worker, status='queued', worker=None, heartbeat_at=None)
+                self._wake.set()
+                return
+
+            with self.engine.connect() as connection:
+                items = connection.execute(
+                    select(ITEMS.c.id, ITEMS.c.text)
+                    .where(ITEMS.c.job_id == job.id, ITEMS.c.result.is_(None))
+                    .order_by(ITEMS.c.position)
+                    .limit(self.chunk_size)
+                ).fetchall()
+            if not items:
+                if self._release(job.id, worker, status='completed', finished_at=datetime.utcnow(), worker=None):
+                    print(f"✅ Job {job.id} completed")
+                return
+
+            self._defer_to_interactive()
+            try:
+                results = self.process_chunk([item.text for item in items], job.model, options)
+            except Exception as e:
+                print(f"❌ Job {job.id} failed: {e}")
+                self._release(job.id, worker, status='failed', error=str(e),
+                              finished_at=datetime.utcnow(), worker=None)
+                return
+
+            with self.engine.begin() as connection:
+                # Heartbeat first: if the job was cancelled or re-claimed meanwhile, drop the chunk
+                held = connection.execute(
+                    update(JOBS)
+                    .where(JOBS.c.id == job.id, JOBS.c.worker == worker, JOBS.c.status == 'running')
+                    .values(processed=JOBS.c.processed + len(items), heartbeat_at=datetime.utcnow())
+                ).rowcount == 1
+                if held:
+                    connection.execute(
+                        update(ITEMS).where(ITEMS.c.id == bindparam('item_id')),
+                        [{'item_id': item.id, 'result': json.dumps(result)} for item, result in zip(items, results)]
+                    )
+            if not held:
+                print(f"🛑 Job {job.id} stopped (cancelled or lease lost)")
+                return
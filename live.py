@@ -0,0 +1,142 @@
+"""
+Live as-you-type analysis over WebSocket (served by asgi.py at /ws/live).
+
+The client sends {"text": "..."} whenever the text changes. Edits are
+debounced, the text is split into sentences, and only sentences this
+connection has not scored before go to the inference executor. Aggregate
+emotion scores and emoji relevance are pushed back as one JSON message:
+
+    {"type": "analysis", "emotion_scores": {...}, "top_emotion": {...},
+     "emoji_relevance": {...}, "sentences": 4, "rescored": 1}
+"""
+import asyncio
+import json
+import os
+import re
+from collections import OrderedDict
+
+from app import (
+    app, EMOTIONS, normalize_text, extract_emojis, analyze_emoji_relevance,
+    run_bulk_inference, run_in_inference_executor
+)
+
+app.config['LIVE_DEBOUNCE_MS'] = int(os.environ.get('LIVE_DEBOUNCE_MS', 300))
+app.config['LIVE_MAX_CHARS'] = int(os.environ.get('LIVE_MAX_CHARS', 5000))
+app.config['LIVE_SENTENCE_CACHE'] = int(os.environ.get('LIVE_SENTENCE_CACHE', 256))
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+|\n+')
+
+
+def split_sentences(text):
+    """Split text on sentence-ending punctuation and line breaks"""
+    return [s for s in (normalize_text(part) for part in SENTENCE_BOUNDARY.split(text)) if s]
+
+
+class SentenceCache:
+    """Bounded LRU of sentence -> emotion scores for one connection"""
+
+    def __init__(self, size):
+        self.size = size
+        self._scores = OrderedDict()
+
+    def get(self, sentence):
+        scores = self._scores.get(sentence)
+        if scores is not None:
+            self._scores.move_to_end(sentence)
+        return scores
+
+    def put(self, sentence, scores):
+        self._scores[sentence] = scores
+        self._scores.move_to_end(sentence)
+        while len(self._scores) > self.size:
+            self._scores.popitem(last=False)
+
+
+def aggregate_scores(sentences, scores_by_sentence):
+    """Length-weighted mean of per-sentence scores, normalized to sum to 1"""
+    totals = {emotion: 0.0 for emotion in EMOTIONS}
+    for sentence in sentences:
+        weight = len(sentence)
+        for emotion, score in scores_by_sentence[sentence].items():
+            totals[emotion] = totals.get(emotion, 0.0) + score * weight
+    total = sum(totals.values())
+    if total > 0:
+        totals = {k: v / total for k, v in totals.items()}
+    return {k: round(v, 3) for k, v in totals.items()}
+
+
+async def analyze_incrementally(text, cache):
+    """Rescore only unseen sentences; returns the message to push"""
+    sentences = split_sentences(text)
+    scores_by_sentence = {}
+    missing = []
+    for sentence in sentences:
+        scores = cache.get(sentence)
+        if scores is None:
+            if sentence not in missing:
+                missing.append(sentence)
+        else:
+            scores_by_sentence[sentence] = scores
+
+    if missing:
+        results = await run_in_inference_executor(run_bulk_inference, missing)
+        for sentence, (scores, _) in zip(missing, results):
+            cache.put(sentence, scores)
+            scores_by_sentence[sentence] = scores
+
+    if not sentences:
+        return {'type': 'analysis', 'emotion_scores': None, 'sentences': 0, 'rescored': 0}
+
+    emotion_scores = aggregate_scores(sentences, scores_by_sentence)
+    top_emotion = max(emotion_scores.items(), key=lambda x: x[1])
+    relevance, status = analyze_emoji_relevance(emotion_scores, extract_emojis(text))
+    return {
+        'type': 'analysis',
+        'emotion_scores': emotion_scores,
+        'top_emotion': {'label': top_emotion[0], 'confidence': top_emotion[1]},
+        'emoji_relevance': relevance,
+        'relevance_status': status,
+        'sentences': len(sentences),
+        'rescored': len(missing)
+    }
+
+
+async def live_analysis(scope, receive, send):
+    """ASGI WebSocket handler for one editor connection"""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    await send({'type': 'websocket.accept'})
+
+    debounce = app.config['LIVE_DEBOUNCE_MS'] / 1000
+    cache = SentenceCache(app.config['LIVE_SENTENCE_CACHE'])
+    pending_text = None
+    receiving = asyncio.ensure_future(receive())
+
+    try:
+        while True:
+            # With an edit pending, wait only for the debounce window; more
+            # keystrokes replace the pending text and restart the window
+            timeout = debounce if pending_text is not None else None
+            done, _ = await asyncio.wait({receiving}, timeout=timeout)
+
+            if not done:
+                reply = await analyze_incrementally(pending_text, cache)
+                pending_text = None
+                await send({'type': 'websocket.send', 'text': json.dumps(reply)})
+                continue
+
+            message = receiving.result()
+            if message['type'] == 'websocket.disconnect':
+                return
+            receiving = asyncio.ensure_future(receive())
+
+            try:
+                payload = json.loads(message.get('text') or message.get('bytes') or '')
+                text = str(payload.get('text', ''))
+            except (ValueError, AttributeError):
+                await send({'type': 'websocket.send', 'text': json.dumps({'type': 'error', 'error': 'Invalid message'})})
+                continue
+            pending_text = text[:app.config['LIVE_MAX_CHARS']]
+    finally:
+        receiving.cancel()
@@ -0,0 +1,403 @@
+"""
+Load generator for the Emoji Emotion Analyzer.
+
+    python loadtest.py run --spawn-server --rate 20 --duration 30
+    python loadtest.py run --url http://localhost:5000 --concurrency 8 --traffic traffic.jsonl
+    python loadtest.py compare before.json after.json
+
+Traffic comes from a JSON-lines file or a seeded synthetic mix. Traffic rows
+are {"text": ...} for /analyze or {"texts": [...]} for /analyze/bulk; an
+"endpoint" field overrides the choice, and rows with only "title"/"body"
+(as in a request backlog) are sent as their joined text.
+
+Load is either open-loop (--rate: requests start on a fixed schedule whether
+or not earlier ones finished, and latency is measured from the scheduled
+start, so queueing shows up in the tail) or closed-loop (--concurrency: N
+clients each send back-to-back).
+
+--spawn-server starts uvicorn on a free local port with FORCE_FALLBACK=1 and
+a throwaway database, so the run needs no network and no model weights.
+Reports are JSON with sorted keys so runs can be saved and diffed.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+SYNTHETIC_PHRASES = [
+    "I am so happy today", "This is the best news ever", "I miss you so much",
+    "Everything feels overwhelming", "Why does this keep happening", "I am really angry about this",
+    "That was terrifying", "Wow, I did not expect that", "I love this so much",
+    "Just another ordinary afternoon", "Can't stop smiling", "Feeling lonely tonight",
+]
+SYNTHETIC_EMOJIS = ["😊", "😂", "❤️", "😢", "😭", "😡", "😱", "😮", "🎉", "🙂", "💔", "👍"]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+# -------------------------------
+# Traffic
+# -------------------------------
+def load_traffic(path, bulk_size):
+    """(endpoint, body) pairs from a JSON-lines traffic file"""
+    requests = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            text = row.get('text') or ' '.join(filter(None, (row.get('title'), row.get('body'))))
+            endpoint = row.get('endpoint') or ('/analyze/bulk' if 'texts' in row else '/analyze')
+            if endpoint == '/analyze/bulk':
+                body = {'texts': row.get('texts') or [text] * bulk_size}
+            else:
+                body = {'text': text or ' '.join(row.get('texts', []))}
+            requests.append((endpoint, body))
+    return requests
+
+
+def synthetic_text(rng):
+    sentences = rng.sample(SYNTHETIC_PHRASES, rng.randint(1, 3))
+    text = '. '.join(sentences) + rng.choice(['.', '!', '...'])
+    return text + ' ' + ''.join(rng.choice(SYNTHETIC_EMOJIS) for _ in range(rng.randint(0, 3)))
+
+
+def synthetic_traffic(count, bulk_ratio, bulk_size, seed):
+    """Reproducible mix of single and bulk requests"""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        if rng.random() < bulk_ratio:
+            requests.append(('/analyze/bulk', {'texts': [synthetic_text(rng) for _ in range(bulk_size)]}))
+        else:
+            requests.append(('/analyze', {'text': synthetic_text(rng)}))
+    return requests
+
+
+# -------------------------------
+# HTTP Client
+# -------------------------------
+class Client:
+    """One keep-alive connection per thread"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return connection
+
+    def request(self, method, path, body=None):
+        """(status, response bytes); status 0 means a transport error"""
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        try:
+            connection = self._connection()
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._local.connection = None
+            return 0, type(e).__name__.encode()
+
+    def server_metrics(self):
+        status, body = self.request('GET', '/debug/metrics')
+        return json.loads(body) if status == 200 else None
+
+
+# -------------------------------
+# Load Generation
+# -------------------------------
+def _send(client, endpoint, body, scheduled, results):
+    status, response = client.request('POST', endpoint, body)
+    finished = time.perf_counter()
+    # Open-loop runs measure from the scheduled start, so time spent queued counts
+    results.append((endpoint, status, finished - scheduled, response if status == 0 else b''))
+
+
+def run_open_loop(client, traffic, rate, duration, max_inflight):
+    """Start requests at a fixed arrival rate regardless of completions"""
+    results = []
+    total = int(rate * duration)
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        started = time.perf_counter()
+        for i in range(total):
+            scheduled = started + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            endpoint, body = traffic[i % len(traffic)]
+            pool.submit(_send, client, endpoint, body, scheduled, results)
+    # Measured after the pool drains: under overload requests are still queued
+    # when the last one is scheduled, and throughput must reflect completions
+    return results, time.perf_counter() - started
+
+
+def run_closed_loop(client, traffic, concurrency, duration):
+    """N clients sending back-to-back until the duration is up"""
+    results = []
+    deadline = time.perf_counter() + duration
+    counter = iter(range(sys.maxsize))
+    counter_lock = threading.Lock()
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with counter_lock:
+                i = next(counter)
+            endpoint, body = traffic[i % len(traffic)]
+            _send(client, endpoint, body, time.perf_counter(), results)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def latency_summary(latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        return None
+    return {
+        'mean': round(sum(latencies) / len(latencies) * 1000, 2),
+        'p50': round(percentile(latencies, 50) * 1000, 2),
+        'p95': round(percentile(latencies, 95) * 1000, 2),
+        'p99': round(percentile(latencies, 99) * 1000, 2),
+        'p999': round(percentile(latencies, 99.9) * 1000, 2),
+        'max': round(latencies[-1] * 1000, 2)
+    }
+
+
+def summarize(results, elapsed):
+    """Throughput, latency percentiles and errors, overall and per endpoint"""
+    def block(rows):
+        errors = {}
+        for _, status, _, detail in rows:
+            if not 200 <= status < 300:
+                key = str(status) if status else f"transport:{detail.decode()}"
+                errors[key] = errors.get(key, 0) + 1
+        ok = [latency for _, status, latency, _ in rows if 200 <= status < 300]
+        return {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(sum(errors.values()) / len(rows), 4) if rows else 0.0,
+            'errors': errors,
+            'latency_ms': latency_summary(ok)
+        }
+
+    endpoints = sorted({row[0] for row in results})
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'overall': block(results),
+        'endpoints': {endpoint: block([r for r in results if r[0] == endpoint]) for endpoint in endpoints}
+    }
+
+
+def server_delta(before, after, elapsed):
+    """Counter increments and resource use on the server during the run"""
+    if not before or not after:
+        return None
+    resource_before = before.pop('resource', {})
+    resource_after = after.pop('resource', {})
+    counters = {k: after[k] - before.get(k, 0) for k in sorted(after) if isinstance(after[k], (int, float))}
+    cpu = sum(resource_after.get(k, 0) - resource_before.get(k, 0) for k in ('cpu_user_s', 'cpu_system_s'))
+    return {
+        'counters': counters,
+        'cpu_s': round(cpu, 2),
+        'cpu_utilization': round(cpu / elapsed, 3) if elapsed else None,
+        'rss_mb': round(resource_after.get('rss_bytes', 0) / 2 ** 20, 1),
+        'max_rss_mb': round(resource_after.get('max_rss_bytes', 0) / 2 ** 20, 1),
+        'threads': resource_after.get('threads')
+    }
+
+
+# -------------------------------
+# Local Server
+# -------------------------------
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(workdir, extra_env=None):
+    """Start uvicorn on the fallback classifier with a throwaway database"""
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        'FORCE_FALLBACK': '1',
+        'HF_HUB_OFFLINE': '1',
+        'TRANSFORMERS_OFFLINE': '1',
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'loadtest.db')}",
+        'HISTORY_SHARD_DIR': os.path.join(workdir, 'history'),
+    })
+    env.update(extra_env or {})
+    # stderr goes to a file: an unread pipe fills up and stalls a chatty server
+    log_path = os.path.join(workdir, 'server.log')
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'asgi:asgi_app', '--host', '127.0.0.1', '--port', str(port),
+             '--log-level', 'warning'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            stdout=subprocess.DEVNULL, stderr=log
+        )
+    client = Client(f"http://127.0.0.1:{port}", timeout=5)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            with open(log_path, 'rb') as log:
+                raise RuntimeError(f"Server exited: {log.read().decode(errors='replace')[-2000:]}")
+        status, _ = client.request('GET', '/health')
+        if status == 200:
+            return process, f"http://127.0.0.1:{port}"
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Server did not become healthy within 120s")
+
+
+def run(args):
+    if args.traffic:
+        traffic = load_traffic(args.traffic, args.bulk_size)
+        if not traffic:
+            raise SystemExit(f"No requests in {args.traffic}")
+    else:
+        traffic = synthetic_traffic(args.synthetic_count, args.bulk_ratio, args.bulk_size, args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        process = None
+        url = args.url
+        if args.spawn_server:
+            process, url = spawn_server(workdir)
+        try:
+            client = Client(url, timeout=args.timeout)
+            for endpoint, body in traffic[:args.warmup]:
+                client.request('POST', endpoint, body)
+
+            before = client.server_metrics()
+            if args.rate:
+                results, elapsed = run_open_loop(client, traffic, args.rate, args.duration, args.max_inflight)
+            else:
+                results, elapsed = run_closed_loop(client, traffic, args.concurrency, args.duration)
+            after = client.server_metrics()
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    report = summarize(results, elapsed)
+    report['config'] = {
+        'mode': 'open' if args.rate else 'closed',
+        'rate': args.rate,
+        'concurrency': None if args.rate else args.concurrency,
+        'duration_s': args.duration,
+        'traffic': os.path.basename(args.traffic) if args.traffic else 'synthetic',
+        'traffic_requests': len(traffic),
+        'bulk_ratio': None if args.traffic else args.bulk_ratio,
+        'bulk_size': args.bulk_size,
+        'seed': None if args.traffic else args.seed,
+        'spawned_server': args.spawn_server
+    }
+    report['server'] = server_delta(before, after, elapsed)
+    return report
+
+
+# -------------------------------
+# Report Comparison
+# -------------------------------
+def _flatten(value, prefix=''):
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    return {prefix: value}
+
+
+def compare(before, after):
+    """Side-by-side numeric metrics of two reports with relative change"""
+    old, new = _flatten(before), _flatten(after)
+    rows = {}
+    for key in sorted(set(old) | set(new)):
+        if key.startswith('config.'):
+            continue
+        a, b = old.get(key), new.get(key)
+        if isinstance(a, bool) or isinstance(b, bool):
+            continue
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            rows[key] = {'before': a, 'after': b, 'change': round((b - a) / a, 4) if a else None}
+        elif a != b:
+            rows[key] = {'before': a, 'after': b, 'change': None}
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Generate load and report latency, errors and server usage')
+    target = run_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='Base URL of a running server')
+    target.add_argument('--spawn-server', action='store_true', help='Start an offline fallback-classifier server')
+    load = run_parser.add_mutually_exclusive_group()
+    load.add_argument('--rate', type=float, help='Open-loop arrival rate in requests per second')
+    load.add_argument('--concurrency', type=int, default=4, help='Closed-loop client count (default 4)')
+    run_parser.add_argument('--duration', type=float, default=30, help='Seconds of load')
+    run_parser.add_argument('--traffic', help='JSON-lines traffic file; default is a synthetic mix')
+    run_parser.add_argument('--synthetic-count', type=int, default=500, help='Distinct synthetic requests')
+    run_parser.add_argument('--bulk-ratio', type=float, default=0.1, help='Share of synthetic requests sent to /analyze/bulk')
+    run_parser.add_argument('--bulk-size', type=int, default=20, help='Texts per bulk request')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--warmup', type=int, default=10, help='Requests sent before measuring')
+    run_parser.add_argument('--max-inflight', type=int, default=256, help='Open-loop cap on concurrent requests')
+    run_parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    run_parser.add_argument('--output', help='Also write the report to this file')
+
+    compare_parser = subparsers.add_parser('compare', help='Diff two saved reports')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run(args)
+    elif args.command == 'compare':
+        with open(args.before, encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.after, encoding='utf-8') as f:
+            after = json.load(f)
+        report = compare(before, after)
+
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
+    if getattr(args, 'output', None):
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Registry of named, versioned emotion models.
+
+Local models live in MODEL_DIR laid out as <name>/<version>/ with the usual
+Hugging Face files (config.json, tokenizer files and model.safetensors).
+Weights are read through safetensors with low_cpu_mem_usage, which loads
+quickly and avoids building a randomly initialised model first. The tensors
+are still copied into each process's own memory, so every worker process
+holds its own copy of every loaded version.
+
+Requests pin the ModelEntry they started with, so activating another model
+never disturbs analyses that are already running. Requests may pick any
+loaded version; loading and unloading are admin operations.
+"""
+import os
+import threading
+from datetime import datetime
+
+from transformers import pipeline
+
+WEIGHTS_FILE = 'model.safetensors'
+
+
+class ModelEntry:
+    """A loaded model version and its text-classification pipeline"""
+
+    def __init__(self, name, version, classifier, source):
+        self.name = name
+        self.version = version
+        self.classifier = classifier
+        self.source = source
+        self.loaded_at = datetime.utcnow()
+
+    @property
+    def key(self):
+        return f"{self.name}@{self.version}"
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'key': self.key,
+            'source': self.source,
+            'loaded_at': self.loaded_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+def parse_model_spec(spec):
+    """Split 'name' or 'name@version' into (name, version or None)"""
+    name, _, version = spec.partition('@')
+    return name, version or None
+
+
+def build_classifier(model_path):
+    """Text-classification pipeline returning scores for every label"""
+    return pipeline(
+        "text-classification",
+        model=model_path,
+        tokenizer=model_path,
+        top_k=None,
+        model_kwargs={'use_safetensors': True, 'low_cpu_mem_usage': True}
+    )
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+        self._models = {}
+        self._active = None
+        self._lock = threading.RLock()
+
+    def available(self):
+        """{name: [versions]} for every local model with safetensors weights"""
+        found = {}
+        if not os.path.isdir(self.root):
+            return found
+        for name in sorted(os.listdir(self.root)):
+            name_dir = os.path.join(self.root, name)
+            if not os.path.isdir(name_dir):
+                continue
+            versions = sorted(
+                v for v in os.listdir(name_dir)
+                if os.path.isfile(os.path.join(name_dir, v, WEIGHTS_FILE))
+            )
+            if versions:
+                found[name] = versions
+        return found
+
+    def latest_version(self, name):
+        versions = self.available().get(name)
+        return versions[-1] if versions else None
+
+    def register(self, entry):
+        """Add an already-built model (e.g. one loaded from the Hub)"""
+        with self._lock:
+            self._models[entry.key] = entry
+        return entry
+
+    def load(self, name, version=None):
+        """Load a local model version (latest if not given), reusing it if already loaded"""
+        version = version or self.latest_version(name)
+        if version is None:
+            raise KeyError(f"No local versions of model '{name}'")
+
+        key = f"{name}@{version}"
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+
+        model_path = os.path.join(self.root, name, version)
+        if not os.path.isfile(os.path.join(model_path, WEIGHTS_FILE)):
+            raise KeyError(f"Model '{key}' not found in {self.root}")
+
+        # Build outside the lock: loading can take seconds
+        entry = ModelEntry(name, version, build_classifier(model_path), source=model_path)
+        with self._lock:
+            return self._models.setdefault(key, entry)
+
+    def activate(self, name, version=None):
+        """Atomically make a model version the default for new requests"""
+        entry = self.get_loaded(name, version) or self.load(name, version)
+        with self._lock:
+            self._active = entry
+        return entry
+
+    def unload(self, key):
+        """Forget a loaded model; requests already holding it finish normally"""
+        with self._lock:
+            if self._active is not None and self._active.key == key:
+                raise ValueError("Cannot unload the active model")
+            return self._models.pop(key, None) is not None
+
+    def get_loaded(self, name, version=None):
+        with self._lock:
+            if version:
+                return self._models.get(f"{name}@{version}")
+            candidates = [e for e in self._models.values() if e.name == name]
+            return max(candidates, key=lambda e: e.version) if candidates else None
+
+    def active(self):
+        return self._active
+
+    def resolve(self, spec=None, load=False):
+        """
+        ModelEntry for 'name' / 'name@version', or the active model when spec is empty
+        Only already-loaded versions resolve unless load is set: per-request
+        selection must never pull new weights into memory
+        """
+        if not spec:
+            return self._active
+        name, version = parse_model_spec(spec)
+        entry = self.get_loaded(name, version)
+        if entry is None:
+            if not load:
+                raise KeyError(f"Model '{spec}' is not loaded")
+            entry = self.load(name, version)
+        return entry
+
+    def loaded(self):
+        with self._lock:
+            return list(self._models.values())
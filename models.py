@@ -3,10 +3,45 @@ from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
+EMOTION_COLUMNS = ['joy', 'sadness', 'anger', 'fear', 'surprise', 'love', 'neutral']
+
+
+def history_row_to_dict(row):
+    """Display dict for a history row (ORM instance or Core row)"""
+    return {
+        'id': row.id,
+        'text': row.text[:100] + '...' if len(row.text) > 100 else row.text,
+        'timestamp': row.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'emotions': {
+            'joy': float(row.joy),
+            'sadness': float(row.sadness),
+            'anger': float(row.anger),
+            'fear': float(row.fear),
+            'surprise': float(row.surprise),
+            'love': float(row.love),
+            'neutral': float(row.neutral)
+        },
+        'emoji_relevance': row.emoji_relevance,
+        'relevance_score': float(row.relevance_score) if row.relevance_score else 0.0,
+        'model_version': row.model_version
+    }
+
+
+def aggregate_row_to_dict(row):
+    """Display dict for a daily aggregate row: per-emotion means over its rows"""
+    rows = row.rows or 1
+    return {
+        'period_start': row.period_start.strftime('%Y-%m-%d'),
+        'rows': row.rows,
+        'emotions': {emotion: getattr(row, emotion) / rows for emotion in EMOTION_COLUMNS},
+        'relevance_score': row.relevance_score / rows
+    }
+
+
 class AnalysisHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.Text, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     joy = db.Column(db.Float, default=0)
     sadness = db.Column(db.Float, default=0)
     anger = db.Column(db.Float, default=0)
@@ -14,19 +49,90 @@ class AnalysisHistory(db.Model):
     surprise = db.Column(db.Float, default=0)
     love = db.Column(db.Float, default=0)
     neutral = db.Column(db.Float, default=0)
-    
+    emoji_relevance = db.Column(db.String(20), default="neutral")  # New field for emoji relevance
+    relevance_score = db.Column(db.Float, default=0.0)  # New field for relevance score
+    model_version = db.Column(db.String(64))  # Model (name@version) or fallback tier that scored the row
+
     def to_dict(self):
-        return {
-            'id': self.id,
-            'text': self.text[:100] + '...' if len(self.text) > 100 else self.text,
-            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'emotions': {
-                'joy': self.joy,
-                'sadness': self.sadness,
-                'anger': self.anger,
-                'fear': self.fear,
-                'surprise': self.surprise,
-                'love': self.love,
-                'neutral': self.neutral
-            }
-        }
\ No newline at end of file
+        return history_row_to_dict(self)
+
+
+class HistoryAggregate(db.Model):
+    """One day of compacted history: row count plus per-emotion sums"""
+    id = db.Column(db.Integer, primary_key=True)
+    period_start = db.Column(db.DateTime, nullable=False, unique=True, index=True)
+    rows = db.Column(db.Integer, default=0)
+    joy = db.Column(db.Float, default=0)
+    sadness = db.Column(db.Float, default=0)
+    anger = db.Column(db.Float, default=0)
+    fear = db.Column(db.Float, default=0)
+    surprise = db.Column(db.Float, default=0)
+    love = db.Column(db.Float, default=0)
+    neutral = db.Column(db.Float, default=0)
+    relevance_score = db.Column(db.Float, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # Last compaction into this day
+
+    def to_dict(self):
+        return aggregate_row_to_dict(self)
+
+
+class AnalysisJob(db.Model):
+    """A batch of texts analyzed in the background (see jobs.py)"""
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(16), nullable=False, default='queued', index=True)  # queued/running/completed/failed/cancelled
+    priority = db.Column(db.Integer, nullable=False, default=0)
+    model = db.Column(db.String(128))  # Model spec requested at submission; None means the active model
+    options = db.Column(db.Text)  # JSON request options applied to every item
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(128))  # Worker holding the lease while running
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return job_row_to_dict(self)
+
+
+class AnalysisJobItem(db.Model):
+    """One text of a job and, once processed, its JSON result"""
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(32), db.ForeignKey('analysis_job.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    result = db.Column(db.Text)
+
+    __table_args__ = (db.Index('ix_analysis_job_item_job_position', 'job_id', 'position', unique=True),)
+
+
+def job_row_to_dict(row):
+    """Status dict for a job row (ORM instance or Core row)"""
+    def fmt(value):
+        return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+    return {
+        'job_id': row.id,
+        'status': row.status,
+        'priority': row.priority,
+        'model': row.model,
+        'total': row.total,
+        'processed': row.processed,
+        'progress': round(row.processed / row.total, 4) if row.total else 1.0,
+        'error': row.error,
+        'created_at': fmt(row.created_at),
+        'started_at': fmt(row.started_at),
+        'finished_at': fmt(row.finished_at)
+    }
+
+
+class RescoreCheckpoint(db.Model):
+    """Progress of a named history re-scoring run (see `flask rescore-history`)"""
+    name = db.Column(db.String(64), primary_key=True)
+    last_id = db.Column(db.BigInteger, nullable=False, default=0)  # Sharded history IDs exceed 32 bits
+    model_version = db.Column(db.String(64))
+    rows_rescored = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
@@ -76,6 +76,9 @@ class EmojiAnalyzer {
             this.textInput.focus();
         }
         
+        // Live feedback while typing
+        this.initLiveAnalysis();
+        
         // Add Enter key support (Ctrl+Enter)
         document.addEventListener('keydown', (e) => {
             if (e.ctrlKey && e.key === 'Enter') {
@@ -86,6 +89,42 @@ class EmojiAnalyzer {
         });
     }
 
+    initLiveAnalysis() {
+        // Needs the ASGI server (uvicorn asgi:asgi_app); quietly off otherwise
+        this.liveFeedback = document.getElementById('liveFeedback');
+        if (!this.textInput || !this.liveFeedback || !('WebSocket' in window)) {
+            return;
+        }
+        
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const socket = new WebSocket(`${protocol}://${window.location.host}/ws/live`);
+        
+        socket.addEventListener('message', (event) => {
+            const data = JSON.parse(event.data);
+            if (data.type !== 'analysis' || !data.emotion_scores) {
+                this.liveFeedback.textContent = '';
+                return;
+            }
+            
+            let summary = `Live: ${data.top_emotion.label} (${Math.round(data.top_emotion.confidence * 100)}%)`;
+            if (data.relevance_status && data.relevance_status !== 'no emojis') {
+                summary += ` · emojis ${data.relevance_status}`;
+            }
+            this.liveFeedback.textContent = summary;
+        });
+        
+        let timer = null;
+        this.textInput.addEventListener('input', () => {
+            if (socket.readyState !== WebSocket.OPEN) {
+                return;
+            }
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                socket.send(JSON.stringify({ text: this.textInput.value }));
+            }, 150);
+        });
+    }
+
     showLoading(show) {
         console.log(`🔄 Loading: ${show}`);
         if (this.loadingSpinner) {
@@ -0,0 +1,680 @@
+"""
+Storage layer for analysis history.
+
+The app talks to history through a HistoryStore rather than the ORM session,
+so the backend can change without touching the routes:
+
+    SQLHistoryStore      one SQLAlchemy engine (SQLite file or a server DB)
+    ShardedHistoryStore  one SQLite file per calendar month under a directory
+
+Both expose the same bulk-friendly API (add_many, iter_chunks, update_many,
+delete_ids, compact_batch) and return plain rows with attribute access.
+Schema changes are applied by migrate(), which records what ran in a
+schema_version table so every database and shard upgrades the same way.
+
+Check that the backends behave the same:
+
+    python storage.py check
+    python storage.py check --url postgresql://user@localhost/scratch
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table,
+    bindparam, create_engine, delete, event, func, insert, inspect, select, update
+)
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from models import db, AnalysisHistory, HistoryAggregate, EMOTION_COLUMNS, aggregate_row_to_dict
+
+# -------------------------------
+# Engine Configuration
+# -------------------------------
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+
+
+def engine_options(uri):
+    """SQLAlchemy engine options (pool sizing, driver args) for a database URI"""
+    if uri.startswith('sqlite'):
+        if ':memory:' in uri or uri.rstrip('/') == 'sqlite:':
+            return {}
+        # Reuse a bounded set of connections across threads instead of opening
+        # a file handle per checkout; SQLite itself serializes the writers
+        return {
+            'poolclass': QueuePool,
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'connect_args': {'check_same_thread': False, 'timeout': 5},
+        }
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True,
+    }
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL and a busy timeout let maintenance jobs run beside live writers"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    # Only takes effect on a brand-new file (or after a full VACUUM)
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode = WAL")
+    # WAL keeps the database consistent at NORMAL; only the last commits can be lost on power failure
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.execute("PRAGMA busy_timeout = 5000")
+    cursor.close()
+
+
+# -------------------------------
+# Migrations
+# -------------------------------
+HISTORY_TABLE = AnalysisHistory.__table__
+AGGREGATE_TABLE = HistoryAggregate.__table__
+SHARD_TABLES = [HISTORY_TABLE, AGGREGATE_TABLE]
+
+_schema_metadata = MetaData()
+schema_version = Table(
+    'schema_version', _schema_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200)),
+    Column('applied_at', DateTime)
+)
+
+
+def _add_history_model_version(connection):
+    columns = {column['name'] for column in inspect(connection).get_columns(HISTORY_TABLE.name)}
+    if 'model_version' not in columns:
+        connection.execute(sql_text(f"ALTER TABLE {HISTORY_TABLE.name} ADD COLUMN model_version VARCHAR(64)"))
+
+
+def _index_history_timestamp(connection):
+    indexes = {index['name'] for index in inspect(connection).get_indexes(HISTORY_TABLE.name)}
+    name = f"ix_{HISTORY_TABLE.name}_timestamp"
+    if name not in indexes:
+        connection.execute(sql_text(f"CREATE INDEX {name} ON {HISTORY_TABLE.name} (timestamp)"))
+
+
+def _add_aggregate_updated_at(connection):
+    columns = {column['name'] for column in inspect(connection).get_columns(AGGREGATE_TABLE.name)}
+    if 'updated_at' not in columns:
+        connection.execute(sql_text(f"ALTER TABLE {AGGREGATE_TABLE.name} ADD COLUMN updated_at DATETIME"))
+
+
+# Append only: (version, description, function(connection)). Each step must
+# also be safe on a database whose tables create_all just built at the latest shape.
+MIGRATIONS = [
+    (1, 'add analysis_history.model_version', _add_history_model_version),
+    (2, 'index analysis_history.timestamp', _index_history_timestamp),
+    (3, 'add history_aggregate.updated_at', _add_aggregate_updated_at),
+]
+
+
+def migrate(engine, tables=None):
+    """
+    Create missing tables, then apply pending migrations in order
+    Returns: descriptions of the migrations applied
+    """
+    db.metadata.create_all(engine, tables=tables)
+    _schema_metadata.create_all(engine)
+    applied = []
+    with engine.begin() as connection:
+        current = connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        for version, description, apply in MIGRATIONS:
+            if version <= current:
+                continue
+            apply(connection)
+            connection.execute(insert(schema_version).values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+            applied.append(description)
+    return applied
+
+
+# -------------------------------
+# Pagination
+# -------------------------------
+class Page:
+    """One page of history rows (same attributes as Flask-SQLAlchemy's Pagination)"""
+
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self):
+        return math.ceil(self.total / self.per_page) if self.total else 0
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=4, right_edge=2):
+        """Page numbers to link, with None marking a gap"""
+        pages_end = self.pages + 1
+        if pages_end == 1:
+            return
+        left_end = min(1 + left_edge, pages_end)
+        yield from range(1, left_end)
+        if left_end == pages_end:
+            return
+        mid_start = max(left_end, self.page - left_current)
+        mid_end = min(self.page + right_current + 1, pages_end)
+        if mid_start - left_end > 0:
+            yield None
+        yield from range(mid_start, mid_end)
+        if mid_end == pages_end:
+            return
+        right_start = max(mid_end, pages_end - right_edge)
+        if right_start - mid_end > 0:
+            yield None
+        yield from range(right_start, pages_end)
+
+
+def _row(mapping, **overrides):
+    return SimpleNamespace(**{**dict(mapping), **overrides})
+
+
+# -------------------------------
+# History Stores
+# -------------------------------
+class HistoryStore:
+    """
+    Interface shared by the history backends
+    Records are dicts keyed by AnalysisHistory column names; rows come back
+    as objects with one attribute per column.
+    """
+
+    def __init__(self):
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Call callback() after every write (e.g. to drop cached pages)"""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+
+    def add(self, record):
+        raise NotImplementedError
+
+    def add_many(self, records):
+        raise NotImplementedError
+
+    def page(self, page, per_page):
+        raise NotImplementedError
+
+    def version(self):
+        raise NotImplementedError
+
+    def iter_chunks(self, after_id=0, size=500):
+        raise NotImplementedError
+
+    def update_many(self, updates):
+        raise NotImplementedError
+
+    def delete_ids(self, ids):
+        raise NotImplementedError
+
+    def compact_batch(self, cutoff, batch_size):
+        raise NotImplementedError
+
+    def aggregates(self):
+        raise NotImplementedError
+
+    def compacted_at(self):
+        raise NotImplementedError
+
+    def engines(self):
+        raise NotImplementedError
+
+
+class SQLHistoryStore(HistoryStore):
+    """History in one database, written with SQLAlchemy Core statements"""
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+    def add(self, record):
+        """Insert one row; returns its ID"""
+        with self.engine.begin() as connection:
+            result = connection.execute(insert(HISTORY_TABLE).values(**record))
+        self._notify()
+        return result.inserted_primary_key[0]
+
+    def add_many(self, records):
+        """Insert rows in one executemany transaction; returns the count"""
+        if not records:
+            return 0
+        with self.engine.begin() as connection:
+            connection.execute(insert(HISTORY_TABLE), list(records))
+        self._notify()
+        return len(records)
+
+    def count(self):
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.count()).select_from(HISTORY_TABLE)).scalar()
+
+    def recent(self, limit, offset=0):
+        """Rows newest first"""
+        query = (select(HISTORY_TABLE)
+                 .order_by(HISTORY_TABLE.c.timestamp.desc(), HISTORY_TABLE.c.id.desc())
+                 .limit(limit).offset(offset))
+        with self.engine.connect() as connection:
+            return [_row(r._mapping) for r in connection.execute(query)]
+
+    def page(self, page, per_page):
+        page = max(page, 1)
+        return Page(self.recent(per_page, (page - 1) * per_page), page, per_page, self.count())
+
+    def version(self):
+        """(newest row ID, row count, newest timestamp)"""
+        query = select(
+            func.max(HISTORY_TABLE.c.id), func.count(HISTORY_TABLE.c.id), func.max(HISTORY_TABLE.c.timestamp)
+        )
+        with self.engine.connect() as connection:
+            newest_id, total, newest_timestamp = connection.execute(query).one()
+        return newest_id or 0, total, newest_timestamp
+
+    def iter_chunks(self, after_id=0, size=500):
+        """Yield lists of rows in ID order; each chunk is a separate short read"""
+        while True:
+            query = (select(HISTORY_TABLE)
+                     .where(HISTORY_TABLE.c.id > after_id)
+                     .order_by(HISTORY_TABLE.c.id)
+                     .limit(size))
+            with self.engine.connect() as connection:
+                rows = [_row(r._mapping) for r in connection.execute(query)]
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1].id
+
+    def update_many(self, updates):
+        """Apply [{'id': ..., column: value, ...}] in one executemany transaction"""
+        if not updates:
+            return 0
+        params = [{'b_id': u['id'], **{k: v for k, v in u.items() if k != 'id'}} for u in updates]
+        with self.engine.begin() as connection:
+            connection.execute(update(HISTORY_TABLE).where(HISTORY_TABLE.c.id == bindparam('b_id')), params)
+        self._notify()
+        return len(updates)
+
+    def delete_ids(self, ids):
+        ids = list(ids)
+        if not ids:
+            return 0
+        with self.engine.begin() as connection:
+            deleted = connection.execute(delete(HISTORY_TABLE).where(HISTORY_TABLE.c.id.in_(ids))).rowcount
+        self._notify()
+        return deleted
+
+    def compact_batch(self, cutoff, batch_size):
+        """
+        Fold one batch of rows older than cutoff into daily aggregates and
+        delete them, in one short transaction
+        Returns: (rows compacted, aggregate days touched)
+        """
+        with self.engine.begin() as connection:
+            rows = connection.execute(
+                select(HISTORY_TABLE)
+                .where(HISTORY_TABLE.c.timestamp < cutoff)
+                .order_by(HISTORY_TABLE.c.id)
+                .limit(batch_size)
+            ).fetchall()
+            if not rows:
+                return 0, 0
+
+            now = datetime.utcnow()
+            by_day = {}
+            for row in rows:
+                day = datetime(row.timestamp.year, row.timestamp.month, row.timestamp.day)
+                by_day.setdefault(day, []).append(row)
+
+            existing = {
+                a.period_start: a.id for a in connection.execute(
+                    select(AGGREGATE_TABLE.c.id, AGGREGATE_TABLE.c.period_start)
+                    .where(AGGREGATE_TABLE.c.period_start.in_(list(by_day)))
+                )
+            }
+            for day, day_rows in by_day.items():
+                sums = {emotion: sum(getattr(r, emotion) or 0 for r in day_rows) for emotion in EMOTION_COLUMNS}
+                sums['relevance_score'] = sum(r.relevance_score or 0 for r in day_rows)
+                if day in existing:
+                    values = {column: AGGREGATE_TABLE.c[column] + amount for column, amount in sums.items()}
+                    values['rows'] = AGGREGATE_TABLE.c.rows + len(day_rows)
+                    values['updated_at'] = now
+                    connection.execute(
+                        update(AGGREGATE_TABLE).where(AGGREGATE_TABLE.c.id == existing[day]).values(**values)
+                    )
+                else:
+                    connection.execute(insert(AGGREGATE_TABLE).values(
+                        period_start=day, rows=len(day_rows), updated_at=now, **sums
+                    ))
+
+            connection.execute(delete(HISTORY_TABLE).where(HISTORY_TABLE.c.id.in_([r.id for r in rows])))
+        self._notify()
+        return len(rows), len(by_day)
+
+    def aggregates(self):
+        """Daily aggregates, newest first"""
+        with self.engine.connect() as connection:
+            return [_row(r._mapping) for r in connection.execute(
+                select(AGGREGATE_TABLE).order_by(AGGREGATE_TABLE.c.period_start.desc())
+            )]
+
+    def compacted_at(self):
+        """Time of the last compaction, or None"""
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.max(AGGREGATE_TABLE.c.updated_at))).scalar()
+
+    def engines(self):
+        return [self.engine]
+
+
+# Global row IDs in a sharded store are <shard key> * SHARD_ID_SPACE + <local ID>,
+# e.g. row 42 of October 2026 is 202610000000042 (still exact as a JS number)
+SHARD_ID_SPACE = 10 ** 9
+SHARD_FILE = re.compile(r'^history-(\d{6})\.db$')
+
+
+class ShardedHistoryStore(HistoryStore):
+    """
+    History split across one SQLite file per calendar month
+    Writes only ever touch the current month's file, so write locks and file
+    size stay bounded. Daily aggregates live in the shard that held the rows,
+    which keeps compaction a single-file transaction.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self._shards = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            match = SHARD_FILE.match(name)
+            if match:
+                self._shard(int(match.group(1)))
+
+    @staticmethod
+    def shard_key(timestamp):
+        return timestamp.year * 100 + timestamp.month
+
+    @staticmethod
+    def _shard_start(key):
+        return datetime(key // 100, key % 100, 1)
+
+    def _shard(self, key):
+        """SQLHistoryStore for one month, creating and migrating its file on first use"""
+        with self._lock:
+            store = self._shards.get(key)
+            if store is None:
+                uri = f"sqlite:///{os.path.join(self.directory, f'history-{key}.db')}"
+                engine = create_engine(uri, **engine_options(uri))
+                migrate(engine, tables=SHARD_TABLES)
+                store = self._shards[key] = SQLHistoryStore(engine)
+            return store
+
+    def _keys(self, newest_first=False):
+        with self._lock:
+            return sorted(self._shards, reverse=newest_first)
+
+    def _global(self, key, row):
+        return _row(vars(row), id=key * SHARD_ID_SPACE + row.id)
+
+    def _by_shard(self, ids):
+        grouped = {}
+        for global_id in ids:
+            grouped.setdefault(global_id // SHARD_ID_SPACE, []).append(global_id % SHARD_ID_SPACE)
+        return grouped
+
+    def add(self, record):
+        record = dict(record)
+        record.setdefault('timestamp', datetime.utcnow())
+        key = self.shard_key(record['timestamp'])
+        local_id = self._shard(key).add(record)
+        self._notify()
+        return key * SHARD_ID_SPACE + local_id
+
+    def add_many(self, records):
+        grouped = {}
+        now = datetime.utcnow()
+        for record in records:
+            record = dict(record)
+            record.setdefault('timestamp', now)
+            grouped.setdefault(self.shard_key(record['timestamp']), []).append(record)
+        for key, shard_records in grouped.items():
+            self._shard(key).add_many(shard_records)
+        if grouped:
+            self._notify()
+        return sum(len(r) for r in grouped.values())
+
+    def page(self, page, per_page):
+        """Newest first across shards: skip whole shards until the offset lands in one"""
+        page = max(page, 1)
+        offset = (page - 1) * per_page
+        counts = [(key, self._shards[key].count()) for key in self._keys(newest_first=True)]
+        items = []
+        for key, count in counts:
+            if len(items) >= per_page:
+                break
+            if offset >= count:
+                offset -= count
+                continue
+            rows = self._shards[key].recent(per_page - len(items), offset)
+            items.extend(self._global(key, row) for row in rows)
+            offset = 0
+        return Page(items, page, per_page, sum(count for _, count in counts))
+
+    def version(self):
+        newest_id, total, newest_timestamp = 0, 0, None
+        for key in self._keys():
+            shard_newest, shard_total, shard_timestamp = self._shards[key].version()
+            total += shard_total
+            if shard_total:
+                newest_id = max(newest_id, key * SHARD_ID_SPACE + shard_newest)
+                newest_timestamp = max(filter(None, (newest_timestamp, shard_timestamp)))
+        return newest_id, total, newest_timestamp
+
+    def iter_chunks(self, after_id=0, size=500):
+        for key in self._keys():
+            base = key * SHARD_ID_SPACE
+            if after_id >= base + SHARD_ID_SPACE:
+                continue
+            for rows in self._shards[key].iter_chunks(max(0, after_id - base), size):
+                yield [self._global(key, row) for row in rows]
+
+    def update_many(self, updates):
+        grouped = {}
+        for u in updates:
+            grouped.setdefault(u['id'] // SHARD_ID_SPACE, []).append({**u, 'id': u['id'] % SHARD_ID_SPACE})
+        for key, shard_updates in grouped.items():
+            if key in self._shards:
+                self._shards[key].update_many(shard_updates)
+        if grouped:
+            self._notify()
+        return len(updates)
+
+    def delete_ids(self, ids):
+        deleted = 0
+        for key, local_ids in self._by_shard(ids).items():
+            if key in self._shards:
+                deleted += self._shards[key].delete_ids(local_ids)
+        if deleted:
+            self._notify()
+        return deleted
+
+    def compact_batch(self, cutoff, batch_size):
+        for key in self._keys():
+            if self._shard_start(key) >= cutoff:
+                break
+            result = self._shards[key].compact_batch(cutoff, batch_size)
+            if result[0]:
+                self._notify()
+                return result
+        return 0, 0
+
+    def aggregates(self):
+        rows = []
+        for key in self._keys(newest_first=True):
+            rows.extend(self._shards[key].aggregates())
+        return rows
+
+    def compacted_at(self):
+        return max(filter(None, (self._shards[key].compacted_at() for key in self._keys())), default=None)
+
+    def engines(self):
+        return [self._shards[key].engine for key in self._keys()]
+
+
+def create_history_store(app, engine):
+    """History store selected by HISTORY_SHARDING; engine is the app's database"""
+    if app.config['HISTORY_SHARDING']:
+        return ShardedHistoryStore(app.config['HISTORY_SHARD_DIR'])
+    return SQLHistoryStore(engine)
+
+
+# -------------------------------
+# Backend Conformance Check
+# -------------------------------
+def _sample_records():
+    emotions = {emotion: 0.0 for emotion in EMOTION_COLUMNS}
+    records = []
+    for i, (month, day) in enumerate([(1, 5), (1, 5), (1, 20), (2, 3), (2, 14), (3, 1), (3, 9), (3, 30)]):
+        records.append({
+            **emotions,
+            'joy': round(0.1 * (i + 1), 2),
+            'neutral': round(1 - 0.1 * (i + 1), 2),
+            'text': f"sample {i}",
+            'timestamp': datetime(2026, month, day, 12, i),
+            'emoji_relevance': 'neutral',
+            'relevance_score': 0.5,
+            'model_version': 'check'
+        })
+    return records
+
+
+def run_conformance(store):
+    """Exercise every HistoryStore method; returns ID-independent observations"""
+    records = _sample_records()
+    first_id = store.add(records[0])
+    store.add_many(records[1:])
+    report = {'version_total': store.version()[1]}
+
+    first_page = store.page(1, 3)
+    report['page_1'] = [row.text for row in first_page.items]
+    report['page_3'] = [row.text for row in store.page(3, 3).items]
+    report['pagination'] = [first_page.total, first_page.pages, first_page.has_next, list(first_page.iter_pages())]
+
+    chunks = list(store.iter_chunks(size=3))
+    report['chunk_texts'] = sorted(row.text for rows in chunks for row in rows)
+    ids = [row.id for rows in chunks for row in rows]
+    report['ids_unique_and_ordered'] = len(set(ids)) == len(ids) and ids == sorted(ids)
+    report['resume_after_first'] = sorted(row.text for rows in store.iter_chunks(after_id=first_id) for row in rows)
+
+    by_text = {row.text: row.id for rows in chunks for row in rows}
+    store.update_many([{'id': by_text['sample 1'], 'model_version': 'rescored', 'joy': 0.9}])
+    report['updated'] = [(row.text, row.model_version, row.joy) for row in store.page(1, 10).items if row.model_version == 'rescored']
+    report['deleted'] = store.delete_ids([by_text['sample 7']])
+
+    compacted = []
+    while True:
+        count, days = store.compact_batch(datetime(2026, 2, 10), batch_size=2)
+        if not count:
+            break
+        compacted.append(count)
+    report['compacted_rows'] = sum(compacted)
+    report['aggregates'] = [aggregate_row_to_dict(row) for row in store.aggregates()]
+    report['compacted_at_recorded'] = store.compacted_at() is not None
+    report['remaining'] = [row.text for row in store.page(1, 10).items]
+    return report
+
+
+def check(url=None):
+    """Run the conformance scenario on every backend and compare the results"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'single.db')}"
+        engine = create_engine(uri, **engine_options(uri))
+        migrate(engine)
+        results['sqlite'] = run_conformance(SQLHistoryStore(engine))
+        engine.dispose()
+
+        sharded = ShardedHistoryStore(os.path.join(tmp, 'shards'))
+        results['sqlite-sharded'] = run_conformance(sharded)
+        for shard_engine in sharded.engines():
+            shard_engine.dispose()
+
+        if url:
+            engine = create_engine(url, **engine_options(url))
+            migrate(engine)
+            results['url'] = run_conformance(SQLHistoryStore(engine))
+            engine.dispose()
+
+    reference_name = next(iter(results))
+    reference = results[reference_name]
+    mismatches = {
+        name: sorted(k for k in reference if result.get(k) != reference[k])
+        for name, result in results.items() if name != reference_name
+    }
+    return {
+        'backends': list(results),
+        'reference': reference_name,
+        'consistent': not any(mismatches.values()),
+        'mismatches': mismatches,
+        'results': results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check_parser = subparsers.add_parser('check', help='Run the same scenario on every history backend')
+    check_parser.add_argument('--url', help='Also check this database URL (use a scratch database)')
+    args = parser.parse_args(argv)
+
+    report = check(args.url)
+    json.dump(report, sys.stdout, indent=2, sort_keys=True, default=str)
+    sys.stdout.write('\n')
+    sys.exit(0 if report['consistent'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+The app is imported once per test session against a scratch database, with
+the keyword classifier instead of model weights and no background job threads.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix='emoji-tests-')
+os.environ.update({
+    'FORCE_FALLBACK': '1',
+    'DATABASE_URL': f"sqlite:///{os.path.join(WORKDIR, 'test.db')}",
+    'HISTORY_SHARD_DIR': os.path.join(WORKDIR, 'history'),
+    'JOB_WORKERS': '0',
+})
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from model_registry import ModelEntry
+
+OPEN_S = 0.05
+
+
+@pytest.fixture
+def make_breaker(app_module):
+    def make(**overrides):
+        options = dict(window_s=30, min_calls=4, error_rate=0.5, slo_s=0.1, slow_rate=0.5, open_s=OPEN_S, probes=2)
+        options.update(overrides)
+        return app_module.CircuitBreaker('test', **options)
+    return make
+
+
+def trip(breaker):
+    for ok in (True, True, False, False):
+        assert breaker.allow()
+        breaker.record(0.01, ok=ok)
+    assert breaker.state == breaker.OPEN
+
+
+def test_stays_closed_below_min_calls(make_breaker):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record(0.01, ok=False)
+    assert breaker.state == breaker.CLOSED
+    breaker.record(0.01, ok=False)
+    assert breaker.state == breaker.OPEN
+    assert breaker.last_trip_reason == '4/4 calls failed'
+
+
+def test_slow_calls_trip_the_breaker(make_breaker):
+    breaker = make_breaker()
+    for elapsed in (0.01, 0.01, 0.2, 0.3):
+        breaker.record(elapsed, ok=True)
+    assert breaker.state == breaker.OPEN
+    assert 'slower than 100 ms' in breaker.last_trip_reason
+
+
+def test_open_half_open_closed(make_breaker):
+    breaker = make_breaker()
+    trip(breaker)
+    assert not breaker.allow()
+    assert breaker.snapshot()['state'] == 'open'
+
+    time.sleep(OPEN_S * 1.5)
+    # Half-open admits exactly BREAKER_PROBES calls
+    assert breaker.allow()
+    assert breaker.state == breaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record(0.01, ok=True)
+    assert breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(0.01, ok=True)
+    assert breaker.state == breaker.CLOSED
+    assert breaker.allow()
+    assert breaker.snapshot()['window_calls'] == 0
+
+
+@pytest.mark.parametrize('elapsed, ok, reason', [
+    (0.01, False, 'probe failed'),
+    (0.5, True, 'probe took 500 ms'),
+])
+def test_failed_probe_reopens(make_breaker, elapsed, ok, reason):
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(OPEN_S * 1.5)
+    assert breaker.allow()
+    breaker.record(elapsed, ok=ok)
+    assert breaker.state == breaker.OPEN
+    assert breaker.last_trip_reason == reason
+    assert not breaker.allow()
+
+
+def test_open_breaker_serves_the_keyword_classifier(app_module):
+    config = app_module.app.config
+    saved = {key: config[key] for key in ('BREAKER_MIN_CALLS', 'BREAKER_OPEN_S')}
+    config.update(BREAKER_MIN_CALLS=2, BREAKER_OPEN_S=60)
+    calls = []
+
+    def failing(text, **kwargs):
+        calls.append(text)
+        raise RuntimeError('model down')
+
+    model = ModelEntry('breaker-test', 'v1', failing, source='test')
+    try:
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                app_module.classify_emotions('I am so happy', cascade=False, model=model)
+        assert app_module.breaker_for(model).state == 'open'
+
+        predictions, tier = app_module.classify_emotions('I am so happy', cascade=False, model=model)
+        assert tier == 'breaker'
+        assert predictions == app_module.fallback_classifier('I am so happy')[0]
+        assert len(calls) == 2
+    finally:
+        config.update(saved)
@@ -0,0 +1,75 @@
+import pytest
+
+from model_registry import ModelEntry
+
+
+def _predictions(*scores):
+    labels = ['joy', 'sadness', 'anger', 'fear', 'surprise', 'love', 'neutral']
+    padded = list(scores) + [0.0] * (len(labels) - len(scores))
+    return [{'label': label, 'score': score} for label, score in zip(labels, padded)]
+
+
+@pytest.fixture
+def gate(app_module):
+    config = app_module.app.config
+    saved = {key: config[key] for key in ('CASCADE_MIN_MARGIN', 'CASCADE_MIN_COVERAGE')}
+    config.update(CASCADE_MIN_MARGIN=0.35, CASCADE_MIN_COVERAGE=0.5)
+    yield config
+    config.update(saved)
+
+
+@pytest.fixture
+def model():
+    calls = []
+
+    def classifier(texts, **kwargs):
+        # Same shapes as the pipeline: one result list per input text
+        batch = texts if isinstance(texts, list) else [texts]
+        calls.extend(batch)
+        return [_predictions(0.1, 0.9) for _ in batch]
+
+    entry = ModelEntry('cascade-test', 'v1', classifier, source='test')
+    entry.calls = calls
+    return entry
+
+
+def test_margin_below_threshold_is_rejected(app_module, gate):
+    # 'happy' and 'sad' are both lexicon words: full coverage
+    features = app_module.TextFeatures('happy sad')
+    assert not app_module.cascade_accepts(features, _predictions(0.5, 0.2))
+    assert app_module.cascade_accepts(features, _predictions(0.6, 0.2))
+
+
+def test_margin_exactly_at_threshold_is_accepted(app_module, gate):
+    gate['CASCADE_MIN_MARGIN'] = 0.25
+    features = app_module.TextFeatures('happy')
+    assert app_module.cascade_accepts(features, _predictions(0.5, 0.25))
+
+
+def test_coverage_below_threshold_is_rejected(app_module, gate):
+    confident = _predictions(0.9, 0.05)
+    # One lexicon word out of three tokens, then out of two
+    assert not app_module.cascade_accepts(app_module.TextFeatures('happy about tuesday'), confident)
+    assert app_module.cascade_accepts(app_module.TextFeatures('happy tuesday'), confident)
+
+
+def test_lexicon_emojis_count_towards_coverage(app_module, gate):
+    confident = _predictions(0.9, 0.05)
+    assert app_module.fallback_classifier.lexicon_coverage('report 😄') == 0.5
+    assert app_module.cascade_accepts(app_module.TextFeatures('report 😄'), confident)
+
+
+def test_classify_emotions_skips_the_model_only_when_the_gate_accepts(app_module, gate, model):
+    predictions, tier = app_module.classify_emotions('so happy 😄', cascade=True, model=model)
+    assert tier == 'lexicon' and model.calls == []
+
+    predictions, tier = app_module.classify_emotions('The meeting moved to Tuesday', cascade=True, model=model)
+    assert tier == 'transformer' and model.calls == ['The meeting moved to Tuesday']
+    assert predictions == _predictions(0.1, 0.9)
+
+
+def test_batch_gate_matches_single_gate(app_module, gate, model):
+    texts = ['so happy 😄', 'The meeting moved to Tuesday', 'sad and lonely 😢']
+    single = [app_module.classify_emotions(text, cascade=True, model=model)[1] for text in texts]
+    batch = [tier for _, tier in app_module.classify_emotions_batch(texts, cascade=True, model=model)]
+    assert batch == single
@@ -0,0 +1,36 @@
+import base64
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def test_pie_chart_defaults_to_png(client):
+    data = client.post('/analyze', json={'text': 'What a great day 😄'}).get_json()
+    assert data['pie_chart_format'] == 'png'
+    assert base64.b64decode(data['pie_chart']).startswith(PNG_SIGNATURE)
+
+
+def test_svg_pie_chart_is_opt_in(client):
+    data = client.post('/analyze', json={'text': 'What a great day 😄', 'pie_chart_format': 'svg'}).get_json()
+    assert data['pie_chart_format'] == 'svg'
+    assert base64.b64decode(data['pie_chart']).startswith(b'<svg')
+
+
+def test_unknown_pie_chart_format_is_rejected(client):
+    response = client.post('/analyze', json={'text': 'What a great day', 'pie_chart_format': 'gif'})
+    assert response.status_code == 400
+
+
+def test_png_pie_chart_has_the_full_layout(app_module):
+    png = app_module.render_pie_chart_png({'joy': 0.7, 'sadness': 0.3})
+    width, height = struct.unpack('>II', png[16:24])
+    assert (width, height) == (780, 540)
+    # The bitmap text in the title row is drawn in black
+    raw = np.frombuffer(zlib.decompress(png[41:png.index(b'IEND') - 8]), dtype=np.uint8)
+    pixels = raw.reshape(height, width * 3 + 1)[:, 1:].reshape(height, width, 3)
+    assert (pixels[40:60] == 0).all(axis=2).any()
+    # Legend swatch for the first slice, right of the pie
+    assert pixels[300, 600].tolist() == app_module._hex_rgb(app_module.EMOTION_COLORS['joy']).tolist()
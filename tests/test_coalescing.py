@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+
+class StrictError(Exception):
+    """An exception that cannot be rebuilt from its args"""
+
+    def __init__(self, code, detail):
+        super().__init__(f"{code}: {detail}")
+
+
+def fan_out(app_module, key, func, waiters=3):
+    """Start `waiters` identical calls while the first is still running"""
+    release = threading.Event()
+
+    def blocking():
+        release.wait(5)
+        return func()
+
+    async def run():
+        tasks = [asyncio.ensure_future(app_module.run_coalesced(key, blocking)) for _ in range(waiters)]
+        # Every task registers (leader) or joins (followers) before the leader finishes
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    return asyncio.run(run())
+
+
+def test_followers_share_the_leaders_result(app_module):
+    assert fan_out(app_module, ('test', 'ok'), lambda: {'joy': 1.0}) == [{'joy': 1.0}] * 3
+
+
+def test_followers_raise_the_leaders_exception_type(app_module):
+    def fail():
+        raise ValueError('bad input', 42)
+
+    leader, *followers = fan_out(app_module, ('test', 'value-error'), fail)
+    assert type(leader) is ValueError
+    for error in followers:
+        assert type(error) is ValueError
+        assert error.args == ('bad input', 42)
+        # A fresh instance, not chained to the handler that built it
+        assert error is not leader
+        assert error.__cause__ is None and error.__suppress_context__
+
+
+def test_followers_fall_back_to_runtime_error(app_module):
+    def fail():
+        raise StrictError(7, 'no model')
+
+    leader, *followers = fan_out(app_module, ('test', 'strict-error'), fail)
+    assert type(leader) is StrictError
+    for error in followers:
+        assert type(error) is RuntimeError
+        assert 'no model' in str(error)
@@ -0,0 +1,65 @@
+import pytest
+
+
+@pytest.fixture
+def evaluation(app_module):
+    # Imported after app, so the harness reuses the test session's app module
+    import evaluation
+    return evaluation
+
+
+def test_percentile_is_nearest_rank(evaluation):
+    values = list(range(1, 11))
+    assert evaluation.percentile(values, 50) == 5
+    assert evaluation.percentile(values, 90) == 9
+    assert evaluation.percentile(values, 95) == 10
+    assert evaluation.percentile(values, 1) == 1
+    assert evaluation.percentile([], 50) == 0.0
+
+
+def test_classification_metrics(evaluation):
+    labels = ['joy', 'joy', 'sadness', 'sadness', 'anger']
+    predicted = ['joy', 'sadness', 'sadness', 'sadness', 'joy']
+    metrics = evaluation.classification_metrics(labels, predicted)
+
+    assert metrics['accuracy'] == 0.6
+    assert metrics['per_emotion']['joy'] == {'precision': 0.5, 'recall': 0.5, 'f1': 0.5, 'support': 2}
+    assert metrics['per_emotion']['sadness'] == {'precision': 0.6667, 'recall': 1.0, 'f1': 0.8, 'support': 2}
+    assert metrics['per_emotion']['anger']['f1'] == 0.0
+    # Emotions never used as a label are left out of the macro average
+    assert set(metrics['per_emotion']) == {'joy', 'sadness', 'anger'}
+    assert metrics['macro_f1'] == round((0.5 + 0.8 + 0.0) / 3, 4)
+
+
+def test_backends_report_on_the_keyword_backends(evaluation):
+    rows = [
+        {'text': 'So happy today 😄', 'label': 'joy'},
+        {'text': 'I feel so sad and alone 😢', 'label': 'sadness'},
+        {'text': 'No label on this one'},
+    ]
+    report = evaluation.backends_report(rows, ['fallback_classifier', 'keyword'])
+
+    assert report['corpus_size'] == 3
+    assert report['reference_backend'] == 'fallback_classifier'
+    reference = report['backends']['fallback_classifier']
+    assert reference['relevance_agreement'] == 1.0
+    assert reference['classification']['accuracy'] == 1.0
+    for result in report['backends'].values():
+        latency = result['latency_ms']
+        assert latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['max']
+
+
+def test_model_backends_need_the_model(evaluation, capsys):
+    assert evaluation.available_backends() == ['fallback_classifier', 'keyword']
+    with pytest.raises(SystemExit):
+        evaluation.main(['backends', '--backend', 'pipeline'])
+    with pytest.raises(SystemExit):
+        evaluation.main(['cascade'])
+    assert 'cascade needs the transformer model' in capsys.readouterr().err
+
+
+def test_breaker_disabled_restores_the_setting(evaluation, app_module):
+    assert app_module.app.config['BREAKER_ENABLED']
+    with evaluation.breaker_disabled():
+        assert not app_module.app.config['BREAKER_ENABLED']
+    assert app_module.app.config['BREAKER_ENABLED']
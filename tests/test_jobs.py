@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+from jobs import JobRunner
+from models import AnalysisJob, AnalysisJobItem
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    AnalysisJob.__table__.create(engine)
+    AnalysisJobItem.__table__.create(engine)
+    return engine
+
+
+def make_runner(engine, process_chunk, chunk_size=2):
+    return JobRunner(engine, process_chunk, workers=0, chunk_size=chunk_size, poll_s=0.01)
+
+
+def run_next(runner, worker='test-worker'):
+    job = runner._claim(worker)
+    assert job is not None
+    runner._run(job, worker)
+    return job.id
+
+
+def upper_chunk(texts, model_spec, options):
+    return [{'text': text.upper()} for text in texts]
+
+
+def test_job_runs_to_completion(engine):
+    runner = make_runner(engine, upper_chunk)
+    job = runner.submit(['a', 'b', 'c'])
+
+    run_next(runner)
+
+    status = runner.get(job['job_id'])
+    assert status['status'] == 'completed'
+    assert status['processed'] == 3
+    assert status['finished_at'] is not None
+    assert list(runner.iter_results(job['job_id'])) == [
+        (0, {'text': 'A'}), (1, {'text': 'B'}), (2, {'text': 'C'})
+    ]
+
+
+def test_job_yields_to_higher_priority_job(engine):
+    submitted = {}
+
+    def chunk(texts, model_spec, options):
+        if 'urgent' not in submitted:
+            submitted['urgent'] = runner.submit(['x'], priority=5)
+        return upper_chunk(texts, model_spec, options)
+
+    runner = make_runner(engine, chunk)
+    background = runner.submit(['a', 'b', 'c', 'd'], priority=0)
+
+    run_next(runner)
+    status = runner.get(background['job_id'])
+    assert status['status'] == 'queued'
+    assert status['processed'] == 2
+
+    assert run_next(runner) == submitted['urgent']['job_id']
+    assert runner.get(submitted['urgent']['job_id'])['status'] == 'completed'
+
+    assert run_next(runner) == background['job_id']
+    status = runner.get(background['job_id'])
+    assert status['status'] == 'completed'
+    assert status['processed'] == 4
+
+
+def test_cancelled_job_stops_and_keeps_status(engine):
+    def chunk(texts, model_spec, options):
+        runner.cancel(job['job_id'])
+        return upper_chunk(texts, model_spec, options)
+
+    runner = make_runner(engine, chunk)
+    job = runner.submit(['a', 'b', 'c', 'd'])
+
+    run_next(runner)
+
+    status = runner.get(job['job_id'])
+    assert status['status'] == 'cancelled'
+    assert status['processed'] == 0
+    assert runner._claim('test-worker') is None
+
+
+def test_failing_chunk_fails_job(engine):
+    def chunk(texts, model_spec, options):
+        raise ValueError('model exploded')
+
+    runner = make_runner(engine, chunk)
+    job = runner.submit(['a', 'b'])
+
+    run_next(runner)
+
+    status = runner.get(job['job_id'])
+    assert status['status'] == 'failed'
+    assert status['error'] == 'model exploded'
+    assert runner._claim('test-worker') is None
+
+
+def test_worker_thread_completes_job(engine):
+    runner = JobRunner(engine, upper_chunk, workers=1, chunk_size=2, poll_s=0.01)
+    job = runner.submit(['a', 'b', 'c'])
+    runner.start()
+    try:
+        for _ in range(500):
+            if runner.get(job['job_id'])['status'] == 'completed':
+                break
+            threading.Event().wait(0.01)
+    finally:
+        runner.stop()
+    assert runner.get(job['job_id'])['status'] == 'completed'
+
+
+def test_job_inference_runs_on_inference_executor(app_module, monkeypatch):
+    threads = []
+    real_inference = app_module.run_bulk_inference
+
+    def recording_inference(texts, model=None):
+        threads.append(threading.current_thread().name)
+        return real_inference(texts, model)
+
+    monkeypatch.setattr(app_module, 'run_bulk_inference', recording_inference)
+    results = app_module.process_job_chunk(['I am so happy', 'I feel sad'], None, {})
+
+    assert [r['top_emotion']['label'] for r in results] == ['joy', 'sadness']
+    assert threads and all(name.startswith('inference') for name in threads)
@@ -0,0 +1,47 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from websockets.sync.client import connect
+
+
+@pytest.fixture
+def live_server(app_module):
+    """uvicorn serving asgi_app on a free local port, as in `uvicorn asgi:asgi_app`"""
+    import asgi
+
+    app_module.app.config['LIVE_DEBOUNCE_MS'] = 10
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(asgi.asgi_app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, 'uvicorn did not start'
+        time.sleep(0.05)
+    yield f"ws://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+def test_live_socket_pushes_analysis(live_server):
+    with connect(f"{live_server}/ws/live", open_timeout=5) as websocket:
+        websocket.send(json.dumps({'text': 'I miss my family so much 😢. What a tough day!'}))
+        reply = json.loads(websocket.recv(timeout=10))
+
+    assert reply['type'] == 'analysis'
+    assert reply['sentences'] == 2
+    assert reply['rescored'] == 2
+    assert reply['top_emotion']['label'] == 'sadness'
+    assert reply['emoji_relevance']['emoji_results'][0]['emoji'] == '😢'
+
+
+def test_unknown_socket_path_is_closed(live_server):
+    with pytest.raises(Exception):
+        with connect(f"{live_server}/ws/other", open_timeout=5) as websocket:
+            websocket.recv(timeout=5)
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+
+import loadtest
+
+
+class FakeClient:
+    """Stands in for loadtest.Client: fixed service time, one call at a time"""
+
+    def __init__(self, service_s=0.0, status=200):
+        self.service_s = service_s
+        self.status = status
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, method, path, body=None):
+        with self._lock:
+            self.calls.append((method, path, body))
+            time.sleep(self.service_s)
+        return self.status, b'{}'
+
+
+def test_percentile_and_latency_summary():
+    latencies = [i / 1000 for i in range(1, 101)]
+    assert loadtest.percentile(latencies, 99.9) == 0.1
+    summary = loadtest.latency_summary(reversed(latencies))
+    assert summary == {'mean': 50.5, 'p50': 50.0, 'p95': 95.0, 'p99': 99.0, 'p999': 100.0, 'max': 100.0}
+    assert loadtest.latency_summary([]) is None
+
+
+def test_summarize_splits_errors_and_endpoints():
+    results = [
+        ('/analyze', 200, 0.010, b''),
+        ('/analyze', 200, 0.030, b''),
+        ('/analyze', 503, 0.005, b''),
+        ('/analyze/bulk', 0, 1.0, b'ConnectionResetError'),
+    ]
+    report = loadtest.summarize(results, elapsed=2.0)
+
+    assert report['overall']['requests'] == 4
+    assert report['overall']['throughput_rps'] == 2.0
+    assert report['overall']['error_rate'] == 0.5
+    assert report['overall']['errors'] == {'503': 1, 'transport:ConnectionResetError': 1}
+    # Only successful requests count towards latency
+    assert report['endpoints']['/analyze']['latency_ms']['max'] == 30.0
+    assert report['endpoints']['/analyze/bulk']['latency_ms'] is None
+
+
+def test_load_traffic_row_shapes(tmp_path):
+    path = tmp_path / 'traffic.jsonl'
+    rows = [
+        {'text': 'hello 😄'},
+        {'texts': ['a', 'b']},
+        {'title': 'Backlog title', 'body': 'and body'},
+        {'text': 'bulk me', 'endpoint': '/analyze/bulk'},
+    ]
+    path.write_text('\n'.join(json.dumps(row) for row in rows) + '\n\n', encoding='utf-8')
+
+    assert loadtest.load_traffic(str(path), bulk_size=3) == [
+        ('/analyze', {'text': 'hello 😄'}),
+        ('/analyze/bulk', {'texts': ['a', 'b']}),
+        ('/analyze', {'text': 'Backlog title and body'}),
+        ('/analyze/bulk', {'texts': ['bulk me'] * 3}),
+    ]
+
+
+def test_synthetic_traffic_is_reproducible():
+    first = loadtest.synthetic_traffic(200, bulk_ratio=0.25, bulk_size=4, seed=7)
+    assert first == loadtest.synthetic_traffic(200, bulk_ratio=0.25, bulk_size=4, seed=7)
+    bulk = [body for endpoint, body in first if endpoint == '/analyze/bulk']
+    assert 20 < len(bulk) < 80
+    assert all(len(body['texts']) == 4 for body in bulk)
+
+
+def test_open_loop_counts_queueing_and_completions():
+    # 50 requests/s against a server that needs 40 ms each, one at a time
+    client = FakeClient(service_s=0.04)
+    results, elapsed = loadtest.run_open_loop(client, [('/analyze', {'text': 'x'})], rate=50, duration=0.4, max_inflight=4)
+
+    assert len(results) == len(client.calls) == 20
+    # Throughput reflects completions: the backlog drains after the last start
+    assert elapsed >= 20 * 0.04
+    latencies = sorted(latency for _, _, latency, _ in results)
+    # Later requests wait behind earlier ones, measured from their scheduled start
+    assert latencies[-1] > 5 * latencies[0]
+
+
+def test_closed_loop_stops_at_the_deadline():
+    client = FakeClient(service_s=0.01)
+    traffic = [('/analyze', {'text': 'a'}), ('/analyze/bulk', {'texts': ['b']})]
+    results, elapsed = loadtest.run_closed_loop(client, traffic, concurrency=2, duration=0.2)
+    assert 0.2 <= elapsed < 0.5
+    assert {endpoint for endpoint, *_ in results} == {'/analyze', '/analyze/bulk'}
+
+
+def test_server_delta_and_compare():
+    before = {'inference_runs': 10, 'resource': {'cpu_user_s': 1.0, 'cpu_system_s': 0.5}}
+    after = {'inference_runs': 30, 'resource': {'cpu_user_s': 2.0, 'cpu_system_s': 1.5, 'rss_bytes': 2 ** 21, 'threads': 9}}
+    delta = loadtest.server_delta(before, after, elapsed=4.0)
+    assert delta['counters'] == {'inference_runs': 20}
+    assert (delta['cpu_s'], delta['cpu_utilization'], delta['rss_mb'], delta['threads']) == (2.0, 0.5, 2.0, 9)
+
+    rows = loadtest.compare(
+        {'config': {'rate': 10}, 'overall': {'latency_ms': {'p99': 200.0}, 'requests': 0}},
+        {'config': {'rate': 20}, 'overall': {'latency_ms': {'p99': 150.0}, 'requests': 5}}
+    )
+    assert rows == {
+        'overall.latency_ms.p99': {'before': 200.0, 'after': 150.0, 'change': -0.25},
+        'overall.requests': {'before': 0, 'after': 5, 'change': None},
+    }
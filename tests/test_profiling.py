@@ -0,0 +1,70 @@
+import os
+import pstats
+
+import pytest
+
+TOKEN = 'test-admin-token'
+
+
+@pytest.fixture
+def profiling(app_module, tmp_path):
+    config = app_module.app.config
+    saved = {key: config[key] for key in ('ADMIN_TOKEN', 'PROFILE_DIR', 'PROFILE_SAMPLE_RATE')}
+    config.update(ADMIN_TOKEN=TOKEN, PROFILE_DIR=str(tmp_path), PROFILE_SAMPLE_RATE=0)
+    yield tmp_path
+    config.update(saved)
+
+
+def analyze(client, headers):
+    response = client.post('/analyze', json={'text': 'Profiling a happy request 😄'}, headers=headers)
+    assert response.status_code == 200
+    return response
+
+
+def profiles(directory):
+    return [name for name in os.listdir(directory) if name.endswith('.prof')]
+
+
+@pytest.mark.parametrize('headers', [
+    {'X-Profile': '1'},
+    {'X-Profile': '1', 'X-Admin-Token': 'wrong'},
+    {'X-Admin-Token': TOKEN},
+])
+def test_profiles_need_the_header_and_the_admin_token(client, profiling, headers):
+    analyze(client, headers)
+    assert profiles(profiling) == []
+
+
+def test_header_with_admin_token_captures_a_profile(client, profiling):
+    analyze(client, {'X-Profile': '1', 'X-Admin-Token': TOKEN})
+    [name] = profiles(profiling)
+    assert name.endswith('-header.prof') and '-analyze-' in name
+    # A loadable pstats file
+    assert pstats.Stats(str(profiling / name)).total_calls > 0
+
+
+def test_no_header_profiles_without_admin_token_configured(app_module, client, profiling):
+    app_module.app.config['ADMIN_TOKEN'] = None
+    analyze(client, {'X-Profile': '1', 'X-Admin-Token': ''})
+    assert profiles(profiling) == []
+    assert client.get('/debug/profiles').status_code == 403
+
+
+def test_profile_listing_and_download_need_the_admin_token(client, profiling):
+    analyze(client, {'X-Profile': '1', 'X-Admin-Token': TOKEN})
+    assert client.get('/debug/profiles').status_code == 403
+    assert client.get('/debug/profiles', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+
+    listing = client.get('/debug/profiles', headers={'X-Admin-Token': TOKEN}).get_json()
+    [entry] = listing['profiles']
+    assert listing['format'] == 'pstats'
+
+    assert client.get(entry['url']).status_code == 403
+    download = client.get(entry['url'], headers={'X-Admin-Token': TOKEN})
+    assert download.status_code == 200
+    assert download.data == (profiling / entry['name']).read_bytes()
+
+
+def test_profile_download_stays_inside_the_profile_dir(client, profiling):
+    response = client.get('/debug/profiles/../test.db', headers={'X-Admin-Token': TOKEN})
+    assert response.status_code == 404
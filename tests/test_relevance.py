@@ -0,0 +1,54 @@
+import pytest
+
+
+def _scores(app_module, **values):
+    return {emotion: values.get(emotion, 0.0) for emotion in app_module.EMOTIONS}
+
+
+@pytest.fixture
+def rows(app_module):
+    return [
+        (_scores(app_module, sadness=0.8, joy=0.2), ['😢', '😄', '☔️', '☔']),
+        (_scores(app_module, love=0.9, joy=0.1), ['❤️', '❤', '🌧️', '🌧']),
+        (_scores(app_module, anger=0.6, fear=0.4), ['😡', '📎', '🧑‍💻', '👍🏽', '🇫🇷', '😨']),
+        (_scores(app_module, joy=1.0), []),
+        (_scores(app_module, neutral=1.0), ['☹', '☹️']),
+    ]
+
+
+def test_batch_matches_single_calls(app_module, rows):
+    batch = app_module.analyze_emoji_relevance_batch([s for s, _ in rows], [e for _, e in rows])
+    assert batch == [app_module.analyze_emoji_relevance(scores, emojis) for scores, emojis in rows]
+
+
+def test_pairs_follow_the_relevance_rules(app_module, rows):
+    for scores, emojis in rows:
+        relevance, status = app_module.analyze_emoji_relevance(scores, emojis)
+        if not emojis:
+            assert (relevance, status) == (None, 'no emojis')
+            continue
+        text_emotion = max(scores, key=scores.get)
+        text_category = app_module._emotion_category(text_emotion)
+        analyzed = emojis[:app_module.MAX_RELEVANCE_EMOJIS]
+        assert [r['emoji'] for r in relevance['emoji_results']] == analyzed
+        for result in relevance['emoji_results']:
+            emoji_emotion = app_module.get_emoji_sentiment(result['emoji'])
+            if emoji_emotion == text_emotion:
+                expected = ('very relevant', 1.0)
+            else:
+                expected = app_module.check_emoji_relevance(text_category, app_module._emotion_category(emoji_emotion))
+            assert (result['relevance'], result['relevance_score']) == expected
+        mean = sum(r['relevance_score'] for r in relevance['emoji_results']) / len(analyzed)
+        assert status == app_module._get_overall_relevance_status(mean)
+
+
+@pytest.mark.parametrize('with_selector, without_selector', [
+    ('❤️', '❤'), ('☔️', '☔'), ('☹️', '☹'), ('🌧️', '🌧'),
+])
+def test_variation_selector_does_not_change_sentiment(app_module, with_selector, without_selector):
+    sentiment = app_module.EMOJI_SENTIMENT_MAP[with_selector]
+    assert app_module.get_emoji_sentiment(with_selector) == sentiment
+    assert app_module.get_emoji_sentiment(without_selector) == sentiment
+    scores = _scores(app_module, **{sentiment: 1.0})
+    plain, _ = app_module.analyze_emoji_relevance(scores, [without_selector])
+    assert plain['emoji_results'][0]['relevance'] == 'very relevant'
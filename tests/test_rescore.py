@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from model_registry import ModelEntry
+from models import AnalysisHistory
+
+HISTORY = AnalysisHistory.__table__
+STORED = {'joy': 0.9, 'sadness': 0.1, 'model_version': 'emotion@1'}
+
+
+class StubClassifier:
+    """Stands in for a text-classification pipeline"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def __call__(self, texts, batch_size=None):
+        if self.fail:
+            raise RuntimeError('inference failed')
+        batch = texts if isinstance(texts, list) else [texts]
+        return [[{'label': 'sadness', 'score': 0.8}, {'label': 'joy', 'score': 0.2}] for _ in batch]
+
+
+@pytest.fixture
+def rows(app_module):
+    store = app_module.history_store
+    store.add_many([
+        {'text': f"rescore row {i}", 'timestamp': datetime.utcnow(), **STORED} for i in range(5)
+    ])
+    with store.engine.connect() as connection:
+        ids = connection.execute(
+            select(HISTORY.c.id).where(HISTORY.c.text.like('rescore row %')).order_by(HISTORY.c.id)
+        ).scalars().all()
+    yield ids
+    store.delete_ids(ids)
+
+
+def stored_versions(app_module, ids):
+    with app_module.history_store.engine.connect() as connection:
+        return connection.execute(
+            select(HISTORY.c.model_version).where(HISTORY.c.id.in_(ids))
+        ).scalars().all()
+
+
+def rescore(app_module, model, name):
+    with app_module.app.app_context():
+        return app_module.rescore_history(name, chunk_size=2, model=model, restart=True)
+
+
+def test_rescore_writes_target_model_scores(app_module, rows):
+    model = ModelEntry('stub', '2', StubClassifier(), source='test')
+    report = rescore(app_module, model, 'stub-ok')
+
+    assert report['finished'] is True
+    assert report['aborted'] is None
+    assert set(stored_versions(app_module, rows)) == {'stub@2'}
+
+
+def test_failed_inference_never_overwrites_rows(app_module, rows):
+    model = ModelEntry('stub', '3', StubClassifier(fail=True), source='test')
+    report = rescore(app_module, model, 'stub-failing')
+
+    assert report['finished'] is False
+    assert report['aborted'] and 'fallback-keyword' in report['aborted']
+    assert report['rows_rescored'] == 0
+    assert report['resumed_from_id'] == report['last_id'] == 0
+    assert set(stored_versions(app_module, rows)) == {'emotion@1'}
+
+
+def test_open_breaker_never_overwrites_rows(app_module, rows):
+    model = ModelEntry('stub', '4', StubClassifier(), source='test')
+    breaker = app_module.breaker_for(model)
+    breaker._transition(breaker.OPEN, 'test')
+    breaker._opened_at = float('inf')  # keep it open for the whole run
+    report = rescore(app_module, model, 'stub-breaker')
+
+    assert report['finished'] is False
+    assert report['aborted'] and 'fallback-breaker' in report['aborted']
+    assert set(stored_versions(app_module, rows)) == {'emotion@1'}
@@ -0,0 +1,70 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+TEXT = 'What a great day 😄 ' * 20
+
+
+def analyze(client, query='', headers=None):
+    return client.post(f'/analyze{query}', json={'text': TEXT}, headers=headers or {})
+
+
+def test_fields_project_the_payload(client):
+    response = analyze(client, '?fields=top_emotion,emotion_scores')
+    assert set(response.get_json()) == {'success', 'top_emotion', 'emotion_scores'}
+
+
+def test_plain_json_by_default(client):
+    response = analyze(client)
+    assert response.mimetype == 'application/json'
+    assert 'Content-Encoding' not in response.headers
+    assert {'Accept', 'Accept-Encoding'} <= set(response.vary)
+
+
+def test_msgpack_keeps_the_chart_as_raw_bytes(app_module, client):
+    msgpack = pytest.importorskip('msgpack')
+    response = analyze(client, '?fields=pie_chart,top_emotion', {'Accept': 'application/msgpack'})
+    assert response.mimetype == 'application/msgpack'
+    payload = msgpack.unpackb(response.data, raw=False)
+    assert set(payload) == {'success', 'top_emotion', 'pie_chart'}
+    assert payload['pie_chart'].startswith(b'\x89PNG')
+
+
+def test_json_preferred_over_msgpack_by_quality(client):
+    response = analyze(client, headers={'Accept': 'application/msgpack;q=0.5, application/json'})
+    assert response.mimetype == 'application/json'
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('gzip', 'gzip'),
+    ('br, gzip', 'br'),
+    ('gzip, br;q=0.1', 'gzip'),
+    ('identity', None),
+])
+def test_compression_negotiation(app_module, client, accept_encoding, expected):
+    if expected == 'br':
+        pytest.importorskip('brotli')
+    response = analyze(client, headers={'Accept-Encoding': accept_encoding})
+    assert response.headers.get('Content-Encoding') == expected
+    body = response.data
+    if expected == 'gzip':
+        body = gzip.decompress(body)
+    elif expected == 'br':
+        body = app_module.brotli.decompress(body)
+    assert json.loads(body)['success'] is True
+
+
+def test_small_bodies_are_not_compressed(app_module):
+    payload = {'success': True, 'top_emotion': {'label': 'joy', 'confidence': 0.9}}
+    body, mimetype, encoding = app_module.encode_payload(payload, compression='gzip')
+    assert encoding is None
+    assert json.loads(body) == payload
+
+
+def test_encode_payload_base64_encodes_bytes_in_json(app_module):
+    payload = {'success': True, 'pie_chart': b'\x89PNG-bytes', 'text': 'x' * 2000}
+    body, mimetype, encoding = app_module.encode_payload(payload, fields=['pie_chart'], compression='gzip')
+    assert (mimetype, encoding) == ('application/json', None)
+    assert json.loads(body) == {'success': True, 'pie_chart': base64.b64encode(b'\x89PNG-bytes').decode()}
@@ -0,0 +1,46 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import text as sql_text
+
+
+def _freelist_and_size(engine):
+    with engine.connect() as connection:
+        free_pages = connection.execute(sql_text("PRAGMA freelist_count")).scalar()
+    return free_pages, os.path.getsize(engine.url.database)
+
+
+def test_compaction_vacuums_freed_pages(app_module):
+    store = app_module.history_store
+    engine = store.engines()[0]
+    old = datetime.utcnow() - timedelta(days=400)
+    store.add_many([
+        {'text': f"old entry {i} " + 'x' * 2000, 'timestamp': old + timedelta(minutes=i), 'joy': 1.0}
+        for i in range(600)
+    ])
+    with engine.connect() as connection:
+        connection.execute(sql_text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    free_before, size_before = _freelist_and_size(engine)
+
+    report = app_module.compact_history(days=30, batch_size=200, pause=0)
+
+    free_after, size_after = _freelist_and_size(engine)
+    assert report['rows_compacted'] >= 600
+    assert report['incremental_vacuum'] is True
+    assert report['bytes_reclaimed'] > 1_000_000
+    assert free_before == 0
+    assert free_after == 0
+    assert size_after < size_before - 1_000_000
+
+
+def test_compaction_changes_the_history_version(app_module, client):
+    store = app_module.history_store
+    store.add({'text': 'compaction version probe', 'timestamp': datetime.utcnow() - timedelta(days=400), 'joy': 1.0})
+    etag = client.get('/history').headers['ETag']
+
+    app_module.compact_history(days=30, pause=0)
+
+    with app_module.app.app_context():
+        _, _, modified_at = app_module.history_version()
+    assert modified_at == store.compacted_at()
+    assert client.get('/history', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, text as sql_text
+
+import storage
+from storage import SHARD_ID_SPACE, SQLHistoryStore, ShardedHistoryStore, engine_options, migrate
+
+
+@pytest.fixture
+def sql_store(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'history.db'}"
+    engine = create_engine(uri, **engine_options(uri))
+    migrate(engine)
+    yield SQLHistoryStore(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def sharded_store(tmp_path):
+    store = ShardedHistoryStore(str(tmp_path / 'shards'))
+    yield store
+    for engine in store.engines():
+        engine.dispose()
+
+
+def test_backends_agree_on_the_conformance_scenario():
+    report = storage.check()
+    assert report['consistent'], report['mismatches']
+    assert report['backends'] == ['sqlite', 'sqlite-sharded']
+
+
+@pytest.mark.parametrize('store_fixture', ['sql_store', 'sharded_store'])
+def test_conformance_scenario(request, store_fixture):
+    report = storage.run_conformance(request.getfixturevalue(store_fixture))
+    assert report['version_total'] == 8
+    assert report['page_1'] == ['sample 7', 'sample 6', 'sample 5']
+    assert report['pagination'] == [8, 3, True, [1, 2, 3]]
+    assert report['ids_unique_and_ordered']
+    assert report['updated'] == [('sample 1', 'rescored', 0.9)]
+    assert report['deleted'] == 1
+    # Everything before 2026-02-10 folds into three daily aggregates
+    assert report['compacted_rows'] == 4
+    assert [a['period_start'] for a in report['aggregates']] == ['2026-02-03', '2026-01-20', '2026-01-05']
+    assert report['aggregates'][2]['rows'] == 2
+    assert report['compacted_at_recorded']
+    assert report['remaining'] == ['sample 6', 'sample 5', 'sample 4']
+
+
+def test_sharded_ids_encode_the_month(sharded_store):
+    row_id = sharded_store.add({'text': 'october', 'timestamp': datetime(2026, 10, 3)})
+    assert row_id == 202610 * SHARD_ID_SPACE + 1
+    assert sharded_store.add_many([
+        {'text': 'november', 'timestamp': datetime(2026, 11, 1)},
+        {'text': 'october again', 'timestamp': datetime(2026, 10, 30)},
+    ]) == 2
+    assert len(sharded_store.engines()) == 2
+    newest_id, total, _ = sharded_store.version()
+    assert (newest_id, total) == (202611 * SHARD_ID_SPACE + 1, 3)
+
+
+def test_migrate_upgrades_an_old_schema_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(sql_text(
+            "CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, text TEXT NOT NULL, timestamp DATETIME, "
+            "joy FLOAT, sadness FLOAT, anger FLOAT, fear FLOAT, surprise FLOAT, love FLOAT, neutral FLOAT, "
+            "emoji_relevance VARCHAR(50), relevance_score FLOAT)"
+        ))
+        connection.execute(sql_text(
+            "CREATE TABLE history_aggregate (id INTEGER PRIMARY KEY, period_start DATETIME NOT NULL UNIQUE, "
+            "rows INTEGER, joy FLOAT, sadness FLOAT, anger FLOAT, fear FLOAT, surprise FLOAT, love FLOAT, "
+            "neutral FLOAT, relevance_score FLOAT)"
+        ))
+
+    applied = migrate(engine)
+    assert len(applied) == len(storage.MIGRATIONS)
+    assert migrate(engine) == []
+
+    inspector = inspect(engine)
+    assert 'model_version' in {c['name'] for c in inspector.get_columns('analysis_history')}
+    assert 'updated_at' in {c['name'] for c in inspector.get_columns('history_aggregate')}
+    assert 'ix_analysis_history_timestamp' in {i['name'] for i in inspector.get_indexes('analysis_history')}
+    engine.dispose()
+
+
+def test_listeners_hear_every_write(sql_store):
+    calls = []
+    sql_store.add_listener(lambda: calls.append(1))
+    row_id = sql_store.add({'text': 'one'})
+    sql_store.add_many([{'text': 'two'}, {'text': 'three'}])
+    sql_store.update_many([{'id': row_id, 'joy': 0.5}])
+    sql_store.delete_ids([row_id])
+    assert len(calls) == 4
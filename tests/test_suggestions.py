@@ -0,0 +1,47 @@
+import emoji
+import pytest
+
+
+def _profile(app_module, emoji_char):
+    profile = app_module._emoji_emotion_profile(emoji_char, emoji.EMOJI_DATA[emoji_char])
+    return dict(zip(app_module.EMOTIONS, profile.tolist()))
+
+
+def _top(app_module, emotion, k):
+    scores = {e: 1.0 if e == emotion else 0.0 for e in app_module.EMOTIONS}
+    return [s['emoji'] for s in app_module.rank_emoji_suggestions(scores, k=k)]
+
+
+@pytest.mark.parametrize('emoji_char, emotion', [
+    ('🔮', 'sadness'),   # crystal_ball: 'cry'
+    ('👲', 'fear'),      # person_with_skullcap: 'skull'
+    ('🍜', 'anger'),     # steaming_bowl: 'steam'
+    ('🐳', 'anger'),     # spouting_whale: 'pout'
+    ('🦐', 'anger'),     # shrimp: 'imp'
+    ('🧃', 'anger'),     # beverage_box: 'rage'
+    ('😈', 'joy'),       # smiling_face_with_horns
+    ('🥲', 'joy'),       # smiling_face_with_tear
+])
+def test_name_keywords_match_whole_tokens(app_module, emoji_char, emotion):
+    assert _profile(app_module, emoji_char)[emotion] == 0.0
+
+
+def test_name_keywords_still_match_real_names(app_module):
+    assert _profile(app_module, '😤')['anger'] > 0   # face_with_steam_from_nose
+    assert _profile(app_module, '💀')['fear'] > 0    # skull
+    assert _profile(app_module, '😢')['sadness'] > 0  # crying_face
+
+
+def test_rankings_exclude_false_positives(app_module):
+    assert '🔮' not in _top(app_module, 'sadness', 10)
+    assert '👲' not in _top(app_module, 'fear', 10)
+    assert not {'🍜', '🐳', '🦐', '🧃'} & set(_top(app_module, 'anger', 20))
+    assert not {'😈', '🥲'} & set(_top(app_module, 'joy', 20))
+
+
+def test_all_zero_scores_get_no_suggestions(app_module):
+    zero = {emotion: 0.0 for emotion in app_module.EMOTIONS}
+    joy = {**zero, 'joy': 1.0}
+    suggestions = app_module.rank_emoji_suggestions_batch([zero, joy], [[], []])
+    assert suggestions[0] == []
+    assert len(suggestions[1]) == app_module.app.config['SUGGESTION_TOP_K']
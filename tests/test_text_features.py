@@ -0,0 +1,73 @@
+import pytest
+
+FAMILY = '👨‍👩‍👧'
+TECHNOLOGIST = '🧑‍💻'
+THUMBS_MEDIUM = '👍🏽'
+FRANCE = '🇫🇷'
+HEART = '❤️'
+
+
+@pytest.mark.parametrize('text, expected', [
+    (f"family {FAMILY} time", [FAMILY]),
+    (f"coding {TECHNOLOGIST}", [TECHNOLOGIST]),
+    (f"nice {THUMBS_MEDIUM}{THUMBS_MEDIUM}", [THUMBS_MEDIUM, THUMBS_MEDIUM]),
+    (f"bonjour {FRANCE}", [FRANCE]),
+    (f"love {HEART} you", [HEART]),
+    ('no emojis here', []),
+])
+def test_extract_emojis_returns_whole_graphemes(app_module, text, expected):
+    assert app_module.extract_emojis(text) == expected
+    assert app_module.TextFeatures(text).emojis == expected
+
+
+def test_clean_text_matches_remove_emojis(app_module):
+    text = f"  {FAMILY} Weekend {THUMBS_MEDIUM} with {FRANCE} friends {HEART}  "
+    assert app_module.TextFeatures(text).clean_text == app_module.remove_emojis(text)
+
+
+def test_features_collect_words_phrases_and_punctuation(app_module):
+    features = app_module.TextFeatures("Tough day... Miss my family!! Isn't it sad? 😔")
+    assert features.words == ['tough', 'day', 'miss', 'my', 'family', "isn't", 'it', 'sad']
+    assert features.has('tough day') and features.has('miss my family') and features.has('😔')
+    assert not features.has('not happy')
+    assert features.count(app_module.SADNESS_INDICATORS) == 2
+    assert features.stats() == {'words': 8, 'emojis': 1, 'exclamations': 2, 'questions': 1, 'ellipses': 1}
+
+
+def test_rule_phrases_keep_substring_semantics(app_module):
+    # 'sad' inside 'crusade' counts, as the `in text_lower` checks did
+    assert app_module.TextFeatures('On a crusade').has('sad')
+
+
+def test_text_features_passes_features_through(app_module):
+    features = app_module.TextFeatures('hello')
+    assert app_module.text_features(features) is features
+
+
+@pytest.mark.parametrize('text', [
+    "I'm not happy, but it's fine!!! What if it rains?",
+    'Miss my family 😔 tough day, so overwhelming ❤️ 💔',
+    'Wow 😲 unexpected?? I love it',
+    'short',
+])
+def test_scoring_accepts_text_or_features(app_module, text):
+    features = app_module.TextFeatures(text)
+    assert app_module.fallback_classifier(features) == app_module.fallback_classifier(text)
+    assert app_module.fallback_classifier.lexicon_coverage(features) == app_module.fallback_classifier.lexicon_coverage(text)
+    assert app_module._fallback_analysis(features) == app_module._fallback_analysis(text)
+    assert app_module.get_emotion_scores_with_tier(features) == app_module.get_emotion_scores_with_tier(text)
+
+
+def test_keyword_classifier_matches_the_pre_features_code(app_module):
+    from benchmarks_baseline import baseline_classifier, baseline_scores_from_predictions
+    texts = [
+        "I'm not happy, but it's fine!!! What if it rains?",
+        'Having a really tough day today... 😔💔 Miss my family so much and everything feels overwhelming.',
+        'Just want to crawl into bed and sleep forever ☔️',
+        'Not sad at all, despite the storm 😄🎉',
+        'According to the report, the numbers were said to be fine.',
+    ]
+    for text in texts:
+        predictions = app_module.fallback_classifier(text)[0]
+        assert predictions == pytest.approx(baseline_classifier(text)[0])
+        assert app_module.scores_from_predictions(text, predictions) == baseline_scores_from_predictions(text, predictions)